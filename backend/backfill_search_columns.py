@@ -0,0 +1,109 @@
+import argparse
+import time
+from sqlalchemy import delete, insert, or_, select
+
+from database import SessionLocal
+from models.product import (
+    Product, ProductSpecValue, SEARCH_SHADOW_FIELDS, SPEC_FIELDS,
+    compute_search_columns, compute_spec_values
+)
+
+def backfill_search_columns(batch_size: int = 1000, only_missing: bool = True):
+    """
+    分批回填 product_info 的拼音 / 首字母 / 标准化影子列
+
+    按主键顺序分页（WHERE id > 上一批最后一个 id），每批只读取源字段、批量更新，
+    不会一次性加载整张表。
+    """
+    db = SessionLocal()
+    source_columns = [getattr(Product, field) for field in SEARCH_SHADOW_FIELDS]
+    last_id = ""
+    updated = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            query = db.query(Product.id, *source_columns).filter(Product.id > last_id)
+            if only_missing:
+                query = query.filter(or_(
+                    Product.name_pinyin.is_(None),
+                    Product.name_normalized.is_(None)
+                ))
+            rows = query.order_by(Product.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            mappings = []
+            for row in rows:
+                values = dict(zip(SEARCH_SHADOW_FIELDS, row[1:]))
+                mappings.append({"id": row.id, **compute_search_columns(values)})
+            db.bulk_update_mappings(Product, mappings)
+            db.commit()
+
+            last_id = rows[-1].id
+            updated += len(rows)
+            print(f"已回填 {updated} 条，最后 id: {last_id}")
+
+        elapsed = time.perf_counter() - start
+        print(f"影子列回填完成：共 {updated} 条，耗时 {elapsed:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"错误: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+def backfill_spec_values(batch_size: int = 1000, only_missing: bool = True):
+    """
+    分批重建 product_spec_values 数值规格表
+
+    与影子列回填相同，按主键顺序分页；每批先删除这些产品已有的规格行再批量插入
+    """
+    db = SessionLocal()
+    spec_table = ProductSpecValue.__table__
+    source_columns = [getattr(Product, field) for field in SPEC_FIELDS]
+    last_id = ""
+    updated = 0
+    inserted = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            query = db.query(Product.id, *source_columns).filter(Product.id > last_id)
+            if only_missing:
+                query = query.filter(Product.id.notin_(select(ProductSpecValue.product_id)))
+            rows = query.order_by(Product.id).limit(batch_size).all()
+            if not rows:
+                break
+
+            spec_rows = []
+            for row in rows:
+                spec_rows.extend(compute_spec_values(row.id, dict(zip(SPEC_FIELDS, row[1:]))))
+            db.execute(delete(spec_table).where(spec_table.c.product_id.in_([row.id for row in rows])))
+            if spec_rows:
+                db.execute(insert(spec_table), spec_rows)
+            db.commit()
+
+            last_id = rows[-1].id
+            updated += len(rows)
+            inserted += len(spec_rows)
+            print(f"已处理 {updated} 个产品，写入 {inserted} 条规格，最后 id: {last_id}")
+
+        elapsed = time.perf_counter() - start
+        print(f"数值规格回填完成：共 {updated} 个产品，{inserted} 条规格，耗时 {elapsed:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"错误: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="回填产品搜索影子列 / 数值规格表")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批处理的产品数")
+    parser.add_argument("--all", action="store_true", help="重新计算全部产品，而不只是缺失影子列的产品")
+    parser.add_argument("--specs", action="store_true", help="回填数值规格表 product_spec_values，而不是影子列")
+    args = parser.parse_args()
+
+    if args.specs:
+        backfill_spec_values(batch_size=args.batch_size, only_missing=not args.all)
+    else:
+        backfill_search_columns(batch_size=args.batch_size, only_missing=not args.all)
@@ -0,0 +1,94 @@
+"""
+目录快照基准：从行数据构建搜索索引 vs 内存映射快照
+
+用 catalog_samples 生成的产品文本构建索引、写出快照，再分别在子进程中测量
+两种启动方式的耗时与私有内存增量（RssAnon；映射的快照页属于共享页缓存，
+多个 worker 只占一份，不计入）。
+
+运行（在 backend 目录下）：
+    python -m benchmarks.bench_catalog_snapshot [--products 100000]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.catalog_samples import SAMPLE_BRANDS, SAMPLE_SPECS, sample_catalog_strings
+from services.catalog_snapshot import write_snapshot
+from services.search_index import ProductSearchIndex
+
+MATERIALS = ['PPR', 'PVC', 'PE', '铜', '不锈钢', None]
+COLORS = ['白', '灰', '绿', None]
+PRODUCT_TYPES = ['管材', '管件', '阀门', None]
+
+
+def sample_rows(count: int, seed: int = 42):
+    """(id, *INDEX_COLUMNS)：名称、品名、品牌、材质、规格、颜色、型号、产品类型、使用类型、子类型"""
+    rnd = random.Random(seed)
+    names = sample_catalog_strings(count, seed)
+    return [
+        (f"P{i:07d}", name, name.split()[0], rnd.choice(SAMPLE_BRANDS), rnd.choice(MATERIALS),
+         rnd.choice(SAMPLE_SPECS), rnd.choice(COLORS), f"M{rnd.randrange(5000):04d}", rnd.choice(PRODUCT_TYPES),
+         None, None)
+        for i, name in enumerate(names)
+    ]
+
+
+def private_rss_mb() -> float:
+    """当前进程的匿名（私有）常驻内存，仅 Linux"""
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(mode: str, products: int, directory: str) -> None:
+    """在干净的进程中测量一种启动方式"""
+    before = private_rss_mb()
+    start = time.perf_counter()
+    index = ProductSearchIndex()
+    if mode == "build":
+        index.build(sample_rows(products))
+    else:
+        from services.catalog_snapshot import open_snapshot
+        index.attach_arrays(open_snapshot(directory).arrays)
+    elapsed = time.perf_counter() - start
+    query_start = time.perf_counter()
+    hits = len(index.rank(["ppr", "弯头"]))
+    query_ms = (time.perf_counter() - query_start) * 1000
+    print(f"{elapsed * 1000:.1f} {private_rss_mb() - before:.1f} {query_ms:.2f} {hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="目录快照基准")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--child", choices=["build", "snapshot"], help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.products, args.dir)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = ProductSearchIndex()
+        index.build(sample_rows(args.products))
+        path = write_snapshot(index, 0, directory)
+        size = sum(os.path.getsize(os.path.join(path, entry)) for entry in os.listdir(path))
+        print(f"{args.products} 个产品，快照 {size / 1024 / 1024:.1f}MB")
+        for label, mode in (("从行数据构建", "build"), ("映射快照", "snapshot")):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_catalog_snapshot",
+                 "--products", str(args.products), "--child", mode, "--dir", directory],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            elapsed, rss, query_ms, hits = output[-4:]
+            print(f"{label:<8} 启动 {float(elapsed):9.1f}ms  私有内存增量 {float(rss):7.1f}MB  "
+                  f"首次查询 {float(query_ms):7.2f}ms  命中 {hits}")
+
+
+if __name__ == "__main__":
+    main()
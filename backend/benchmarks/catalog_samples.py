@@ -0,0 +1,48 @@
+import itertools
+import random
+from typing import List
+
+# 数据库不可用时使用的代表性产品文本，取自 product_info 的常见命名方式
+SAMPLE_BRANDS = ['联塑', '日丰', '伟星', '金德', '宝丰', '达塑', '津达', '立信', '星辉', '盛隆']
+SAMPLE_NAMES = [
+    'ppr给水管', 'PPR热水管', 'pvc-u排水管', 'PVC电工套管', 'pe给水管', 'hdpe双壁波纹管',
+    'upvc排水管件', 'ppr等径弯头', 'PVC90度弯头', 'ppr等径三通', 'PE直通', '铜球阀', '不锈钢闸阀',
+    '截止阀', 'cpvc电力管', 'abs管件', 'PP-R内丝弯头', 'PVC线槽', '农业灌溉管', '建筑排水立管'
+]
+SAMPLE_SPECS = [
+    'dn20', 'DN25', 'dn32 1.6兆帕', '1/2寸', '3/4寸', '1.5寸', '20毫米', '32MM', '110毫米',
+    '4米', '6M', '90度', '45度', '2.5兆帕', '1.25兆帕', '50厘米', '1立方米', '750瓦', '2千瓦'
+]
+
+def sample_catalog_strings(count: int = 20000, seed: int = 42) -> List[str]:
+    """生成与真实产品名称分布相近的文本"""
+    rnd = random.Random(seed)
+    return [
+        f"{rnd.choice(SAMPLE_BRANDS)}{rnd.choice(SAMPLE_NAMES)} {rnd.choice(SAMPLE_SPECS)}"
+        for _ in range(count)
+    ]
+
+def load_catalog_strings(limit: int = 20000) -> List[str]:
+    """
+    读取真实产品文本（name / product_name / brand / specification）
+
+    数据库不可用时退回到 sample_catalog_strings
+    """
+    try:
+        from database import SessionLocal
+        from models.product import Product
+
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                Product.name, Product.product_name, Product.brand, Product.specification
+            ).limit(limit).all()
+        finally:
+            db.close()
+        strings = [value for value in itertools.chain.from_iterable(rows) if value]
+        if strings:
+            print(f"使用数据库中的 {len(strings)} 条产品文本")
+            return strings
+    except Exception as e:
+        print(f"无法读取产品数据（{str(e).splitlines()[0]}），使用内置样本")
+    return sample_catalog_strings(limit)
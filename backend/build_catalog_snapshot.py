@@ -0,0 +1,20 @@
+import argparse
+import os
+import time
+
+from database import SessionLocal
+from services.catalog_snapshot import CATALOG_SNAPSHOT_DIR, build_snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="构建产品目录的列式快照，供 worker 启动时内存映射加载")
+    parser.add_argument("--dir", default=CATALOG_SNAPSHOT_DIR, help="快照目录（默认取 CATALOG_SNAPSHOT_DIR）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        path = build_snapshot(db, args.dir)
+    finally:
+        db.close()
+    size = sum(os.path.getsize(os.path.join(path, entry)) for entry in os.listdir(path))
+    print(f"快照已写入 {path}，{size / 1024 / 1024:.1f}MB，耗时 {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,88 @@
+from typing import Any, Callable, Dict, Generator, Optional, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, Session
+
+from services.pool_metrics import InstrumentedQueuePool, PoolMetrics
+
+# 加载环境变量
+load_dotenv()
+
+# 数据库配置
+DATABASE_URL = f"mysql+mysqlconnector://{os.getenv('DB_USER', 'root')}:{os.getenv('DB_PASSWORD', 'Ac661978')}@{os.getenv('DB_HOST', '127.0.0.1')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'mioflow')}"
+
+# 连接池配置
+# DB_POOL_SIZE: 常驻连接数；DB_MAX_OVERFLOW: 高峰期允许额外创建的连接数
+# DB_POOL_TIMEOUT: 连接池耗尽时等待空闲连接的秒数，超时抛出 TimeoutError
+# DB_POOL_RECYCLE: 连接最长使用秒数，需小于 MySQL 的 wait_timeout，避免拿到已被服务端断开的连接
+# DB_POOL_PRE_PING: 取出连接时先 ping 一次，自动替换失效连接
+POOL_SETTINGS: Dict[str, Any] = {
+    "pool_size": int(os.getenv('DB_POOL_SIZE', '10')),
+    "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', '20')),
+    "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    "pool_pre_ping": os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+}
+
+
+def create_db_engine(url: str = DATABASE_URL, metrics: Optional[PoolMetrics] = None, **overrides) -> Engine:
+    """
+    按 POOL_SETTINGS 创建数据库引擎，overrides 覆盖单项配置
+
+    传入 metrics 时记录连接池指标（获取耗时、排队次数、连接创建 / 关闭）
+    """
+    settings = {**POOL_SETTINGS, **overrides}
+    db_engine = create_engine(url, poolclass=InstrumentedQueuePool, **settings)
+    if metrics is not None:
+        metrics.attach(db_engine)
+    return db_engine
+
+
+# 连接池指标，由 /api/v1/metrics/db 输出
+pool_metrics = PoolMetrics()
+
+# 创建数据库引擎
+engine = create_db_engine(metrics=pool_metrics)
+
+# 创建会话工厂
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# 数据库线程池：同步的 Session 调用放到这里执行，不阻塞事件循环。线程数与连接池容量一致，
+# 并发请求数超过连接数时在线程池队列里排队，而不是占着线程等连接
+DB_EXECUTOR_WORKERS = int(os.getenv(
+    'DB_EXECUTOR_WORKERS',
+    str(POOL_SETTINGS["pool_size"] + max(POOL_SETTINGS["max_overflow"], 0))
+))
+db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+T = TypeVar("T")
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    在数据库线程池中执行同步函数并等待结果
+
+    async 路由里所有访问数据库的调用都经过这里；同一个 Session 在一次请求内只会被
+    一个线程顺序使用，不存在并发访问
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(db_executor, functools.partial(context.run, func, *args, **kwargs))
+
+
+# 依赖项
+def get_db() -> Generator[Session, None, None]:
+    """
+    获取数据库会话
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
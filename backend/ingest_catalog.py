@@ -0,0 +1,271 @@
+import argparse
+import csv
+import os
+import re
+import time
+import unicodedata
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Connection
+
+from database import engine
+from models.product import (
+    Product, ProductSpecValue, SEARCH_SHADOW_FIELDS, SPEC_FIELDS,
+    compute_search_columns, compute_spec_values, notify_catalog_write, record_product_changes
+)
+
+# 供应商价目表常见的列名 -> product_info 字段；字段名本身（name / brand ...）也可直接作为列名
+COLUMN_ALIASES = {
+    "id": "id", "产品id": "id", "商品id": "id",
+    "编码": "code", "产品编码": "code", "商品编码": "code",
+    "物料编码": "material_code", "物料号": "material_code",
+    "名称": "name", "产品名称": "name", "商品名称": "name",
+    "品牌": "brand", "输出品牌": "output_brand",
+    "品名": "product_name",
+    "型号": "model",
+    "规格": "specification", "规格型号": "specification",
+    "颜色": "color",
+    "长度": "length",
+    "重量": "weight",
+    "功率": "wattage",
+    "压力": "pressure", "公称压力": "pressure",
+    "角度": "degree",
+    "材质": "material",
+    "价格": "price", "单价": "price", "含税单价": "price",
+    "产品类型": "product_type",
+    "使用类型": "usage_type",
+    "子类型": "sub_type",
+}
+
+# 可写入的源字段（影子列由 compute_search_columns 计算）
+SOURCE_FIELDS = (
+    "id", "code", "name", "brand", "material_code", "output_brand", "product_name", "model",
+    "specification", "color", "length", "weight", "wattage", "pressure", "degree", "material",
+    "price", "product_type", "usage_type", "sub_type",
+)
+REQUIRED_FIELDS = ("code", "name", "brand", "material_code")
+
+# 枚举字段的合法取值，与模型定义一致；不合法的取值写为 NULL
+ENUM_VALUES = {
+    field: set(getattr(Product, field).type.enums)
+    for field in ("product_type", "usage_type", "sub_type")
+}
+
+# 与字段长度对应的截断上限
+FIELD_LENGTHS = {
+    column.name: column.type.length
+    for column in Product.__table__.columns
+    if getattr(column.type, "length", None)
+}
+
+PRICE_PATTERN = re.compile(r'[^\d.\-]')
+
+
+def _clean(value: Any) -> Optional[str]:
+    """全角转半角（ＤＮ２０ -> DN20）、合并空白，空串视为 NULL"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = ' '.join(unicodedata.normalize('NFKC', str(value)).split())
+    return text or None
+
+
+def _price(value: Any) -> Optional[Decimal]:
+    text = _clean(value)
+    if text is None:
+        return None
+    try:
+        return Decimal(PRICE_PATTERN.sub('', text)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def map_header(header: Iterable[Any]) -> List[Optional[str]]:
+    """把表头映射为字段名，无法识别的列为 None"""
+    fields = []
+    for column in header:
+        name = (_clean(column) or "").lower()
+        fields.append(COLUMN_ALIASES.get(name, name if name in SOURCE_FIELDS else None))
+    return fields
+
+
+def normalize_row(values: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    清洗一行并计算影子列
+
+    返回 (行, 错误原因)；缺少必填字段时行为 None。未提供 id 时用物料编码作为主键。
+    """
+    row: Dict[str, Any] = {}
+    for field in SOURCE_FIELDS:
+        if field not in values:
+            continue
+        if field == "price":
+            row[field] = _price(values[field])
+            continue
+        text = _clean(values[field])
+        if text is not None and field in ENUM_VALUES and text not in ENUM_VALUES[field]:
+            text = None
+        if text is not None and field in FIELD_LENGTHS:
+            text = text[:FIELD_LENGTHS[field]]
+        row[field] = text
+
+    if not row.get("id"):
+        row["id"] = row.get("material_code")
+    missing = [field for field in ("id", *REQUIRED_FIELDS) if not row.get(field)]
+    if missing:
+        return None, f"缺少必填字段: {', '.join(missing)}"
+
+    # 只计算文件中出现的源字段对应的影子列，缺失的列保持数据库中的原值
+    present = [field for field in SEARCH_SHADOW_FIELDS if field in row]
+    shadow = compute_search_columns({field: row[field] for field in present})
+    row.update({column: value for column, value in shadow.items() if column.rsplit("_", 1)[0] in present})
+    return row, None
+
+
+def read_csv(path: str, encoding: str) -> Iterator[Dict[str, Any]]:
+    """逐行读取 CSV，不加载整个文件"""
+    with open(path, newline='', encoding=encoding) as file:
+        reader = csv.reader(file)
+        fields = map_header(next(reader, []))
+        for record in reader:
+            yield {field: value for field, value in zip(fields, record) if field}
+
+
+def read_xlsx(path: str, sheet: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """以只读模式逐行读取 XLSX，内存占用与文件大小无关"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise SystemExit("读取 Excel 需要安装 openpyxl: pip install openpyxl")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        fields = map_header(next(rows, ()))
+        for record in rows:
+            yield {field: value for field, value in zip(fields, record) if field}
+    finally:
+        workbook.close()
+
+
+def _upsert_statement(connection: Connection, rows: List[Dict[str, Any]]):
+    """
+    多行 INSERT ... ON DUPLICATE KEY UPDATE（SQLite 开发库使用 ON CONFLICT）
+
+    只更新文件中出现的列，只有价格等部分列的价目表不会把其余字段覆盖为 NULL
+    """
+    table = Product.__table__
+    columns = [column for column in rows[0] if column != "id"]
+    if connection.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        statement = mysql_insert(table).values(rows)
+        return statement.on_duplicate_key_update({column: statement.inserted[column] for column in columns})
+    if connection.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(table).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={column: statement.excluded[column] for column in columns}
+        )
+    raise SystemExit(f"不支持的数据库: {connection.dialect.name}")
+
+
+def load_batch(connection: Connection, rows: List[Dict[str, Any]]) -> int:
+    """写入一批产品及其数值规格，在同一事务中完成；返回写入的规格行数"""
+    # 同一批内重复的主键以最后一行为准；各行列集合相同，才能拼成一条多行 INSERT
+    deduplicated = list({row["id"]: row for row in rows}.values())
+    columns = sorted({column for row in deduplicated for column in row})
+    deduplicated = [{column: row.get(column) for column in columns} for row in deduplicated]
+    connection.execute(_upsert_statement(connection, deduplicated))
+
+    # 数值规格只重建文件中出现的规格字段，其余字段的规格行保持不变
+    spec_table = ProductSpecValue.__table__
+    product_ids = [row["id"] for row in deduplicated]
+    spec_fields = [field for field in SPEC_FIELDS if field in columns]
+    spec_rows = []
+    if spec_fields:
+        connection.execute(delete(spec_table).where(
+            spec_table.c.product_id.in_(product_ids),
+            spec_table.c.field.in_(spec_fields)
+        ))
+        for row in deduplicated:
+            spec_rows.extend(compute_spec_values(row["id"], {field: row[field] for field in spec_fields}))
+    if spec_rows:
+        connection.execute(insert(spec_table), spec_rows)
+    # 运行中的 worker 通过变更日志增量更新搜索索引
+    record_product_changes(connection, product_ids)
+    return len(spec_rows)
+
+
+def ingest(records: Iterable[Dict[str, Any]], batch_size: int = 1000, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    流式导入产品
+
+    逐行清洗后按 batch_size 分批，每批一条多行 upsert 加上规格表重建，单独提交；
+    任何时刻内存中只保留一批数据。
+    """
+    loaded = rejected = spec_count = 0
+    batch: List[Dict[str, Any]] = []
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal loaded, spec_count
+        if not batch:
+            return
+        if not dry_run:
+            with engine.begin() as connection:
+                spec_count += load_batch(connection, batch)
+        loaded += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"已导入 {loaded} 行，跳过 {rejected} 行，{loaded / elapsed:.0f} 行/s")
+        batch.clear()
+
+    for line, record in enumerate(records, start=2):
+        row, error = normalize_row(record)
+        if row is None:
+            rejected += 1
+            if rejected <= 20:
+                print(f"第 {line} 行已跳过: {error}")
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    if loaded and not dry_run:
+        # 多行 upsert 绕过了 ORM 的提交事件，在同一进程中调用时需要手动让缓存失效
+        notify_catalog_write()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "loaded": loaded,
+        "rejected": rejected,
+        "spec_values": spec_count,
+        "seconds": elapsed,
+        "rows_per_second": loaded / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从 CSV / XLSX 价目表批量导入产品到 product_info")
+    parser.add_argument("path", help="CSV 或 XLSX 文件路径")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每批写入的行数")
+    parser.add_argument("--encoding", default="utf-8-sig", help="CSV 文件编码（Excel 导出的 CSV 常为 gbk）")
+    parser.add_argument("--sheet", help="XLSX 工作表名称，默认使用第一个工作表")
+    parser.add_argument("--dry-run", action="store_true", help="只解析和清洗，不写入数据库")
+    args = parser.parse_args()
+
+    extension = os.path.splitext(args.path)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        source = read_xlsx(args.path, args.sheet)
+    else:
+        source = read_csv(args.path, args.encoding)
+
+    result = ingest(source, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(
+        f"导入完成：{result['loaded']} 行，跳过 {result['rejected']} 行，"
+        f"{result['spec_values']} 条数值规格，耗时 {result['seconds']:.1f}s，"
+        f"{result['rows_per_second']:.0f} 行/s"
+    )
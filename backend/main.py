@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, Query, Body, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List, Dict, Any, Set, Generator, Annotated
+from typing import Optional, List, Dict, Any, Set, Generator, Annotated, Literal, Callable
 from pydantic import BaseModel, Field, ConfigDict
 import mysql.connector
 from mysql.connector import Error
@@ -22,51 +22,28 @@ from sqlalchemy import Column, Integer, Text, Numeric, JSON, DateTime
 from fastapi import Depends
 import os
 from dotenv import load_dotenv
-
-# 加载环境变量
-load_dotenv()
+from services.text_normalizer import normalize_text
+from services.search_index import Ranking, search_index
+from services.facets import FacetEngine
+from services.text_analysis import analyze_text, fuzzy_match_analysis
+from services.attribute_dictionary import attribute_dictionaries
+from services.cache import DEFAULT_TTL, create_cache, cache_stats
+from services.cache_keys import query_fingerprint
+from services.catalog_version import catalog_version
+from services.response_cache import create_response_backend, SQLiteResponseBackend
+from services.pagination import encode_cursor, decode_cursor, InvalidCursor
+from services.spec_parser import parse_spec_ranges
+from services.spec_index import match_spec_ids, spec_product_ids
+from services.suggest import suggest_index
+from services.catalog_feed import catalog_feed
+from services.catalog_snapshot import load_snapshot_index
+from database import engine, SessionLocal, get_db, pool_metrics, run_db, db_executor
+from models.product import Base, Product, on_catalog_write
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 数据库配置
-DATABASE_URL = f"mysql+mysqlconnector://{os.getenv('DB_USER', 'root')}:{os.getenv('DB_PASSWORD', 'Ac661978')}@{os.getenv('DB_HOST', '127.0.0.1')}:{os.getenv('DB_PORT', '3306')}/{os.getenv('DB_NAME', 'mioflow')}"
-
-# 创建数据库引擎
-engine = create_engine(DATABASE_URL)
-
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# 创建基类
-Base = declarative_base()
-
-# 产品模型
-class Product(Base):
-    __tablename__ = "product_info"
-
-    id = Column(String(255), primary_key=True, index=True)
-    code = Column(String(255), nullable=False, index=True)
-    name = Column(String(255), nullable=False)
-    brand = Column(String(255), nullable=False)
-    material_code = Column(String(255), nullable=False, index=True)
-    output_brand = Column(String(255))
-    product_name = Column(String(255))
-    model = Column(String(255))
-    specification = Column(String(100))
-    color = Column(String(255))
-    length = Column(String(255))
-    weight = Column(String(255))
-    wattage = Column(String(255))
-    pressure = Column(String(255))
-    degree = Column(String(255))
-    material = Column(String(255))
-    price = Column(Numeric(10, 2))
-    product_type = Column(SQLAlchemyEnum('管件', '管材', '线槽', '阀门', '接头'))
-    usage_type = Column(SQLAlchemyEnum('农业专用', '农业排水', '建筑排水'))
-    sub_type = Column(SQLAlchemyEnum('弯头', '三通', '直通', '球阀', '闸阀', '截止阀'))
-
 # 创建 FastAPI 应用
 app = FastAPI(
     title="MioFlow API",
@@ -91,18 +68,49 @@ DB_CONFIG = {
     "database": "mioflow"
 }
 
-# 缓存配置
-CACHE_EXPIRY = 300  # 缓存过期时间（秒）
-attribute_cache = {}  # 属性值缓存
-filter_stats_cache = {}  # 筛选条件统计缓存
+# 缓存配置：有界 LRU，TTL 在读取时惰性检查，不再需要后台清理线程
+CACHE_EXPIRY = DEFAULT_TTL  # 缓存过期时间（秒）
+attribute_cache = attribute_dictionaries.cache  # 属性值缓存
+filter_stats_cache = create_cache(  # 筛选条件统计缓存
+    "filter_stats",
+    max_entries=int(os.getenv('FILTER_STATS_CACHE_ENTRIES', '2048')),
+    max_bytes=int(os.getenv('FILTER_STATS_CACHE_BYTES', str(64 * 1024 * 1024))),
+    ttl=CACHE_EXPIRY
+)
+on_catalog_write(filter_stats_cache.clear)
+
+# 搜索响应缓存：SEARCH_CACHE_BACKEND=memory 为进程内缓存，sqlite 为本机多 worker 共享；
+# 共享后端同时保存目录版本号，任一 worker 写入产品后所有 worker 的旧响应一起失效
+search_response_cache = create_response_backend()
+if isinstance(search_response_cache, SQLiteResponseBackend):
+    catalog_version.bind(search_response_cache)
+
+# 筛选维度：前端展示名称 -> 产品字段
+FILTER_MAPPING = {
+    "品牌": "brand",
+    "材质": "material",
+    "规格": "specification",
+    "颜色": "color",
+    "型号": "model",
+    "产品类型": "product_type",
+    "使用类型": "usage_type",
+    "子类型": "sub_type"
+}
 
-class CacheEntry:
-    def __init__(self, data):
-        self.data = data
-        self.timestamp = time.time()
+# 属性值接口支持的属性：中文名称或字段名 -> 产品字段
+ATTRIBUTE_FIELDS = {
+    **FILTER_MAPPING,
+    "长度": "length",
+    "重量": "weight",
+    "压力": "pressure",
+    "度数": "degree",
+    "功率": "wattage"
+}
+ATTRIBUTE_FIELDS.update({field: field for field in list(ATTRIBUTE_FIELDS.values())})
 
-    def is_expired(self):
-        return time.time() - self.timestamp > CACHE_EXPIRY
+# 每个筛选维度最多返回的取值数
+FACET_TOP_N = int(os.getenv('FACET_TOP_N', '50'))
+product_facets = FacetEngine(FILTER_MAPPING, top_n=FACET_TOP_N)
 
 # 请求模型
 class SearchRequest(BaseModel):
@@ -124,6 +132,13 @@ class SearchRequest(BaseModel):
     page: int = 1
     page_size: int = 20
     filters: Dict[str, List[str]] = {}
+    # offset：按页码分页；cursor：按游标顺序翻页（无限滚动），深页不再变慢
+    pagination: Literal["offset", "cursor"] = "offset"
+    # 上一页返回的 next_cursor，首页留空
+    cursor: Optional[str] = None
+    # exact：精确总数；estimate：有搜索词时用筛选前的候选集大小近似（有筛选时 total_is_estimate 为 true），
+    # 无搜索词时与 exact 相同；none：不计算总数
+    total_mode: Literal["exact", "estimate", "none"] = "exact"
 
 # 测试请求模型
 class TestRequest(BaseModel):
@@ -139,96 +154,75 @@ class TestRequest(BaseModel):
         }
     )
 
-# 依赖项
-def get_db() -> Generator[Session, None, None]:
-    """
-    获取数据库会话
+@catalog_feed.on_reload
+def load_search_index(db: Session) -> None:
+    """从 product_info 全量构建产品搜索索引；之后的变更由 catalog_feed 增量应用"""
+    columns = [getattr(Product, field) for field in search_index.columns]
+    rows = db.query(Product.id, *columns).yield_per(5000)
+    search_index.build(rows)
+
+def ensure_search_index(db: Session) -> None:
+    """索引尚未构建时（例如启动时数据库不可用）在首次搜索时构建"""
+    if not search_index.ready:
+        catalog_feed.reload(db)
+
+def ensure_suggest_index(db: Session) -> None:
+    """补全索引未构建时同步构建；产品数据变化后在后台重建，期间继续使用旧索引"""
+    if not suggest_index.ready:
+        suggest_index.load(db)
+    elif suggest_index.stale:
+        suggest_index.refresh_in_background(SessionLocal)
+
+# 只包含字母的查询视为拼音或拼音首字母
+PINYIN_QUERY_PATTERN = re.compile(r'[a-z]+')
+
+# 拼音 / 首字母前缀命中并入相关度排序时的得分
+PINYIN_MATCH_SCORE = float(os.getenv('PINYIN_MATCH_SCORE', '5.0'))
+# 每命中一个数值规格条件（如 DN25、1.6MPa）并入相关度排序的得分
+SPEC_MATCH_SCORE = float(os.getenv('SPEC_MATCH_SCORE', '5.0'))
+# 每个数值规格条件并入相关度排序的最大命中数；规格筛选不受此限制
+SPEC_MATCH_LIMIT = int(os.getenv('SPEC_MATCH_LIMIT', '1000'))
+# 拼音 / 首字母前缀匹配的最短长度与最大命中数
+PINYIN_INITIALS_MIN_LENGTH = int(os.getenv('PINYIN_INITIALS_MIN_LENGTH', '2'))
+PINYIN_MIN_LENGTH = int(os.getenv('PINYIN_MIN_LENGTH', '3'))
+PINYIN_MATCH_LIMIT = int(os.getenv('PINYIN_MATCH_LIMIT', '1000'))
+
+def match_pinyin_ids(db: Session, query: str) -> Set[str]:
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    按拼音 / 首字母前缀匹配产品
 
-def get_pinyin(text: str) -> str:
-    """获取文本的拼音表示"""
-    return ''.join(lazy_pinyin(text, style=Style.NORMAL))
-
-# 单位转换映射
-unit_mapping = {
-    '度': '°',
-    '寸': 'inch',
-    '米': 'm',
-    'M': 'm',
-    '厘米': 'cm',
-    'CM': 'cm',
-    '毫米': 'mm',
-    'MM': 'mm',
-    '升': 'L',
-    '立方米': 'm³',
-    '兆帕': 'MPa',
-    '千帕': 'kPa',
-    '帕': 'Pa',
-    '千瓦': 'kW',
-    '瓦': 'W',
-    '千克': 'kg',
-    '克': 'g',
-    '牛': 'N',
-    '千牛': 'kN'
-}
-
-# 同音字映射
-homophone_mapping = {
-    '联': '连',
-    '津': '金',
-    '立': '利',
-    '星': '兴',
-    '达': '大',
-    '德': '得',
-    '隆': '龙',
-    '邦': '帮',
-    '宝': '保',
-    '盛': '胜'
-}
-
-# 缩写和别名映射
-alias_mapping = {
-    'ppr': 'PPR',
-    'pvc': 'PVC',
-    'upvc': 'UPVC',
-    'pe': 'PE',
-    'abs': 'ABS',
-    'hdpe': 'HDPE',
-    'cpvc': 'CPVC',
-    'pp-r': 'PPR',
-    'pvc-u': 'PVC-U',
-    'dn': 'DN'
-}
-
-def normalize_text(text: str) -> str:
-    """
-    标准化文本，处理单位、同音字和缩写
+    影子列在写入时已经预计算并建立索引，LIKE 'xxx%' 可以直接走 B-tree 范围扫描。
+    前缀过短时几乎命中整张表：首字母至少 PINYIN_INITIALS_MIN_LENGTH 个字母、
+    全拼至少 PINYIN_MIN_LENGTH 个字母才参与匹配，命中数最多 PINYIN_MATCH_LIMIT 个
     """
-    if not text:
-        return ""
-        
-    # 转换为小写以处理缩写
-    lower_text = text.lower()
-    
-    # 处理缩写和别名
-    for alias, full in alias_mapping.items():
-        if alias in lower_text:
-            text = text.replace(alias, full)
-            
-    # 处理单位
-    for unit, replacement in unit_mapping.items():
-        text = text.replace(unit, replacement)
-        
-    # 处理同音字
-    for char, replacement in homophone_mapping.items():
-        text = text.replace(char, replacement)
-        
-    return text.strip()
+    compact_query = ''.join(query.split()).lower()
+    if not PINYIN_QUERY_PATTERN.fullmatch(compact_query):
+        return set()
+    pattern = f"{compact_query}%"
+    conditions = []
+    if len(compact_query) >= PINYIN_INITIALS_MIN_LENGTH:
+        conditions.extend([
+            Product.name_initials.like(pattern),
+            Product.brand_initials.like(pattern),
+            Product.product_name_initials.like(pattern)
+        ])
+    if len(compact_query) >= PINYIN_MIN_LENGTH:
+        conditions.extend([
+            Product.name_pinyin.like(pattern),
+            Product.brand_pinyin.like(pattern),
+            Product.product_name_pinyin.like(pattern)
+        ])
+    if not conditions:
+        return set()
+    rows = db.query(Product.id).filter(or_(*conditions)).limit(PINYIN_MATCH_LIMIT)
+    return {row.id for row in rows}
+
+def load_products_by_ids(db: Session, product_ids: List[str]) -> List[Product]:
+    """按主键回表，并保持 product_ids 的顺序"""
+    if not product_ids:
+        return []
+    products = {product.id: product for product in db.query(Product).filter(Product.id.in_(product_ids))}
+    return [products[product_id] for product_id in product_ids if product_id in products]
 
 def fuzzy_match(text: str, query: str) -> bool:
     """
@@ -237,63 +231,23 @@ def fuzzy_match(text: str, query: str) -> bool:
     if not text or not query:
         return False
         
-    # 标准化处理
-    normalized_text = normalize_text(str(text).lower())
-    normalized_query = normalize_text(query.lower())
-    
-    # 1. 完全匹配
-    if normalized_query in normalized_text:
-        return True
-        
-    # 2. 拼音匹配
-    text_pinyin = ''.join(lazy_pinyin(text))
-    query_pinyin = ''.join(lazy_pinyin(query))
-    if query_pinyin in text_pinyin:
-        return True
-        
-    # 3. 拼音首字母匹配
-    text_pinyin_initials = ''.join([p[0] for p in lazy_pinyin(text)])
-    query_pinyin_initials = ''.join([p[0] for p in lazy_pinyin(query)])
-    if query_pinyin_initials in text_pinyin_initials:
-        return True
-        
-    # 4. 数字和单位的智能匹配
-    text_numbers = re.findall(r'\d+\.?\d*', text)
-    query_numbers = re.findall(r'\d+\.?\d*', query)
-    
-    if text_numbers and query_numbers:
-        for t_num in text_numbers:
-            for q_num in query_numbers:
-                try:
-                    if abs(float(t_num) - float(q_num)) < 0.01:  # 允许小数点误差
-                        # 如果数值匹配，检查单位是否兼容
-                        text_unit = re.findall(r'[a-zA-Z°]+', text)
-                        query_unit = re.findall(r'[a-zA-Z°]+', query)
-                        if not text_unit or not query_unit or text_unit[0] == query_unit[0]:
-                            return True
-                except ValueError:
-                    continue
-    
-    # 5. 分词匹配
-    text_words = set(jieba.cut(normalized_text))
-    query_words = set(jieba.cut(normalized_query))
-    common_words = text_words & query_words
-    
-    # 如果查询词的大部分词都在文本中出现，认为是匹配的
-    if len(common_words) >= len(query_words) * 0.7:  # 70% 匹配率
-        return True
-        
-    return False
+    # 拼音、分词、数值等分析结果来自共享缓存，同一字符串只计算一次
+    return fuzzy_match_analysis(analyze_text(str(text)), analyze_text(query))
 
-def analyze_search_results(results: List[Dict]) -> Dict[str, Dict]:
-    """分析搜索结果，提取共同属性和可筛选维度"""
-    cache_key = f"filter_stats_{hash(str(results))}"
+def analyze_search_results(results: List[Dict], fingerprint: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    分析搜索结果，提取共同属性和可筛选维度
+    
+    fingerprint 为 query_fingerprint 生成的查询缓存键；不传时直接计算、不缓存，
+    因为对整个结果集做序列化和哈希比统计本身还要慢
+    """
+    cache_key = f"filter_stats_{fingerprint}" if fingerprint else None
     
     # 检查缓存
-    if cache_key in filter_stats_cache:
-        cache_entry = filter_stats_cache[cache_key]
-        if not cache_entry.is_expired():
-            return cache_entry.data
+    if cache_key:
+        cached = filter_stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
     
     attribute_stats = defaultdict(lambda: defaultdict(int))
     
@@ -308,7 +262,8 @@ def analyze_search_results(results: List[Dict]) -> Dict[str, Dict]:
     result = dict(attribute_stats)
     
     # 更新缓存
-    filter_stats_cache[cache_key] = CacheEntry(result)
+    if cache_key:
+        filter_stats_cache.set(cache_key, result)
     
     return result
 
@@ -362,6 +317,300 @@ async def get_search_request(
         filters=filters
     )
 
+def empty_search_response(search_request: SearchRequest) -> Dict[str, Any]:
+    """没有任何匹配产品时的搜索响应"""
+    response = {
+        "success": True,
+        "message": "搜索产品成功",
+        "data": [],
+        "meta": {
+            "total": 0,
+            "total_is_estimate": False,
+            "page": search_request.page,
+            "page_size": search_request.page_size,
+            "total_pages": 0
+        },
+        "available_filters": {}
+    }
+    if search_request.pagination == "cursor":
+        response["meta"]["page"] = None
+        response["meta"]["next_cursor"] = None
+        response["meta"]["has_more"] = False
+    return response
+
+def filter_condition(attr: str, value: str) -> Callable[[str], bool]:
+    """
+    单个筛选值对属性原值的匹配条件，与 execute_search 中 SQL 筛选的口径一致：
+    品牌同时比较原值和标准化文本，枚举字段等值匹配，其余字段包含匹配（大小写无关）
+    """
+    normalized_value = analyze_text(value).normalized
+    if attr == "品牌":
+        raw, needle = value.lower(), normalized_value.lower()
+        return lambda brand: raw in brand.lower() or needle in normalize_text(brand).lower()
+    if attr in ("产品类型", "使用类型", "子类型"):
+        return lambda text: text == normalized_value
+    needle = normalized_value.lower()
+    return lambda text: needle in text.lower()
+
+def filter_ranking(db: Session, ranking: Ranking, filters: Dict[str, List[str]]) -> Ranking:
+    """
+    在搜索候选集上应用筛选条件
+
+    属性条件只判断候选集中出现过的取值；规格的数值条件在规格表上单独查找，
+    与候选集在内存中求交集。同一维度的多个值为或，不同维度之间为且。
+    """
+    keep = None
+    for attr, values in filters.items():
+        field = FILTER_MAPPING.get(attr)
+        if field is None:
+            continue
+        attr_keep = None
+        for value in values:
+            mask = ranking.match_facet(field, filter_condition(attr, value))
+            if attr == "规格":
+                # 可解析为数值的规格同时按单位换算后的数值匹配，20毫米 也能筛出 2cm
+                spec_ranges = parse_spec_ranges(value)
+                if spec_ranges:
+                    mask = mask | ranking.contains(match_spec_ids(db, spec_ranges))
+            attr_keep = mask if attr_keep is None else attr_keep | mask
+        if attr_keep is not None:
+            keep = attr_keep if keep is None else keep & attr_keep
+    return ranking if keep is None else ranking.where(keep)
+
+def execute_search(
+    search_request: SearchRequest,
+    db: Session,
+    response_key: str
+) -> Dict[str, Any]:
+    """
+    执行一次未命中缓存的搜索（同步，在数据库线程池中运行）
+    """
+    # 基础查询
+    base_query = db.query(Product)
+    ranking = None
+    
+    if search_request.query:
+        # 标准化查询文本
+        query_info = analyze_text(search_request.query)
+        
+        logger.info(f"标准化后的查询文本: {query_info.normalized}, 拼音: {query_info.pinyin}")
+        
+        # 分词，与索引构建使用相同的标准化和分词口径
+        name_terms = query_info.tokens
+        logger.info(f"分词结果: {name_terms}")
+        
+        if name_terms:
+            # 在倒排索引上按 BM25F 给候选产品打分，分页后再按主键回表
+            ensure_search_index(db)
+            # 拼音 / 首字母查询走影子列的索引前缀匹配，命中的产品并入排序
+            extra_scores = dict.fromkeys(match_pinyin_ids(db, query_info.text), PINYIN_MATCH_SCORE)
+            # 数值规格按 SI 单位在规格表上做范围查找，1.5寸 / DN40 / 1-1/2寸 互相命中
+            spec_ranges = parse_spec_ranges(query_info.text)
+            if spec_ranges:
+                for product_id, count in match_spec_ids(db, spec_ranges, SPEC_MATCH_LIMIT).items():
+                    extra_scores[product_id] = extra_scores.get(product_id, 0.0) + SPEC_MATCH_SCORE * count
+            ranking = search_index.rank(name_terms, extra_scores=extra_scores)
+            logger.info(f"索引命中产品数: {len(ranking)}")
+            
+            if not len(ranking):
+                return empty_search_response(search_request)
+            # 筛选前的候选集大小，total_mode=estimate 时作为总数（有筛选时为上界）
+            candidate_total = len(ranking)
+            logger.info("应用搜索条件")
+    
+    # 应用过滤器
+    if search_request.filters and ranking is not None:
+        # 有搜索词时在候选集上筛选，候选 ID 不进入 SQL
+        logger.info(f"在候选集上应用过滤器: {search_request.filters}")
+        ranking = filter_ranking(db, ranking, search_request.filters)
+        logger.info("应用过滤条件")
+    elif search_request.filters:
+        logger.info(f"应用过滤器: {search_request.filters}")
+        filter_conditions = []
+        for attr, values in search_request.filters.items():
+            attr_conditions = []
+            for value in values:
+                normalized_value = analyze_text(value).normalized
+                if attr == "品牌":
+                    # 品牌影子列与筛选值使用同一套标准化，联塑 / 连塑 都能命中
+                    attr_conditions.append(or_(
+                        Product.brand.ilike(f"%{value}%"),
+                        Product.brand_normalized.like(f"%{normalized_value.lower()}%")
+                    ))
+                elif attr == "材质":
+                    attr_conditions.append(Product.material.ilike(f"%{normalized_value}%"))
+                elif attr == "规格":
+                    attr_conditions.append(Product.specification.ilike(f"%{normalized_value}%"))
+                    # 可解析为数值的规格同时按单位换算后的数值匹配，20毫米 也能筛出 2cm
+                    spec_ranges = parse_spec_ranges(value)
+                    if spec_ranges:
+                        attr_conditions.append(Product.id.in_(spec_product_ids(spec_ranges)))
+                elif attr == "颜色":
+                    attr_conditions.append(Product.color.ilike(f"%{normalized_value}%"))
+                elif attr == "型号":
+                    attr_conditions.append(Product.model.ilike(f"%{normalized_value}%"))
+                elif attr == "产品类型":
+                    attr_conditions.append(Product.product_type == normalized_value)
+                elif attr == "使用类型":
+                    attr_conditions.append(Product.usage_type == normalized_value)
+                elif attr == "子类型":
+                    attr_conditions.append(Product.sub_type == normalized_value)
+            if attr_conditions:
+                filter_conditions.append(or_(*attr_conditions))
+        
+        if filter_conditions:
+            base_query = base_query.filter(and_(*filter_conditions))
+            logger.info("应用过滤条件")
+    
+    # 总数与页码无关，按查询缓存，翻页时不再重复 COUNT
+    total = None
+    total_is_estimate = False
+    if ranking is not None and search_request.total_mode == "estimate":
+        # 候选集大小：无筛选时即为精确值，有筛选时为上界
+        total = candidate_total
+        total_is_estimate = bool(search_request.filters)
+    elif ranking is not None:
+        # 排序结果已经是筛选后的完整候选集，总数无需再查询
+        total = len(ranking) if search_request.total_mode != "none" else None
+    elif search_request.total_mode != "none":
+        total = filter_stats_cache.get_or_compute(
+            query_fingerprint(search_request.query, search_request.filters, kind="count"),
+            base_query.count
+        )
+    logger.info(f"查询到总记录数: {total}")
+    
+    # 执行查询
+    next_cursor = None
+    scores: Dict[str, float] = {}
+    if ranking is not None:
+        # 按 (-得分, id) 排序，只对需要的前 k 个做部分排序
+        if search_request.pagination == "cursor":
+            if search_request.cursor:
+                try:
+                    sort_key = decode_cursor(search_request.cursor)
+                    if len(sort_key) != 2:
+                        raise InvalidCursor(f"无效的分页游标: {search_request.cursor}")
+                    last_score, last_id = float(sort_key[0]), str(sort_key[1])
+                except (InvalidCursor, TypeError, ValueError) as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                hits = ranking.after(last_score, last_id, search_request.page_size + 1)
+            else:
+                hits = ranking.top(search_request.page_size + 1)
+            if len(hits) > search_request.page_size:
+                hits = hits[:search_request.page_size]
+                next_cursor = encode_cursor(list(hits[-1][::-1]))
+        else:
+            hits = ranking.top(search_request.page_size, (search_request.page - 1) * search_request.page_size)
+        scores = dict(hits)
+        products = load_products_by_ids(db, [product_id for product_id, _ in hits])
+    elif search_request.pagination == "cursor":
+        # 游标分页：按稳定排序键 (id) 定位，WHERE id > 上一页最后一个 id
+        page_query = base_query.order_by(Product.id)
+        if search_request.cursor:
+            try:
+                last_id = decode_cursor(search_request.cursor)[-1]
+            except InvalidCursor as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            page_query = page_query.filter(Product.id > str(last_id))
+        rows = page_query.limit(search_request.page_size + 1).all()
+        products = rows[:search_request.page_size]
+        if len(rows) > search_request.page_size:
+            next_cursor = encode_cursor([products[-1].id])
+    else:
+        products = base_query.order_by(Product.id).offset((search_request.page - 1) * search_request.page_size).limit(search_request.page_size).all()
+    logger.info(f"当前页返回记录数: {len(products)}")
+    
+    # 提取可用的过滤器
+    available_filters = {}
+    # 游标分页的后续页沿用首页返回的筛选维度
+    if products and not search_request.cursor:
+        # 一次聚合查询统计所有筛选维度，不再加载全部匹配产品；同一查询和筛选条件复用缓存
+        facet_cache_key = query_fingerprint(
+            search_request.query,
+            search_request.filters,
+            kind="facets"
+        )
+        if ranking is not None:
+            # 候选集的属性编码已在排序结果中，直接计数
+            compute_facets = lambda: product_facets.compute_ranking(ranking)
+        else:
+            compute_facets = lambda: product_facets.compute(base_query)
+        available_filters = filter_stats_cache.get_or_compute(facet_cache_key, compute_facets)
+        logger.info("过滤器统计完成")
+    
+    # 格式化产品数据
+    formatted_products = []
+    for product in products:
+        formatted_products.append({
+            "id": product.id,
+            "code": product.code,
+            "name": product.name,
+            "product_name": product.product_name,
+            "brand": product.brand,
+            "material": product.material,
+            "specification": product.specification,
+            "color": product.color,
+            "model": product.model,
+            "price": float(product.price) if product.price else None,
+            "product_type": product.product_type,
+            "usage_type": product.usage_type,
+            "sub_type": product.sub_type,
+            "length": product.length,
+            "weight": product.weight,
+            "wattage": product.wattage,
+            "pressure": product.pressure,
+            "degree": product.degree,
+            "score": round(scores[product.id], 4) if product.id in scores else None
+        })
+    
+    logger.info("数据格式化完成")
+    
+    response = {
+        "success": True,
+        "message": "搜索产品成功",
+        "data": formatted_products,
+        "meta": {
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "page": search_request.page,
+            "page_size": search_request.page_size,
+            "total_pages": (total + search_request.page_size - 1) // search_request.page_size if total is not None else None
+        },
+        "available_filters": available_filters
+    }
+    if search_request.pagination == "cursor":
+        response["meta"]["page"] = None
+        response["meta"]["next_cursor"] = next_cursor
+        response["meta"]["has_more"] = next_cursor is not None
+    search_response_cache.set(response_key, response)
+    
+    return response
+
+def search_with_cache(search_request: SearchRequest, db: Session) -> Dict[str, Any]:
+    """
+    先查搜索响应缓存，未命中时执行搜索（同步，在数据库线程池中运行）
+
+    整个响应按标准化查询 / 筛选 / 分页缓存，目录版本变化后自动失效；
+    键中带上本 worker 已应用的变更日志高水位，尚未应用最新变更的 worker 不会
+    把旧结果写到新键下，追上后各 worker 的键重新一致
+    """
+    response_key = query_fingerprint(
+        search_request.query,
+        search_request.filters,
+        kind="response",
+        catalog=catalog_feed.high_water,
+        page=search_request.page,
+        page_size=search_request.page_size,
+        pagination=search_request.pagination,
+        cursor=search_request.cursor,
+        total_mode=search_request.total_mode
+    )
+    cached_response = search_response_cache.get(response_key)
+    if cached_response is not None:
+        logger.info("命中搜索响应缓存")
+        return cached_response
+    return execute_search(search_request, db, response_key)
+
 @app.post("/api/v1/products/search")
 async def search_products(
     search_request: SearchRequest = Body(...),
@@ -373,196 +622,11 @@ async def search_products(
     try:
         logger.info(f"开始搜索产品，查询参数: {search_request}")
         
-        # 基础查询
-        base_query = db.query(Product)
-        
-        if search_request.query:
-            # 标准化查询文本
-            normalized_query = normalize_text(search_request.query)
-            query_pinyin = ''.join(lazy_pinyin(search_request.query))
-            
-            logger.info(f"标准化后的查询文本: {normalized_query}, 拼音: {query_pinyin}")
-            
-            # 构建查询条件
-            search_conditions = []
-            
-            # 1. 名称匹配
-            name_terms = list(jieba.cut(normalized_query))
-            logger.info(f"分词结果: {name_terms}")
-            
-            # 标准化文本匹配
-            search_conditions.append(
-                or_(
-                    Product.name.ilike(f"%{normalized_query}%"),
-                    Product.product_name.ilike(f"%{normalized_query}%"),
-                    Product.brand.ilike(f"%{normalized_query}%"),
-                    # 添加灵活匹配
-                    and_(
-                        Product.name.ilike("%联塑%"),
-                        or_(
-                            Product.name.ilike("%管%"),
-                            Product.name.ilike("%给水管%"),
-                            Product.name.ilike("%排水管%"),
-                            Product.name.ilike("%电工管%"),
-                            Product.name.ilike("%套管%")
-                        )
-                    ),
-                    and_(
-                        Product.name.ilike("%连塑%"),
-                        or_(
-                            Product.name.ilike("%管%"),
-                            Product.name.ilike("%给水管%"),
-                            Product.name.ilike("%排水管%"),
-                            Product.name.ilike("%电工管%"),
-                            Product.name.ilike("%套管%")
-                        )
-                    ),
-                    and_(
-                        Product.product_name.ilike("%联塑%"),
-                        or_(
-                            Product.product_name.ilike("%管%"),
-                            Product.product_name.ilike("%给水管%"),
-                            Product.product_name.ilike("%排水管%"),
-                            Product.product_name.ilike("%电工管%"),
-                            Product.product_name.ilike("%套管%")
-                        )
-                    ),
-                    and_(
-                        Product.product_name.ilike("%连塑%"),
-                        or_(
-                            Product.product_name.ilike("%管%"),
-                            Product.product_name.ilike("%给水管%"),
-                            Product.product_name.ilike("%排水管%"),
-                            Product.product_name.ilike("%电工管%"),
-                            Product.product_name.ilike("%套管%")
-                        )
-                    )
-                )
-            )
-            
-            # 分词匹配
-            for term in name_terms:
-                if len(term.strip()) > 0:
-                    search_conditions.append(
-                        or_(
-                            Product.name.ilike(f"%{term}%"),
-                            Product.product_name.ilike(f"%{term}%"),
-                            Product.brand.ilike(f"%{term}%"),
-                            Product.material.ilike(f"%{term}%"),
-                            Product.specification.ilike(f"%{term}%")
-                        )
-                    )
-            
-            # 合并查询条件
-            if search_conditions:
-                base_query = base_query.filter(or_(*search_conditions))
-                logger.info("应用搜索条件")
-        
-        # 应用过滤器
-        if search_request.filters:
-            logger.info(f"应用过滤器: {search_request.filters}")
-            filter_conditions = []
-            for attr, values in search_request.filters.items():
-                attr_conditions = []
-                for value in values:
-                    normalized_value = normalize_text(value)
-                    if attr == "品牌":
-                        attr_conditions.append(Product.brand.ilike(f"%{normalized_value}%"))
-                    elif attr == "材质":
-                        attr_conditions.append(Product.material.ilike(f"%{normalized_value}%"))
-                    elif attr == "规格":
-                        attr_conditions.append(Product.specification.ilike(f"%{normalized_value}%"))
-                    elif attr == "颜色":
-                        attr_conditions.append(Product.color.ilike(f"%{normalized_value}%"))
-                    elif attr == "型号":
-                        attr_conditions.append(Product.model.ilike(f"%{normalized_value}%"))
-                    elif attr == "产品类型":
-                        attr_conditions.append(Product.product_type == normalized_value)
-                    elif attr == "使用类型":
-                        attr_conditions.append(Product.usage_type == normalized_value)
-                    elif attr == "子类型":
-                        attr_conditions.append(Product.sub_type == normalized_value)
-                if attr_conditions:
-                    filter_conditions.append(or_(*attr_conditions))
-            
-            if filter_conditions:
-                base_query = base_query.filter(and_(*filter_conditions))
-                logger.info("应用过滤条件")
-        
-        # 执行查询
-        total = base_query.count()
-        logger.info(f"查询到总记录数: {total}")
-        
-        products = base_query.offset((search_request.page - 1) * search_request.page_size).limit(search_request.page_size).all()
-        logger.info(f"当前页返回记录数: {len(products)}")
-        
-        # 提取可用的过滤器
-        available_filters = {}
-        if products:
-            # 使用子查询获取匹配产品的所有属性
-            all_products = base_query.all()
-            logger.info(f"获取所有匹配产品用于过滤器: {len(all_products)}")
-            
-            # 收集过滤器值
-            filter_mapping = {
-                "品牌": "brand",
-                "材质": "material",
-                "规格": "specification",
-                "颜色": "color",
-                "型号": "model",
-                "产品类型": "product_type",
-                "使用类型": "usage_type",
-                "子类型": "sub_type"
-            }
-            
-            for label, field in filter_mapping.items():
-                available_filters[label] = {}
-                for product in all_products:
-                    value = getattr(product, field)
-                    if value:
-                        available_filters[label][str(value)] = available_filters[label].get(str(value), 0) + 1
-            
-            logger.info("过滤器统计完成")
-        
-        # 格式化产品数据
-        formatted_products = []
-        for product in products:
-            formatted_products.append({
-                "id": product.id,
-                "code": product.code,
-                "name": product.name,
-                "product_name": product.product_name,
-                "brand": product.brand,
-                "material": product.material,
-                "specification": product.specification,
-                "color": product.color,
-                "model": product.model,
-                "price": float(product.price) if product.price else None,
-                "product_type": product.product_type,
-                "usage_type": product.usage_type,
-                "sub_type": product.sub_type,
-                "length": product.length,
-                "weight": product.weight,
-                "wattage": product.wattage,
-                "pressure": product.pressure,
-                "degree": product.degree
-            })
-        
-        logger.info("数据格式化完成")
-        
-        return {
-            "success": True,
-            "message": "搜索产品成功",
-            "data": formatted_products,
-            "meta": {
-                "total": total,
-                "page": search_request.page,
-                "page_size": search_request.page_size,
-                "total_pages": (total + search_request.page_size - 1) // search_request.page_size
-            },
-            "available_filters": available_filters
-        }
+        # 缓存查找、数据库查询与打分都是同步阻塞调用，整体放到数据库线程池执行，事件循环只负责调度
+        return await run_db(search_with_cache, search_request, db)
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"搜索产品时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"搜索产品时出错: {str(e)}")
@@ -571,38 +635,29 @@ async def search_products(
 async def get_attribute_values(
     attribute: str,
     query: str = None,
-    db: Session = Depends(SessionLocal)
+    limit: Optional[int] = None,
+    db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
     获取产品属性值
     """
+    field = ATTRIBUTE_FIELDS.get(attribute)
+    if field is None:
+        raise HTTPException(status_code=400, detail=f"不支持的属性: {attribute}")
+    
     try:
-        # 查询所有产品的指定属性值
-        products = db.query(Product).all()
-        
-        # 收集属性值
-        values = {}
-        for product in products:
-            if attribute in product.attributes:
-                value = product.attributes[attribute]
-                if isinstance(value, list):
-                    for v in value:
-                        if query and not fuzzy_match(str(v), query):
-                            continue
-                        values[str(v)] = values.get(str(v), 0) + 1
-                else:
-                    if query and not fuzzy_match(str(value), query):
-                        continue
-                    values[str(value)] = values.get(str(value), 0) + 1
+        # 取值字典由 GROUP BY 构建并常驻内存，过滤只遍历去重后的取值；
+        # 首次构建需要查询数据库，放到数据库线程池执行
+        dictionary = await run_db(attribute_dictionaries.get, db, field)
         
         # 转换为列表格式
         result = []
-        for value, count in values.items():
+        for value, count, value_info in dictionary.search(query, limit):
             result.append({
                 "value": value,
                 "count": count,
-                "pinyin": ''.join(lazy_pinyin(str(value))),
-                "normalized": normalize_text(str(value))
+                "pinyin": value_info.pinyin,
+                "normalized": value_info.normalized
             })
         
         return {
@@ -615,39 +670,106 @@ async def get_attribute_values(
         logger.error(f"获取属性值时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"获取属性值时出错: {str(e)}")
 
-# 定期清理过期缓存
+@app.get("/api/v1/products/suggest")
+async def suggest_products(
+    prefix: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    搜索框自动补全
+
+    按品牌 / 品名 / 产品名称的原文、拼音、首字母前缀补全，品牌支持拼写纠错
+    """
+    try:
+        start = time.perf_counter()
+        await run_db(ensure_suggest_index, db)
+        suggestions = suggest_index.suggest(prefix, limit)
+        return {
+            "success": True,
+            "message": "获取搜索建议成功",
+            "data": [
+                {
+                    "text": suggestion.text,
+                    "type": suggestion.kind,
+                    "count": suggestion.count,
+                    "corrected": suggestion.corrected
+                }
+                for suggestion in suggestions
+            ],
+            "meta": {
+                "prefix": prefix,
+                "took_ms": round((time.perf_counter() - start) * 1000, 3)
+            }
+        }
+    except Exception as e:
+        logger.error(f"获取搜索建议时出错: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"获取搜索建议时出错: {str(e)}")
+
+# 启动时构建产品搜索索引
 @app.on_event("startup")
-async def setup_cache_cleanup():
-    def cleanup_cache():
-        global logger  # 添加全局 logger 引用
-        while True:
-            try:
-                time.sleep(CACHE_EXPIRY)
-                current_time = time.time()
-                
-                # 清理属性缓存
-                expired_keys = [
-                    key for key, entry in attribute_cache.items()
-                    if entry.is_expired()
-                ]
-                for key in expired_keys:
-                    del attribute_cache[key]
-                
-                # 清理筛选条件缓存
-                expired_keys = [
-                    key for key, entry in filter_stats_cache.items()
-                    if entry.is_expired()
-                ]
-                for key in expired_keys:
-                    del filter_stats_cache[key]
-                
-                logger.info(f"已清理 {len(expired_keys)} 个过期缓存项")
-            except Exception as e:
-                logger.error(f"清理缓存时出错: {str(e)}")
-
-    import threading
-    cleanup_thread = threading.Thread(target=cleanup_cache, daemon=True)
-    cleanup_thread.start()
+async def build_search_index():
+    db = SessionLocal()
+    try:
+        # 优先映射目录快照（多个 worker 共享同一份页缓存），快照不可用时从数据库构建
+        if not load_snapshot_index(db, search_index, catalog_feed):
+            catalog_feed.reload(db)
+        suggest_index.load(db)
+    except Exception as e:
+        logger.error(f"构建产品搜索索引时出错: {str(e)}")
+    finally:
+        db.close()
+    # 后台轮询产品变更日志，增量更新索引并让缓存失效
+    catalog_feed.start(SessionLocal)
+
+# 关闭时等待数据库线程池中的任务完成
+@app.on_event("shutdown")
+async def shutdown_db_executor():
+    db_executor.shutdown(wait=True)
+
+# 关闭时停止目录变更轮询
+@app.on_event("shutdown")
+async def stop_catalog_feed():
+    catalog_feed.stop()
+
+@app.get("/api/v1/metrics/cache")
+async def get_cache_metrics() -> Dict[str, Any]:
+    """
+    缓存命中 / 未命中 / 淘汰统计
+    """
+    return {
+        "success": True,
+        "message": "获取缓存统计成功",
+        "data": {
+            **cache_stats(),
+            "search_responses": search_response_cache.stats()
+        }
+    }
+
+@app.get("/api/v1/metrics/db")
+async def get_db_metrics() -> Dict[str, Any]:
+    """
+    数据库连接池统计：当前借出 / 空闲连接数、排队次数、获取耗时直方图、连接创建与关闭次数
+    """
+    return {
+        "success": True,
+        "message": "获取连接池统计成功",
+        "data": pool_metrics.stats(engine)
+    }
+
+@app.get("/api/v1/metrics/catalog")
+async def get_catalog_metrics() -> Dict[str, Any]:
+    """
+    产品目录变更订阅统计：高水位、已应用的变更数、全量加载次数，以及搜索索引规模
+    """
+    return {
+        "success": True,
+        "message": "获取目录统计成功",
+        "data": {
+            "feed": catalog_feed.stats(),
+            "search_index": search_index.stats()
+        }
+    }
 
 @app.post("/api/v1/test_search")
 async def test_search(
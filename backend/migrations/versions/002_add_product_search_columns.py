@@ -0,0 +1,36 @@
+"""add pinyin / initials / normalized search columns to product_info
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+SHADOW_FIELDS = ('name', 'brand', 'product_name')
+SHADOW_COLUMNS = (
+    ('pinyin', 512),
+    ('initials', 255),
+    ('normalized', 512),
+)
+
+def upgrade():
+    for field in SHADOW_FIELDS:
+        for suffix, length in SHADOW_COLUMNS:
+            column = f'{field}_{suffix}'
+            op.add_column('product_info', sa.Column(column, sa.String(length), nullable=True))
+            op.create_index(op.f(f'ix_product_info_{column}'), 'product_info', [column], unique=False)
+
+def downgrade():
+    for field in SHADOW_FIELDS:
+        for suffix, _ in SHADOW_COLUMNS:
+            column = f'{field}_{suffix}'
+            op.drop_index(op.f(f'ix_product_info_{column}'), table_name='product_info')
+            op.drop_column('product_info', column)
@@ -0,0 +1,34 @@
+"""add product_spec_values table for numeric spec lookups
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'product_spec_values',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('product_id', sa.String(255), nullable=False),
+        sa.Column('field', sa.String(32), nullable=False),
+        sa.Column('quantity', sa.String(32), nullable=False),
+        sa.Column('value', sa.Float(precision=53), nullable=False),
+        sa.Column('unit', sa.String(16), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_spec_values_product_id'), 'product_spec_values', ['product_id'], unique=False)
+    op.create_index('ix_product_spec_values_quantity_value', 'product_spec_values', ['quantity', 'value'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_product_spec_values_quantity_value', table_name='product_spec_values')
+    op.drop_index(op.f('ix_product_spec_values_product_id'), table_name='product_spec_values')
+    op.drop_table('product_spec_values')
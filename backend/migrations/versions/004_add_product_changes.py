@@ -0,0 +1,29 @@
+"""add product_changes table as the catalog change feed
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'product_changes',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('product_id', sa.String(255), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_changes_changed_at'), 'product_changes', ['changed_at'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_product_changes_changed_at'), table_name='product_changes')
+    op.drop_table('product_changes')
@@ -0,0 +1,219 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from pypinyin import lazy_pinyin
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Float, Index, Integer, String, Numeric, Enum as SQLAlchemyEnum,
+    delete, event, inspect, insert
+)
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+
+from services.spec_parser import parse_specs
+from services.text_normalizer import normalize_text
+
+# 创建基类
+Base = declarative_base()
+
+# 需要维护拼音 / 首字母 / 标准化影子列的源字段
+SEARCH_SHADOW_FIELDS = ("name", "brand", "product_name")
+
+# 影子列长度上限，与建表语句保持一致
+PINYIN_MAX_LENGTH = 512
+INITIALS_MAX_LENGTH = 255
+NORMALIZED_MAX_LENGTH = 512
+
+# 需要解析数值规格的源字段 -> 只有裸数值时使用的默认单位
+SPEC_FIELDS = {
+    "specification": None,
+    "length": "m",
+    "pressure": "MPa",
+    "degree": "°",
+    "wattage": "W",
+}
+
+# 产品模型
+class Product(Base):
+    __tablename__ = "product_info"
+
+    id = Column(String(255), primary_key=True, index=True)
+    code = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    brand = Column(String(255), nullable=False)
+    material_code = Column(String(255), nullable=False, index=True)
+    output_brand = Column(String(255))
+    product_name = Column(String(255))
+    model = Column(String(255))
+    specification = Column(String(100))
+    color = Column(String(255))
+    length = Column(String(255))
+    weight = Column(String(255))
+    wattage = Column(String(255))
+    pressure = Column(String(255))
+    degree = Column(String(255))
+    material = Column(String(255))
+    price = Column(Numeric(10, 2))
+    product_type = Column(SQLAlchemyEnum('管件', '管材', '线槽', '阀门', '接头'))
+    usage_type = Column(SQLAlchemyEnum('农业专用', '农业排水', '建筑排水'))
+    sub_type = Column(SQLAlchemyEnum('弯头', '三通', '直通', '球阀', '闸阀', '截止阀'))
+
+    # 搜索影子列：写入时预计算，拼音 / 首字母检索走索引前缀匹配
+    name_pinyin = Column(String(PINYIN_MAX_LENGTH), index=True)
+    name_initials = Column(String(INITIALS_MAX_LENGTH), index=True)
+    name_normalized = Column(String(NORMALIZED_MAX_LENGTH), index=True)
+    brand_pinyin = Column(String(PINYIN_MAX_LENGTH), index=True)
+    brand_initials = Column(String(INITIALS_MAX_LENGTH), index=True)
+    brand_normalized = Column(String(NORMALIZED_MAX_LENGTH), index=True)
+    product_name_pinyin = Column(String(PINYIN_MAX_LENGTH), index=True)
+    product_name_initials = Column(String(INITIALS_MAX_LENGTH), index=True)
+    product_name_normalized = Column(String(NORMALIZED_MAX_LENGTH), index=True)
+
+# 数值规格表：每个产品的规格 / 长度 / 压力 / 度数 / 功率解析成 SI 单位下的数值，
+# (quantity, value) 上建索引，规格查询变为等值或范围查找
+class ProductSpecValue(Base):
+    __tablename__ = "product_spec_values"
+    __table_args__ = (
+        Index("ix_product_spec_values_quantity_value", "quantity", "value"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(String(255), nullable=False, index=True)
+    field = Column(String(32), nullable=False)
+    quantity = Column(String(32), nullable=False)
+    value = Column(Float(precision=53), nullable=False)
+    unit = Column(String(16), nullable=False)
+
+# 产品变更日志：每次写入产品追加一行，各 worker 按自增 ID 增量拉取，只重新读取变化的产品。
+# 只记录产品 ID，消费方读取产品当前状态，产品已不存在即视为删除
+class ProductChange(Base):
+    __tablename__ = "product_changes"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    product_id = Column(String(255), nullable=False)
+    changed_at = Column(DateTime, nullable=False, index=True)
+
+def record_product_changes(connection, product_ids: Iterable[str]) -> None:
+    """在当前事务中写入变更日志；绕过 ORM 的批量写入需要手动调用"""
+    now = datetime.utcnow()
+    rows = [{"product_id": product_id, "changed_at": now} for product_id in product_ids]
+    if rows:
+        connection.execute(insert(ProductChange.__table__), rows)
+
+def compute_spec_values(product_id: str, values: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+    """根据源字段计算产品的数值规格行"""
+    rows = []
+    for field, default_unit in SPEC_FIELDS.items():
+        for spec in parse_specs(values.get(field), default_unit):
+            rows.append({
+                "product_id": product_id,
+                "field": field,
+                "quantity": spec.quantity,
+                "value": spec.value,
+                "unit": spec.unit,
+            })
+    return rows
+
+def compute_search_columns(values: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """
+    根据源字段计算影子列取值
+
+    拼音和首字母去掉空白并转小写，标准化文本同样转小写，便于大小写无关的前缀匹配
+    """
+    columns = {}
+    for field in SEARCH_SHADOW_FIELDS:
+        value = values.get(field)
+        if not value:
+            columns[f"{field}_pinyin"] = None
+            columns[f"{field}_initials"] = None
+            columns[f"{field}_normalized"] = None
+            continue
+        syllables = [p for p in lazy_pinyin(str(value)) if p.strip()]
+        columns[f"{field}_pinyin"] = ''.join(
+            ''.join(p.split()) for p in syllables
+        ).lower()[:PINYIN_MAX_LENGTH]
+        columns[f"{field}_initials"] = ''.join(
+            p.strip()[0] for p in syllables
+        ).lower()[:INITIALS_MAX_LENGTH]
+        columns[f"{field}_normalized"] = normalize_text(str(value)).lower()[:NORMALIZED_MAX_LENGTH]
+    return columns
+
+def fill_search_columns(product: Product) -> None:
+    """把影子列写回 ORM 对象"""
+    values = {field: getattr(product, field) for field in SEARCH_SHADOW_FIELDS}
+    for column, value in compute_search_columns(values).items():
+        setattr(product, column, value)
+
+# 每次通过 ORM 写入产品时同步维护影子列
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _sync_search_columns(mapper, connection, target: Product) -> None:
+    fill_search_columns(target)
+
+# 规格表与产品在同一事务中维护：新增时写入，源字段变化时重写，删除时一并删除
+def _write_spec_values(connection, target: Product) -> None:
+    spec_table = ProductSpecValue.__table__
+    connection.execute(delete(spec_table).where(spec_table.c.product_id == target.id))
+    rows = compute_spec_values(target.id, {field: getattr(target, field) for field in SPEC_FIELDS})
+    if rows:
+        connection.execute(insert(spec_table), rows)
+
+@event.listens_for(Product, "after_insert")
+def _insert_spec_values(mapper, connection, target: Product) -> None:
+    _write_spec_values(connection, target)
+
+@event.listens_for(Product, "after_update")
+def _update_spec_values(mapper, connection, target: Product) -> None:
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in SPEC_FIELDS):
+        _write_spec_values(connection, target)
+
+@event.listens_for(Product, "after_delete")
+def _delete_spec_values(mapper, connection, target: Product) -> None:
+    spec_table = ProductSpecValue.__table__
+    connection.execute(delete(spec_table).where(spec_table.c.product_id == target.id))
+
+# 变更日志与产品在同一事务中写入，事务回滚时一并撤销
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_delete")
+def _record_product_change(mapper, connection, target: Product) -> None:
+    record_product_changes(connection, [target.id])
+
+@event.listens_for(Product, "after_update")
+def _record_product_update(mapper, connection, target: Product) -> None:
+    # 对象被标记为 dirty 但没有字段真正变化时也会触发，此时不记录
+    if any(attr.history.has_changes() for attr in inspect(target).attrs):
+        record_product_changes(connection, [target.id])
+
+# 产品数据提交后需要通知的回调，用于让进程内的缓存 / 字典失效
+catalog_write_listeners: List[Callable[[], None]] = []
+# 修改多个 worker 共享状态的回调（如共享的目录版本号），每次变更只应由写入方调用一次
+shared_catalog_write_listeners: List[Callable[[], None]] = []
+
+def on_catalog_write(listener: Callable[[], None], shared: bool = False) -> Callable[[], None]:
+    """注册产品数据变更回调（可作为装饰器使用）"""
+    (shared_catalog_write_listeners if shared else catalog_write_listeners).append(listener)
+    return listener
+
+def notify_catalog_write(local_only: bool = False) -> None:
+    """
+    通知回调产品数据已变更；绕过 ORM 的批量写入需要手动调用
+
+    各 worker 从变更日志得知其他进程的写入时传 local_only=True，只让本进程的缓存失效，
+    共享状态已由写入方更新过
+    """
+    listeners = catalog_write_listeners if local_only else catalog_write_listeners + shared_catalog_write_listeners
+    for listener in listeners:
+        listener()
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_write(session, flush_context) -> None:
+    if any(isinstance(obj, Product) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["catalog_written"] = True
+
+@event.listens_for(Session, "after_commit")
+def _notify_catalog_write(session) -> None:
+    if session.info.pop("catalog_written", False):
+        notify_catalog_write()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_write(session) -> None:
+    session.info.pop("catalog_written", None)
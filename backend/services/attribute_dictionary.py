@@ -0,0 +1,115 @@
+from typing import List, Optional, Tuple
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.product import Product, on_catalog_write
+from services.cache import DEFAULT_TTL, create_cache
+from services.feature_columns import FeatureColumns, StringColumn, fuzzy_match_many
+from services.text_analysis import TextAnalysis, analyze_text
+
+logger = logging.getLogger(__name__)
+
+
+class AttributeDictionary:
+    """
+    单个产品字段的取值字典
+
+    通过 SELECT col, COUNT(*) GROUP BY col 一次性构建，每个取值附带预计算的
+    拼音 / 首字母 / 标准化结果，并整理成列式特征，过滤时对所有取值做一次向量运算。
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.entries: List[Tuple[str, int, TextAnalysis]] = []
+        self.features = FeatureColumns([])
+        self.prefix_columns: Tuple[StringColumn, ...] = ()
+        self.loaded_at: Optional[float] = None
+
+    def load(self, db: Session) -> "AttributeDictionary":
+        column = getattr(Product, self.field)
+        rows = (
+            db.query(column, func.count())
+            .filter(column.isnot(None))
+            .group_by(column)
+            .all()
+        )
+        entries = []
+        for value, count in rows:
+            value = str(value)
+            if value:
+                entries.append((value, count, analyze_text(value)))
+        # 按出现次数降序，过滤结果天然有序
+        entries.sort(key=lambda entry: (-entry[1], entry[0]))
+        self.entries = entries
+        analyses = [entry[2] for entry in entries]
+        self.features = FeatureColumns(analyses)
+        # 前缀匹配不区分大小写，单独保存小写后的标准化文本 / 全拼 / 首字母
+        self.prefix_columns = tuple(
+            StringColumn.from_strings([getattr(info, attr).lower() for info in analyses])
+            for attr in ("normalized", "pinyin", "initials")
+        )
+        self.loaded_at = time.time()
+        return self
+
+    def search(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, int, TextAnalysis]]:
+        """
+        过滤取值
+
+        前缀命中（标准化文本 / 全拼 / 首字母）排在前面，其余按模糊匹配补充，
+        两组内部都保持出现次数降序
+        """
+        if not query:
+            return self.entries[:limit] if limit else list(self.entries)
+
+        query_info = analyze_text(query)
+        prefix_keys = (query_info.normalized.lower(), query_info.pinyin.lower(), query_info.initials.lower())
+        prefix_mask = np.zeros(len(self.entries), dtype=bool)
+        for column, key in zip(self.prefix_columns, prefix_keys):
+            prefix_mask |= column.startswith(key)
+        fuzzy_mask, _ = fuzzy_match_many(query_info, self.features)
+
+        rows = np.concatenate([np.flatnonzero(prefix_mask), np.flatnonzero(fuzzy_mask & ~prefix_mask)])
+        if limit:
+            rows = rows[:limit]
+        return [self.entries[row] for row in rows.tolist()]
+
+
+class AttributeDictionaryRegistry:
+    """
+    按字段缓存取值字典
+
+    字典存放在有界 LRU 缓存中，首次访问时加载；产品数据提交后整体失效，
+    绕过 ORM 的写入则依靠缓存 TTL 兜底
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.cache = create_cache("attribute_values", max_entries=64, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, field: str) -> AttributeDictionary:
+        dictionary = self.cache.get(field)
+        if dictionary is not None:
+            return dictionary
+        with self._lock:
+            dictionary = self.cache.get(field)
+            if dictionary is None:
+                dictionary = AttributeDictionary(field).load(db)
+                self.cache.set(field, dictionary)
+                logger.info(f"加载属性值字典 {field}: {len(dictionary.entries)} 个取值")
+            return dictionary
+
+    def invalidate(self, field: Optional[str] = None) -> None:
+        if field is None:
+            self.cache.clear()
+        else:
+            self.cache.delete(field)
+
+
+# 全局属性值字典
+attribute_dictionaries = AttributeDictionaryRegistry()
+on_catalog_write(attribute_dictionaries.invalidate)
@@ -0,0 +1,50 @@
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+
+from services.catalog_version import catalog_version
+from services.text_analysis import analyze_text
+
+
+def canonical_query(query: Optional[str]) -> str:
+    """标准化查询文本：同义写法、大小写和多余空白都归一"""
+    if not query:
+        return ""
+    return ' '.join(analyze_text(query).normalized.lower().split())
+
+
+def canonical_filters(filters: Optional[Dict[str, List[str]]]) -> Dict[str, List[str]]:
+    """标准化筛选条件：去掉空条件，取值标准化后去重排序"""
+    if not filters:
+        return {}
+    return {
+        attr: sorted({canonical_query(value) for value in values})
+        for attr, values in filters.items()
+        if values
+    }
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """对可 JSON 序列化的内容生成稳定摘要，跨进程、跨重启保持一致"""
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def query_fingerprint(
+    query: Optional[str],
+    filters: Optional[Dict[str, List[str]]] = None,
+    version: Optional[int] = None,
+    **extra: Any
+) -> str:
+    """
+    搜索请求的缓存键
+
+    由标准化查询、标准化筛选条件和目录版本组成，extra 用于区分同一查询下的
+    不同用途（例如 kind="facets"）或分页参数
+    """
+    return fingerprint({
+        "q": canonical_query(query),
+        "f": canonical_filters(filters),
+        "v": catalog_version.current() if version is None else version,
+        **extra
+    })
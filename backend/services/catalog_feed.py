@@ -0,0 +1,309 @@
+from datetime import datetime, timedelta
+from typing import Callable, Dict, IO, Iterable, List, Optional, Sequence, Tuple
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 开发环境没有 fcntl，每个进程各自清理
+    fcntl = None
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from models.product import Product, ProductChange, notify_catalog_write
+from services.search_index import INDEX_COLUMNS, search_index
+
+logger = logging.getLogger(__name__)
+
+# 轮询变更日志的间隔（秒），即价格等修改在各 worker 上可见的最长延迟
+CATALOG_FEED_INTERVAL = float(os.getenv('CATALOG_FEED_INTERVAL', '2'))
+# 单次增量应用的最大变更数，积压超过该值（例如批量导入）时改为全量重建
+CATALOG_FEED_BATCH_SIZE = int(os.getenv('CATALOG_FEED_BATCH_SIZE', '5000'))
+# 自增 ID 空洞的等待时间（秒）：先分配 ID 的事务可能晚提交，超时后视为回滚
+CATALOG_FEED_GAP_TIMEOUT = float(os.getenv('CATALOG_FEED_GAP_TIMEOUT', '60'))
+# 变更日志保留天数，更早的记录定期清理
+CATALOG_FEED_RETENTION_DAYS = int(os.getenv('CATALOG_FEED_RETENTION_DAYS', '7'))
+# 清理变更日志的间隔（秒）
+CATALOG_FEED_PRUNE_INTERVAL = 3600
+# 清理变更日志的文件锁：同一台机器上只有持有该锁的 worker 执行清理
+CATALOG_FEED_PRUNE_LOCK = os.getenv('CATALOG_FEED_PRUNE_LOCK', '/tmp/mioflow_catalog_prune.lock')
+# 按 ID 回表时每条 IN 查询的最大 ID 数
+LOAD_CHUNK_SIZE = 1000
+
+ChangeListener = Callable[[List[Tuple], List[str]], None]
+ReloadListener = Callable[[Session], None]
+
+
+def missing_change_ids(db: Session, high_water: int, window: int = CATALOG_FEED_BATCH_SIZE) -> List[int]:
+    """
+    (high_water - window, high_water] 中尚不存在的变更 ID
+
+    以 MAX(id) 作为高水位时，其下分配了 ID 但尚未提交的事务稍后才会出现，
+    需要作为空洞继续查询；与轮询时相同，只跟踪最靠近高水位的 window 个
+    """
+    lowest = max(1, high_water - window + 1)
+    if high_water < lowest:
+        return []
+    existing = {
+        change_id for change_id, in db.query(ProductChange.id)
+        .filter(ProductChange.id >= lowest, ProductChange.id <= high_water)
+    }
+    return [change_id for change_id in range(lowest, high_water + 1) if change_id not in existing]
+
+
+class CatalogChangeFeed:
+    """
+    产品目录变更订阅
+
+    记录已应用的最大变更 ID（高水位），每次轮询只读取其后的变更，合并同一产品的
+    多次变更后按 ID 回表读取当前取值，交给 on_change 注册的回调（如搜索索引）增量应用，
+    再通知进程内的缓存失效。开销与变化的产品数成正比，不需要重新加载整个目录。
+
+    自增 ID 按分配顺序而非提交顺序出现，高水位之下可能存在尚未提交的 ID，
+    这些空洞会在后续轮询中继续查询，直到出现或超过 gap_timeout。
+    积压超过 batch_size 时改为调用 on_reload 注册的全量加载。
+
+    过期变更日志的清理只在持有 prune_lock 文件锁的一个 worker 中执行，
+    该 worker 退出后锁自动释放，由其他 worker 在下一个清理周期接手。
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        interval: float = CATALOG_FEED_INTERVAL,
+        batch_size: int = CATALOG_FEED_BATCH_SIZE,
+        gap_timeout: float = CATALOG_FEED_GAP_TIMEOUT,
+        prune_lock: str = CATALOG_FEED_PRUNE_LOCK
+    ):
+        self.fields = tuple(fields)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self.high_water: Optional[int] = None
+        self._gaps: Dict[int, float] = {}
+        self._change_listeners: List[ChangeListener] = []
+        self._reload_listeners: List[ReloadListener] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = 0.0
+        self.prune_lock = prune_lock
+        self._prune_lock_file: Optional[IO] = None
+        self.polls = 0
+        self.changes = 0
+        self.upserted = 0
+        self.removed = 0
+        self.reloads = 0
+        self.errors = 0
+        self.last_changed_at: Optional[datetime] = None
+        self.last_applied_at: Optional[float] = None
+
+    def on_change(self, listener: ChangeListener) -> ChangeListener:
+        """注册增量回调：listener(rows, removed)，rows 的每一项为 (id, *fields)"""
+        self._change_listeners.append(listener)
+        return listener
+
+    def on_reload(self, listener: ReloadListener) -> ReloadListener:
+        """注册全量加载回调：listener(db)"""
+        self._reload_listeners.append(listener)
+        return listener
+
+    def _mark(self, db: Session) -> None:
+        self.high_water = db.query(func.coalesce(func.max(ProductChange.id), 0)).scalar()
+        self._seed_gaps(missing_change_ids(db, self.high_water, self.batch_size))
+
+    def _seed_gaps(self, change_ids: Iterable[int]) -> None:
+        now = time.time()
+        self._gaps = {change_id: now for change_id in change_ids}
+
+    def reload(self, db: Session) -> None:
+        """
+        全量加载
+
+        先记下当前的最大变更 ID 再读取产品，加载期间发生的变更会在下次轮询时
+        再应用一次（按当前取值覆盖，重复应用没有副作用）
+        """
+        with self._lock:
+            self._reload_locked(db)
+
+    def _reload_locked(self, db: Session) -> None:
+        self._mark(db)
+        for listener in self._reload_listeners:
+            listener(db)
+        self.reloads += 1
+        self.last_applied_at = time.time()
+
+    def resume(
+        self,
+        db: Session,
+        high_water: int,
+        load: Callable[[], None],
+        gaps: Optional[Iterable[int]] = None
+    ) -> bool:
+        """
+        从外部保存的状态（如目录快照）继续
+
+        变更日志仍然完整覆盖 high_water 之后的所有变更时调用 load() 装载状态，
+        并把高水位设为 high_water；日志已被清理到 high_water 之后或被重置时返回 False。
+        gaps 为保存状态时高水位之下的空洞（见 missing_change_ids），未提供时按当前的
+        变更日志计算
+        """
+        with self._lock:
+            lowest, highest = db.query(func.min(ProductChange.id), func.max(ProductChange.id)).one()
+            if lowest is None:
+                complete = high_water == 0
+            else:
+                complete = lowest <= high_water + 1 and highest >= high_water
+            if not complete:
+                return False
+            if gaps is None:
+                gaps = missing_change_ids(db, high_water, self.batch_size)
+            load()
+            self.high_water = high_water
+            self._seed_gaps(gaps)
+            self.last_applied_at = time.time()
+            return True
+
+    def _load_rows(self, db: Session, product_ids: List[str]) -> List[Tuple]:
+        columns = [getattr(Product, field) for field in self.fields]
+        rows = []
+        for i in range(0, len(product_ids), LOAD_CHUNK_SIZE):
+            chunk = product_ids[i:i + LOAD_CHUNK_SIZE]
+            rows.extend(tuple(row) for row in db.query(Product.id, *columns).filter(Product.id.in_(chunk)))
+        return rows
+
+    def poll(self, db: Session) -> int:
+        """应用高水位之后的变更，返回读取到的变更数；尚未全量加载过时不做任何事"""
+        with self._lock:
+            if self.high_water is None:
+                return 0
+            self.polls += 1
+            now = time.time()
+            self._gaps = {change_id: seen for change_id, seen in self._gaps.items() if now - seen < self.gap_timeout}
+
+            condition = ProductChange.id > self.high_water
+            if self._gaps:
+                condition = or_(condition, ProductChange.id.in_(list(self._gaps)))
+            changes = (
+                db.query(ProductChange.id, ProductChange.product_id, ProductChange.changed_at)
+                .filter(condition)
+                .order_by(ProductChange.id)
+                .limit(self.batch_size + 1)
+                .all()
+            )
+            if not changes:
+                return 0
+            if len(changes) > self.batch_size:
+                logger.info(f"目录变更积压超过 {self.batch_size} 条，改为全量加载")
+                self._reload_locked(db)
+                notify_catalog_write(local_only=True)
+                return len(changes)
+
+            # 同一产品的多次变更只回表一次；回表时已不存在的产品视为删除
+            product_ids = list(dict.fromkeys(change.product_id for change in changes))
+            rows = self._load_rows(db, product_ids)
+            found = {row[0] for row in rows}
+            removed = [product_id for product_id in product_ids if product_id not in found]
+            for listener in self._change_listeners:
+                listener(rows, removed)
+
+            for change in changes:
+                if self._gaps.pop(change.id, None) is not None:
+                    continue
+                # 高水位与本条之间缺失的 ID 记为空洞；多行插入预留的 ID 段可能很长，
+                # 只跟踪最靠近本条的 batch_size 个
+                for missing in range(max(self.high_water + 1, change.id - self.batch_size), change.id):
+                    self._gaps[missing] = now
+                self.high_water = max(self.high_water, change.id)
+
+            self.changes += len(changes)
+            self.upserted += len(rows)
+            self.removed += len(removed)
+            self.last_changed_at = max(change.changed_at for change in changes)
+            self.last_applied_at = time.time()
+        # 让本进程的属性值字典、筛选统计等缓存失效；共享版本号已由写入方更新，
+        # 搜索响应缓存键中带有高水位，各 worker 应用变更后自然使用新键
+        notify_catalog_write(local_only=True)
+        return len(changes)
+
+    def prune(self, db: Session, retention_days: int = CATALOG_FEED_RETENTION_DAYS) -> int:
+        """删除超过保留期的变更日志"""
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = db.query(ProductChange).filter(ProductChange.changed_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def _claim_prune(self) -> bool:
+        """尝试成为负责清理的 worker；已持有文件锁时直接返回 True"""
+        if fcntl is None or self._prune_lock_file is not None:
+            return True
+        lock_file = open(self.prune_lock, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._prune_lock_file = lock_file
+        return True
+
+    def _release_prune(self) -> None:
+        if self._prune_lock_file is not None:
+            self._prune_lock_file.close()
+            self._prune_lock_file = None
+
+    def _run(self, session_factory: Callable[[], Session]) -> None:
+        while not self._stop.wait(self.interval):
+            db = session_factory()
+            try:
+                self.poll(db)
+                if time.time() - self._last_prune >= CATALOG_FEED_PRUNE_INTERVAL:
+                    self._last_prune = time.time()
+                    if self._claim_prune():
+                        deleted = self.prune(db)
+                        if deleted:
+                            logger.info(f"清理过期目录变更日志 {deleted} 条")
+            except Exception as e:
+                self.errors += 1
+                db.rollback()
+                logger.error(f"应用目录变更时出错: {str(e)}")
+            finally:
+                db.close()
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        """启动后台轮询线程"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(session_factory,), name="catalog-feed", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self._release_prune()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "high_water": self.high_water,
+            "pending_gaps": len(self._gaps),
+            "polls": self.polls,
+            "changes": self.changes,
+            "upserted": self.upserted,
+            "removed": self.removed,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "prune_owner": self._prune_lock_file is not None,
+            "last_changed_at": self.last_changed_at.isoformat() if self.last_changed_at else None,
+            "seconds_since_apply": round(time.time() - self.last_applied_at, 3) if self.last_applied_at else None,
+        }
+
+
+# 全局目录变更订阅：增量更新搜索索引
+catalog_feed = CatalogChangeFeed(INDEX_COLUMNS)
+catalog_feed.on_change(search_index.apply_changes)
@@ -0,0 +1,136 @@
+from typing import Dict, NamedTuple, Optional, Sequence
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.product import Product, ProductChange
+from services.catalog_feed import CatalogChangeFeed, missing_change_ids
+from services.search_index import INDEX_COLUMNS, ProductSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# 快照目录：每个快照一个子目录，CURRENT 文件记录当前生效的子目录名
+CATALOG_SNAPSHOT_DIR = os.getenv('CATALOG_SNAPSHOT_DIR', '/tmp/mioflow_catalog_snapshot')
+# 快照文件格式版本，格式变化后旧快照不再加载
+SNAPSHOT_FORMAT = 2
+# 保留的快照个数：正在运行的 worker 可能仍映射着上一个快照
+SNAPSHOTS_KEPT = 2
+CURRENT_FILE = "CURRENT"
+META_FILE = "meta.json"
+
+
+class CatalogSnapshot(NamedTuple):
+    path: str
+    meta: Dict[str, object]
+    arrays: Dict[str, np.ndarray]
+
+
+def write_snapshot(
+    index: ProductSearchIndex,
+    high_water: int,
+    directory: str = CATALOG_SNAPSHOT_DIR,
+    gaps: Sequence[int] = ()
+) -> str:
+    """
+    把搜索索引写成列式快照
+
+    每个数组一个 .npy 文件，写在临时子目录中，完成后改名并原子替换 CURRENT，
+    读取方不会看到写了一半的快照。high_water 为读取产品之前的最大变更 ID，
+    gaps 为当时高水位之下尚未提交的变更 ID，加载快照后从这里继续应用变更日志。
+    """
+    arrays = index.export_arrays()
+    # 以毫秒时间戳开头，目录名按字典序即按时间排序
+    name = f"{int(time.time() * 1000):013d}-{high_water}"
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{name}.", dir=directory)
+    for key, array in arrays.items():
+        np.save(os.path.join(staging, f"{key}.npy"), array, allow_pickle=False)
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "columns": list(index.columns),
+        "products": int(arrays["ids"].size),
+        "high_water": int(high_water),
+        "gaps": [int(change_id) for change_id in gaps],
+        "created_at": time.time(),
+    }
+    with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+
+    path = os.path.join(directory, name)
+    os.replace(staging, path)
+    pointer = os.path.join(directory, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(pointer, "w", encoding="utf-8") as file:
+        file.write(name)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    # 已映射旧文件的进程不受删除影响，文件在最后一个映射关闭后才真正释放
+    snapshots = sorted(entry for entry in os.listdir(directory) if not entry.startswith(".") and entry != CURRENT_FILE)
+    for stale in snapshots[:-SNAPSHOTS_KEPT]:
+        shutil.rmtree(os.path.join(directory, stale), ignore_errors=True)
+    return path
+
+
+def build_snapshot(db: Session, directory: str = CATALOG_SNAPSHOT_DIR) -> str:
+    """从 product_info 构建搜索索引并写成快照"""
+    # 先记下最大变更 ID 再读取产品，读取期间的变更会在加载快照后再应用一次
+    high_water = db.query(func.coalesce(func.max(ProductChange.id), 0)).scalar()
+    gaps = missing_change_ids(db, high_water)
+    index = ProductSearchIndex()
+    columns = [getattr(Product, field) for field in index.columns]
+    index.build(db.query(Product.id, *columns).yield_per(5000))
+    return write_snapshot(index, high_water, directory, gaps)
+
+
+def open_snapshot(directory: str = CATALOG_SNAPSHOT_DIR) -> Optional[CatalogSnapshot]:
+    """以只读内存映射打开当前快照；不存在或格式不符时返回 None"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), encoding="utf-8") as file:
+            path = os.path.join(directory, file.read().strip())
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get("format") != SNAPSHOT_FORMAT or tuple(meta.get("columns", ())) != INDEX_COLUMNS:
+        logger.info(f"目录快照 {path} 格式不符，忽略")
+        return None
+    arrays = {
+        entry[:-len(".npy")]: np.load(os.path.join(path, entry), mmap_mode="r", allow_pickle=False)
+        for entry in os.listdir(path)
+        if entry.endswith(".npy")
+    }
+    return CatalogSnapshot(path, meta, arrays)
+
+
+def load_snapshot_index(
+    db: Session,
+    index: ProductSearchIndex,
+    feed: CatalogChangeFeed,
+    directory: str = CATALOG_SNAPSHOT_DIR
+) -> bool:
+    """
+    从快照映射搜索索引，并让 feed 从快照的高水位继续应用变更
+
+    快照之后的变更日志已被清理（快照过旧）或日志被重置时返回 False，
+    调用方应退回到从数据库全量加载
+    """
+    start = time.perf_counter()
+    snapshot = open_snapshot(directory)
+    if snapshot is None:
+        return False
+    if not feed.resume(
+        db, int(snapshot.meta["high_water"]), lambda: index.attach_arrays(snapshot.arrays), snapshot.meta.get("gaps")
+    ):
+        logger.info(f"目录快照 {snapshot.path} 之后的变更日志不完整，改为从数据库加载")
+        return False
+    logger.info(
+        f"已加载目录快照 {snapshot.path}: {snapshot.meta['products']} 个产品, "
+        f"耗时 {(time.perf_counter() - start) * 1000:.1f}ms"
+    )
+    return True
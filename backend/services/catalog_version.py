@@ -0,0 +1,49 @@
+from typing import Optional, Protocol
+import threading
+
+from models.product import on_catalog_write
+
+
+class VersionStore(Protocol):
+    """可在多个 worker 之间共享的版本号存储"""
+
+    def read_version(self) -> int: ...
+
+    def increment_version(self) -> int: ...
+
+
+class CatalogVersion:
+    """
+    单调递增的产品目录版本号
+
+    每次通过 ORM 提交产品变更后加一。缓存键中带上版本号后，目录变化会让旧的
+    缓存条目自然失效，无需逐个清理。默认只在进程内计数；绑定共享存储后，
+    任一 worker 的写入都会让所有 worker 看到新版本。只有写入方加一，
+    各 worker 从变更日志应用同一变更时不再重复加一。
+    """
+
+    def __init__(self, initial: int = 0):
+        self._value = initial
+        self._lock = threading.Lock()
+        self._store: Optional[VersionStore] = None
+
+    def bind(self, store: Optional[VersionStore]) -> None:
+        """绑定（或解绑）共享版本存储"""
+        self._store = store
+
+    def current(self) -> int:
+        if self._store is not None:
+            return self._store.read_version()
+        return self._value
+
+    def bump(self) -> int:
+        if self._store is not None:
+            return self._store.increment_version()
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+# 全局目录版本
+catalog_version = CatalogVersion()
+on_catalog_write(catalog_version.bump, shared=True)
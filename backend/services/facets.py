@@ -0,0 +1,81 @@
+from typing import Dict, Mapping, Optional
+import logging
+
+from sqlalchemy import String, cast, func, literal, select, union_all
+from sqlalchemy.orm import Query
+
+from services.search_index import Ranking
+
+logger = logging.getLogger(__name__)
+
+# 每个筛选维度默认最多返回的取值数
+DEFAULT_TOP_N = 50
+
+
+class FacetEngine:
+    """
+    筛选维度统计
+
+    把任意 ORM 查询包装成 CTE，对每个字段做一次 GROUP BY，再用 UNION ALL 合并成
+    一条 SQL，只返回 (维度, 取值, 数量) 三列，不再加载完整的 ORM 对象。
+    每个维度在 SQL 中用 ROW_NUMBER() 窗口函数按数量取前 top_n 个取值（需要 MySQL 8），
+    只有这些行返回给应用。有搜索词时改用 compute_ranking 在内存中的候选集上统计。
+    """
+
+    def __init__(self, fields: Mapping[str, str], top_n: int = DEFAULT_TOP_N):
+        # fields: 返回给前端的维度名称 -> 模型字段名
+        self.fields = dict(fields)
+        self.top_n = top_n
+
+    def compute(self, query: Query, top_n: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """统计查询结果在各维度上的取值分布"""
+        top_n = self.top_n if top_n is None else top_n
+        if top_n <= 0:
+            return {label: {} for label in self.fields}
+        entity = query.column_descriptions[0]["entity"]
+        columns = [getattr(entity, field).label(field) for field in dict.fromkeys(self.fields.values())]
+        matched = query.with_entities(*columns).order_by(None).cte("facet_source")
+
+        selects = []
+        for label, field in self.fields.items():
+            column = matched.c[field]
+            selects.append(
+                select(
+                    literal(label).label("facet"),
+                    cast(column, String).label("value"),
+                    func.count().label("count")
+                )
+                .where(column.isnot(None))
+                .where(cast(column, String) != "")
+                .group_by(column)
+            )
+
+        # 每个维度内按数量降序（相同时按取值）编号，只返回前 top_n 行
+        counts = union_all(*selects).subquery("facet_counts")
+        ranked = select(
+            counts.c.facet,
+            counts.c.value,
+            counts.c["count"],
+            func.row_number().over(
+                partition_by=counts.c.facet,
+                order_by=(counts.c["count"].desc(), counts.c.value)
+            ).label("position")
+        ).subquery("facet_ranked")
+        rows = query.session.execute(
+            select(ranked.c.facet, ranked.c.value, ranked.c["count"])
+            .where(ranked.c.position <= top_n)
+            .order_by(ranked.c.facet, ranked.c.position)
+        ).all()
+
+        result: Dict[str, Dict[str, int]] = {label: {} for label in self.fields}
+        for facet, value, count in rows:
+            result[facet][str(value)] = count
+        return result
+
+    def compute_ranking(self, ranking: Ranking, top_n: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """统计搜索候选集在各维度上的取值分布，使用排序结果中的属性编码，不查询数据库"""
+        top_n = self.top_n if top_n is None else top_n
+        return {
+            label: dict(ranking.facet_counts(field, top_n))
+            for label, field in self.fields.items()
+        }
@@ -0,0 +1,212 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from services.text_analysis import TextAnalysis, analyze_text
+
+# 各匹配规则命中时的得分，同一行取最高分
+SCORE_NORMALIZED = 1.0
+SCORE_PINYIN = 0.8
+SCORE_INITIALS = 0.6
+SCORE_NUMBER = 0.5
+# 分词规则按查询词覆盖率计分：覆盖率 × SCORE_TOKENS
+SCORE_TOKENS = 0.7
+# 分词规则的最低覆盖率，与 fuzzy_match_analysis 一致
+TOKEN_MATCH_RATIO = 0.7
+# 数值比较的容差
+NUMBER_TOLERANCE = 0.01
+
+# 行与行之间的分隔码位，查询文本中不会出现
+_SEPARATOR = "\x00"
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+class StringColumn:
+    """
+    字符串列的码位堆存储
+
+    所有行以 \\x00 分隔拼接成一个 uint32 码位数组，offsets[i] 为第 i 行的起始位置。
+    另外按码位排序保存一份位置表，子串判断从查询中最少见的字符出发，只在它出现的
+    位置上比较其余字符，再用 searchsorted 把命中位置映射回行号；耗时与候选位置数
+    成正比，而不是与行数成正比。
+    """
+
+    def __init__(self, heap: np.ndarray, offsets: np.ndarray):
+        self.heap = heap
+        self.offsets = offsets
+        self.lengths = np.diff(offsets) - 1
+        self._positions = np.argsort(heap, kind="stable").astype(np.int64)
+        self._sorted = heap[self._positions]
+
+    @classmethod
+    def from_strings(cls, values: Sequence[str]) -> "StringColumn":
+        lengths = np.fromiter((len(value) + 1 for value in values), dtype=np.int64, count=len(values))
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        heap = _codepoints(''.join(value + _SEPARATOR for value in values))
+        return cls(heap, offsets)
+
+    def __len__(self) -> int:
+        return int(self.offsets.size - 1)
+
+    def contains(self, needle: str) -> np.ndarray:
+        """每一行是否包含 needle"""
+        rows = len(self)
+        if not needle:
+            return np.ones(rows, dtype=bool)
+        pattern = _codepoints(needle)
+        width = self.heap.size - pattern.size + 1
+        if width <= 0:
+            return np.zeros(rows, dtype=bool)
+
+        # pattern 与码位数组同为 uint32，searchsorted 不会触发整列类型转换
+        lows = np.searchsorted(self._sorted, pattern, side="left")
+        highs = np.searchsorted(self._sorted, pattern, side="right")
+        anchor = int(np.argmin(highs - lows))
+        positions = self._positions[lows[anchor]:highs[anchor]] - anchor
+        positions = positions[(positions >= 0) & (positions < width)]
+        for i in range(pattern.size):
+            if not positions.size:
+                break
+            if i != anchor:
+                positions = positions[self.heap[positions + i] == pattern[i]]
+
+        mask = np.zeros(rows, dtype=bool)
+        if positions.size:
+            mask[np.searchsorted(self.offsets, positions, side="right") - 1] = True
+        return mask
+
+    def startswith(self, prefix: str) -> np.ndarray:
+        """每一行是否以 prefix 开头"""
+        rows = len(self)
+        if not prefix:
+            return np.ones(rows, dtype=bool)
+        pattern = _codepoints(prefix)
+        mask = self.lengths >= pattern.size
+        starts = self.offsets[:-1]
+        for i in range(pattern.size):
+            if not mask.any():
+                break
+            # 长度不足的行已被排除，其位置取值无关紧要
+            positions = np.minimum(starts + i, self.heap.size - 1)
+            mask &= self.heap[positions] == pattern[i]
+        return mask
+
+
+class FeatureColumns:
+    """
+    一列文本的列式预计算特征
+
+    与 TextAnalysis 字段一一对应：标准化文本 / 全拼 / 首字母为 StringColumn，
+    数值为按最大个数补 NaN 的二维数组，首个单位编码为整数，分词以 CSR 形式
+    （每个取值的去重词 ID + 所属行）保存。fuzzy_match_many 只在这些数组上做向量运算。
+    """
+
+    def __init__(self, analyses: Sequence[TextAnalysis]):
+        self.size = len(analyses)
+        self.normalized = StringColumn.from_strings([info.normalized for info in analyses])
+        self.pinyin = StringColumn.from_strings([info.pinyin for info in analyses])
+        self.initials = StringColumn.from_strings([info.initials for info in analyses])
+
+        width = max((len(info.numbers) for info in analyses), default=0)
+        self.numbers = np.full((self.size, width), np.nan)
+        for row, info in enumerate(analyses):
+            if info.numbers:
+                self.numbers[row, :len(info.numbers)] = info.numbers
+        # 所有数值按大小排序，查询时用二分定位容差区间
+        number_rows, number_slots = np.nonzero(~np.isnan(self.numbers))
+        values = self.numbers[number_rows, number_slots]
+        order = np.argsort(values, kind="stable")
+        self._number_values = values[order]
+        self._number_rows = number_rows[order]
+
+        # 单位编码：-1 表示该行没有单位
+        self.unit_codes: Dict[str, int] = {}
+        self.units = np.fromiter(
+            (self.unit_codes.setdefault(info.units[0], len(self.unit_codes)) if info.units else -1
+             for info in analyses),
+            dtype=np.int64,
+            count=self.size
+        )
+
+        self.token_codes: Dict[str, int] = {}
+        token_ids: List[int] = []
+        token_rows: List[int] = []
+        for row, info in enumerate(analyses):
+            for token in set(info.tokens):
+                token_ids.append(self.token_codes.setdefault(token, len(self.token_codes)))
+                token_rows.append(row)
+        # 按词 ID 分组的 CSR：词 i 出现在 token_rows[token_offsets[i]:token_offsets[i + 1]]
+        token_ids_array = np.array(token_ids, dtype=np.int64)
+        order = np.argsort(token_ids_array, kind="stable")
+        self.token_rows = np.array(token_rows, dtype=np.int64)[order]
+        self.token_offsets = np.searchsorted(token_ids_array[order], np.arange(len(self.token_codes) + 1))
+
+    @classmethod
+    def from_values(cls, values: Iterable[Optional[str]]) -> "FeatureColumns":
+        """从原始取值构建（分析结果经过 text_analysis 缓存）"""
+        return cls([analyze_text(str(value) if value is not None else "") for value in values])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def number_mask(self, query_info: TextAnalysis) -> np.ndarray:
+        """数值相同（容差内）且单位兼容的行"""
+        close = np.zeros(self.size, dtype=bool)
+        if not query_info.numbers or not self._number_values.size:
+            return close
+        values = self._number_values
+        for number in query_info.numbers:
+            low = np.searchsorted(values, number - 2 * NUMBER_TOLERANCE, side="left")
+            high = np.searchsorted(values, number + 2 * NUMBER_TOLERANCE, side="right")
+            within = np.abs(values[low:high] - number) < NUMBER_TOLERANCE
+            close[self._number_rows[low:high][within]] = True
+        if not query_info.units:
+            return close
+        unit_ok = self.units == -1
+        code = self.unit_codes.get(query_info.units[0])
+        if code is not None:
+            unit_ok |= self.units == code
+        return close & unit_ok
+
+    def common_tokens(self, query_info: TextAnalysis) -> np.ndarray:
+        """每一行分词结果与查询分词的公共词数"""
+        codes = [self.token_codes[word] for word in set(query_info.tokens) if word in self.token_codes]
+        if not codes:
+            return np.zeros(self.size, dtype=np.int64)
+        rows = np.concatenate([self.token_rows[self.token_offsets[code]:self.token_offsets[code + 1]] for code in codes])
+        return np.bincount(rows, minlength=self.size)
+
+
+def fuzzy_match_many(
+    query: Union[str, TextAnalysis],
+    column: FeatureColumns
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    对整列同时执行 fuzzy_match_analysis
+
+    返回 (mask, scores)：mask 与逐行调用 fuzzy_match_analysis 的结果一致；
+    scores 为命中规则中的最高分（完全匹配 > 拼音 > 首字母 > 数值，分词按覆盖率计分），
+    未命中的行为 0。
+    """
+    query_info = analyze_text(query) if isinstance(query, str) else query
+    scores = np.zeros(len(column))
+
+    rules = (
+        (column.normalized.contains(query_info.normalized), SCORE_NORMALIZED),
+        (column.pinyin.contains(query_info.pinyin), SCORE_PINYIN),
+        (column.initials.contains(query_info.initials), SCORE_INITIALS),
+        (column.number_mask(query_info), SCORE_NUMBER),
+    )
+    for mask, score in rules:
+        np.maximum(scores, np.where(mask, score, 0.0), out=scores)
+
+    query_words = len(set(query_info.tokens))
+    if query_words:
+        common = column.common_tokens(query_info)
+        token_mask = common >= query_words * TOKEN_MATCH_RATIO
+        np.maximum(scores, np.where(token_mask, common / query_words * SCORE_TOKENS, 0.0), out=scores)
+
+    return scores > 0, scores
@@ -0,0 +1,30 @@
+from typing import Any, List
+import base64
+import binascii
+import json
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def encode_cursor(sort_key: List[Any]) -> str:
+    """
+    把最后一条记录的排序键编码为不透明游标
+
+    客户端只需原样回传，不应依赖其内容
+    """
+    payload = json.dumps(sort_key, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """解析游标，返回排序键"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor(f"无效的分页游标: {cursor}") from e
+    if not isinstance(sort_key, list) or not sort_key:
+        raise InvalidCursor(f"无效的分页游标: {cursor}")
+    return sort_key
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Optional
+import bisect
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# 获取连接耗时直方图的桶上界（毫秒），最后一个桶收纳超过 5 秒的请求
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """
+    连接池指标
+
+    记录获取连接的次数、因连接池耗尽而排队的次数、获取耗时直方图、超时次数，
+    以及物理连接的创建 / 关闭 / 失效次数（连接抖动）。计数在锁内更新，
+    stats() 返回快照。
+    """
+
+    def __init__(self, buckets_ms=WAIT_BUCKETS_MS):
+        self._lock = threading.Lock()
+        self.buckets_ms = tuple(buckets_ms)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.waits = 0
+            self.timeouts = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.histogram: List[int] = [0] * (len(self.buckets_ms) + 1)
+            self.connects = 0
+            self.closes = 0
+            self.invalidations = 0
+            self.peak_checked_out = 0
+
+    def record_acquire(self, elapsed: float, waited: bool, checked_out: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.histogram[bisect.bisect_left(self.buckets_ms, elapsed * 1000)] += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if waited:
+                self.waits += 1
+                self.wait_seconds += elapsed
+                self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def record_timeout(self, elapsed: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def _increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def attach(self, engine: Engine) -> None:
+        """登记连接池事件；engine 使用 InstrumentedQueuePool 时同时记录获取耗时"""
+        pool = engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.metrics = self
+        event.listen(pool, "connect", lambda *args: self._increment("connects"))
+        event.listen(pool, "close", lambda *args: self._increment("closes"))
+        event.listen(pool, "close_detached", lambda *args: self._increment("closes"))
+        event.listen(pool, "invalidate", lambda *args: self._increment("invalidations"))
+        event.listen(pool, "checkin", lambda *args: self._increment("checkins"))
+
+    def stats(self, engine: Optional[Engine] = None) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+            data: Dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_rate": round(self.waits / attempts, 4) if attempts else 0.0,
+                "avg_wait_ms": round(self.wait_seconds / self.waits * 1000, 3) if self.waits else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "acquire_histogram": dict(zip(labels, self.histogram)),
+                "peak_checked_out": self.peak_checked_out,
+                "connects": self.connects,
+                "closes": self.closes,
+                "invalidations": self.invalidations,
+            }
+        if engine is not None and isinstance(engine.pool, QueuePool):
+            pool = engine.pool
+            data.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    记录获取连接耗时的 QueuePool
+
+    SQLAlchemy 的连接池事件只在拿到连接之后触发，无法得知请求在队列里等了多久，
+    因此在 _do_get 外层计时：进入时空闲连接和溢出额度都已用完即计为一次排队。
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        metrics = self.metrics
+        if metrics is None:
+            return super()._do_get()
+        waited = self._pool.empty() and -1 < self._max_overflow <= self._overflow
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except Exception:
+            if waited:
+                metrics.record_timeout(time.perf_counter() - start)
+            raise
+        metrics.record_acquire(time.perf_counter() - start, waited, self.checkedout())
+        return record
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # engine.dispose() 会重建连接池，指标对象需要随之转移
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
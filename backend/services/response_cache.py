@@ -0,0 +1,174 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from services.cache import DEFAULT_TTL, LRUCache
+
+logger = logging.getLogger(__name__)
+
+# 搜索响应缓存配置
+SEARCH_CACHE_BACKEND = os.getenv('SEARCH_CACHE_BACKEND', 'memory')  # memory | sqlite
+SEARCH_CACHE_PATH = os.getenv('SEARCH_CACHE_PATH', '/tmp/mioflow_search_cache.sqlite3')
+SEARCH_CACHE_ENTRIES = int(os.getenv('SEARCH_CACHE_ENTRIES', '10000'))
+SEARCH_CACHE_BYTES = int(os.getenv('SEARCH_CACHE_BYTES', str(128 * 1024 * 1024)))
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', str(DEFAULT_TTL)))
+
+
+class ResponseCacheBackend(ABC):
+    """响应缓存后端接口"""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class InProcessResponseBackend(ResponseCacheBackend):
+    """进程内后端：单 worker 部署使用，直接缓存响应对象"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_ENTRIES, max_bytes: int = SEARCH_CACHE_BYTES,
+                 ttl: float = SEARCH_CACHE_TTL):
+        self.cache = LRUCache("search_responses", max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.cache.set(key, value)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.cache.stats()}
+
+
+class SQLiteResponseBackend(ResponseCacheBackend):
+    """
+    本机共享后端：多 worker 部署使用
+
+    同一台机器上的 worker 共用一个 WAL 模式的 SQLite 文件，响应以 JSON 存储。
+    文件中同时保存目录版本号，实现 VersionStore 接口，供 CatalogVersion 绑定。
+    """
+
+    name = "sqlite"
+
+    # 每写入多少次做一次过期 / 超量清理
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, max_entries: int = SEARCH_CACHE_ENTRIES,
+                 ttl: float = SEARCH_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses (created_at)")
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('catalog_version', 0)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程使用，每个线程一个连接
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False, default=str), now + self.ttl, now)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        connection = self._connection()
+        connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM responses")
+
+    def read_version(self) -> int:
+        row = self._connection().execute("SELECT value FROM meta WHERE name = 'catalog_version'").fetchone()
+        return row[0] if row else 0
+
+    def increment_version(self) -> int:
+        connection = self._connection()
+        connection.execute("UPDATE meta SET value = value + 1 WHERE name = 'catalog_version'")
+        return self.read_version()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        size = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def create_response_backend(kind: str = SEARCH_CACHE_BACKEND) -> ResponseCacheBackend:
+    """按配置创建响应缓存后端"""
+    if kind == "sqlite":
+        logger.info(f"搜索响应缓存使用共享 SQLite 后端: {SEARCH_CACHE_PATH}")
+        return SQLiteResponseBackend()
+    if kind != "memory":
+        logger.warning(f"未知的搜索缓存后端 {kind}，使用进程内缓存")
+    return InProcessResponseBackend()
@@ -0,0 +1,742 @@
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from services.text_normalizer import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 参与全文检索的字段
+SEARCH_FIELDS = ("name", "product_name", "brand", "material", "specification")
+
+# 筛选与筛选维度统计使用的属性字段，按原值保存，搜索候选集上的筛选和统计不再查询数据库
+FACET_FIELDS = ("brand", "material", "specification", "color", "model", "product_type", "usage_type", "sub_type")
+
+# build / upsert 每行的取值顺序：(id, *INDEX_COLUMNS)
+INDEX_COLUMNS = tuple(dict.fromkeys(SEARCH_FIELDS + FACET_FIELDS))
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 字段权重：名称、品牌、规格命中比材质 / 品名更能说明是目标 SKU
+FIELD_BOOSTS = {
+    "name": 3.0,
+    "brand": 2.0,
+    "specification": 1.5,
+    "product_name": 1.0,
+    "material": 1.0,
+}
+
+# 多词查询整体出现在名称中时的额外权重
+PHRASE_BOOST = 1.5
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _grams(text: str) -> Set[str]:
+    """提取文本的单字与二元组，作为倒排索引的键"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def _encode_strings(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """字符串列表 -> (utf-8 字节堆, 偏移)，与 _StringArray 的 heap / offsets 对应"""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.array([len(text) for text in encoded], dtype=np.int64), out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _idf(doc_count: int, doc_freq: int) -> float:
+    return math.log(1.0 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+class _StringArray:
+    """
+    只读字符串数组 + 追加区
+
+    base 为定长 unicode 数组或 (utf-8 字节堆, 偏移) 对，通常来自内存映射的快照文件，
+    按下标访问时才解码；之后追加的取值保存在 Python 列表中。行为与 list 的
+    下标访问 / append / len 一致。
+    """
+
+    def __init__(self, base: Optional[np.ndarray] = None, heap: Optional[np.ndarray] = None,
+                 offsets: Optional[np.ndarray] = None):
+        self._base = base
+        # 通过 memoryview 切片和取偏移，单次访问不经过 numpy 标量 / 视图对象
+        self._heap = memoryview(np.ascontiguousarray(heap)) if heap is not None else None
+        self._offsets = memoryview(np.ascontiguousarray(offsets)) if offsets is not None else None
+        self._base_size = len(base) if base is not None else len(self._offsets) - 1
+        self._extra: List[str] = []
+
+    def __len__(self) -> int:
+        return self._base_size + len(self._extra)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if index >= self._base_size:
+            return self._extra[index - self._base_size]
+        if self._base is not None:
+            return str(self._base[index])
+        return str(self._heap[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, value: str) -> None:
+        self._extra.append(value)
+
+
+class _IdKeys:
+    """
+    内部序号 -> 产品 ID 的定长 unicode 数组，用于按产品 ID 比较和排序
+
+    base 通常是快照中内存映射的 ids，不复制；增量更新追加的产品 ID 保存在按倍数扩容的
+    追加区中，追加的开销与变化的产品数成正比。take 只取出候选产品的 ID。
+    已返回的 Ranking 持有同一对象：追加只写入当前长度之后的位置，扩容时换成新数组，
+    候选序号范围内的取值不变。
+    """
+
+    def __init__(self, base: np.ndarray):
+        self._base = base
+        self._base_size = int(base.size)
+        self._extra = np.zeros(0, dtype=base.dtype)
+        self._extra_size = 0
+
+    def extend(self, values: List[str]) -> None:
+        new = np.array(values, dtype=str)
+        size = self._extra_size + new.size
+        dtype = np.result_type(self._extra.dtype, new.dtype)
+        if size > self._extra.size or dtype != self._extra.dtype:
+            extra = np.zeros(max(size, 2 * self._extra.size, 64), dtype=dtype)
+            extra[:self._extra_size] = self._extra[:self._extra_size]
+            self._extra = extra
+        self._extra[self._extra_size:size] = new
+        self._extra_size = size
+
+    def take(self, ordinals: np.ndarray) -> np.ndarray:
+        """ordinals 对应的产品 ID 数组"""
+        if not self._extra_size:
+            return self._base[ordinals]
+        extra = self._extra
+        in_base = ordinals < self._base_size
+        if in_base.all():
+            return self._base[ordinals]
+        keys = np.empty(ordinals.size, dtype=np.result_type(self._base.dtype, extra.dtype))
+        keys[in_base] = self._base[ordinals[in_base]]
+        keys[~in_base] = extra[ordinals[~in_base] - self._base_size]
+        return keys
+
+
+class _FacetColumn:
+    """
+    属性字段的字典编码
+
+    codes[序号] 为取值编号，values[编号] 为原值，编号 0 表示空值。取值种类远少于
+    产品数，候选集上的筛选只需判断出现过的取值，计数只需对编号做 bincount。
+    codes 只整体替换、values 只追加，排序结果持有的旧引用始终一致。
+    """
+
+    def __init__(self, values=None, codes: Optional[np.ndarray] = None):
+        self.values = values if values is not None else [""]
+        self.codes = codes if codes is not None else np.zeros(0, dtype=np.int32)
+        self._lookup: Optional[Dict[str, int]] = None
+
+    def encode(self, value: str) -> int:
+        if self._lookup is None:
+            self._lookup = {text: code for code, text in enumerate(self.values)}
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._lookup[value] = code
+        return code
+
+    def value(self, ordinal: int) -> str:
+        return self.values[int(self.codes[ordinal])]
+
+
+class _OrdinalMap:
+    """
+    产品 ID -> 内部序号
+
+    快照中的序号不建字典：ids 为定长 unicode 数组，order 为其 argsort，查找时
+    searchsorted 二分定位；之后的增删记录在 overlay / removed 中。只实现索引用到的
+    get / pop / 赋值 / len。
+    """
+
+    def __init__(self, ids: np.ndarray, order: np.ndarray):
+        self._ids = ids
+        self._order = order
+        self._overlay: Dict[str, int] = {}
+        self._removed: Set[str] = set()
+        self._size = int(ids.size)
+
+    def _base_get(self, product_id: str) -> Optional[int]:
+        if product_id in self._removed or not self._ids.size:
+            return None
+        position = int(np.searchsorted(self._ids, product_id, sorter=self._order))
+        if position < self._order.size:
+            ordinal = int(self._order[position])
+            if self._ids[ordinal] == product_id:
+                return ordinal
+        return None
+
+    def get(self, product_id: str, default: Optional[int] = None) -> Optional[int]:
+        ordinal = self._overlay.get(product_id)
+        if ordinal is None:
+            ordinal = self._base_get(product_id)
+        return default if ordinal is None else ordinal
+
+    def pop(self, product_id: str, default: Optional[int] = None) -> Optional[int]:
+        ordinal = self._overlay.pop(product_id, None)
+        if ordinal is None:
+            ordinal = self._base_get(product_id)
+        if ordinal is None:
+            return default
+        # 快照中的旧序号同时失效，之后只看 overlay
+        self._removed.add(product_id)
+        self._size -= 1
+        return ordinal
+
+    def __setitem__(self, product_id: str, ordinal: int) -> None:
+        if self.get(product_id) is None:
+            self._size += 1
+        self._removed.add(product_id)
+        self._overlay[product_id] = ordinal
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class _PostingMap:
+    """
+    词元 -> 倒排表
+
+    快照中的倒排表为 CSR：排好序的词元数组 grams，词元 i 的序号为
+    ordinals[offsets[i]:offsets[i + 1]]，取出的是内存映射上的视图，不复制；
+    增量更新后的倒排表保存在 overlay 中。
+    """
+
+    def __init__(self, grams: np.ndarray, offsets: np.ndarray, ordinals: np.ndarray):
+        self._grams = grams
+        self._offsets = offsets
+        self._ordinals = ordinals
+        self._overlay: Dict[str, np.ndarray] = {}
+
+    def _base_get(self, gram: str) -> Optional[np.ndarray]:
+        position = int(np.searchsorted(self._grams, gram))
+        if position < self._grams.size and self._grams[position] == gram:
+            return self._ordinals[self._offsets[position]:self._offsets[position + 1]]
+        return None
+
+    def get(self, gram: str, default: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        postings = self._overlay.get(gram)
+        if postings is None:
+            postings = self._base_get(gram)
+        return default if postings is None else postings
+
+    def __setitem__(self, gram: str, postings: np.ndarray) -> None:
+        self._overlay[gram] = postings
+
+    def __len__(self) -> int:
+        return int(self._grams.size) + sum(1 for gram in self._overlay if self._base_get(gram) is None)
+
+
+class Ranking:
+    """
+    一次查询的排序结果
+
+    持有候选产品的内部序号和得分，按 (-得分, 产品 ID) 排序；只在取页时对前 k 个
+    做部分排序，不对整个候选集排序。同时持有排序时的属性编码，筛选和筛选维度统计
+    直接在候选集上完成。
+    """
+
+    def __init__(self, ids: List[str], id_keys: _IdKeys, ordinals: np.ndarray, scores: np.ndarray,
+                 facets: Mapping[str, Tuple[np.ndarray, Sequence[str]]]):
+        self._ids = ids
+        self._id_keys = id_keys
+        self._facets = facets
+        self.ordinals = ordinals
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return int(self.ordinals.size)
+
+    def product_ids(self) -> List[str]:
+        ids = self._ids
+        return [ids[ordinal] for ordinal in self.ordinals.tolist()]
+
+    def where(self, keep: np.ndarray) -> "Ranking":
+        """只保留掩码为 True 的候选产品"""
+        return Ranking(self._ids, self._id_keys, self.ordinals[keep], self.scores[keep], self._facets)
+
+    def contains(self, product_ids: Iterable[str]) -> np.ndarray:
+        """候选产品是否在 product_ids 中的掩码"""
+        wanted = np.array(list(product_ids), dtype=str)
+        if not wanted.size:
+            return np.zeros(len(self), dtype=bool)
+        return np.isin(self._id_keys.take(self.ordinals), wanted)
+
+    def match_facet(self, field: str, condition: Callable[[str], bool]) -> np.ndarray:
+        """
+        属性取值满足 condition 的候选产品掩码
+
+        condition 只对候选集中出现过的非空取值各调用一次，与候选集大小无关
+        """
+        codes, values = self._facets[field]
+        candidate_codes = codes[self.ordinals]
+        matched = [code for code in np.unique(candidate_codes).tolist() if code and condition(values[code])]
+        return np.isin(candidate_codes, matched)
+
+    def facet_counts(self, field: str, top_n: int) -> List[Tuple[str, int]]:
+        """候选集在该属性上的取值分布，按数量降序（相同时按取值）取前 top_n 个"""
+        codes, values = self._facets[field]
+        counts = np.bincount(codes[self.ordinals], minlength=1)
+        counts[0] = 0
+        present = np.flatnonzero(counts)
+        if top_n <= 0 or not present.size:
+            return []
+        if top_n < present.size:
+            # 先按第 top_n 大的数量截断，只有截断后的部分（含并列）需要排序
+            threshold = np.partition(counts[present], present.size - top_n)[present.size - top_n]
+            present = present[counts[present] >= threshold]
+        pairs = [(values[code], int(counts[code])) for code in present.tolist()]
+        pairs.sort(key=lambda pair: (-pair[1], pair[0]))
+        return pairs[:top_n]
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[str, float]]:
+        """第 offset 名起的 k 个 (产品 ID, 得分)"""
+        return self._select(self.ordinals, self.scores, offset + k)[offset:]
+
+    def after(self, score: float, product_id: str, k: int) -> List[Tuple[str, float]]:
+        """排在 (score, product_id) 之后的 k 个，用于游标分页"""
+        keep = self.scores < score
+        ties = np.flatnonzero(self.scores == score)
+        if ties.size:
+            keep[ties[self._id_keys.take(self.ordinals[ties]) > product_id]] = True
+        return self._select(self.ordinals[keep], self.scores[keep], k)
+
+    def _select(self, ordinals: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        if k <= 0 or not ordinals.size:
+            return []
+        if k < ordinals.size:
+            # 先按第 k 大的得分截断，只有截断后的部分（含并列）需要完整排序
+            threshold = np.partition(scores, ordinals.size - k)[ordinals.size - k]
+            keep = scores >= threshold
+            ordinals, scores = ordinals[keep], scores[keep]
+        order = np.lexsort((self._id_keys.take(ordinals), -scores))[:k]
+        ids = self._ids
+        return [
+            (ids[ordinal], score)
+            for ordinal, score in zip(ordinals[order].tolist(), scores[order].tolist())
+        ]
+
+
+class ProductSearchIndex:
+    """
+    进程内产品倒排索引
+
+    每个检索字段以标准化后的小写文本建立单字 / 二元组倒排表，倒排表为按内部序号
+    升序排列的 numpy 数组。查询词先按二元组求交集，再对超过两个字符的词做一次子串
+    校验，匹配语义与原先 ilike('%term%') 一致。
+
+    rank() 在同一份倒排表上计算 BM25F 得分：短文本中词频以出现与否计，字段长度
+    归一化系数预先算好，打分只涉及向量运算，不需要逐行调用 fuzzy_match。
+
+    facet_fields 的原值按字典编码保存，供排序结果在候选集上筛选和统计筛选维度。
+    """
+
+    def __init__(self, fields: Sequence[str] = SEARCH_FIELDS, facet_fields: Sequence[str] = FACET_FIELDS):
+        self.fields = tuple(fields)
+        self.facet_fields = tuple(facet_fields)
+        # 每行取值的顺序，检索字段与属性字段重复的列只传一次
+        self.columns = tuple(dict.fromkeys(self.fields + self.facet_fields))
+        self._text_positions = [self.columns.index(field) + 1 for field in self.fields]
+        self._facet_positions = [self.columns.index(field) + 1 for field in self.facet_fields]
+        self.boosts = np.array([FIELD_BOOSTS.get(field, 1.0) for field in self.fields])
+        self._reset()
+        self._lock = threading.RLock()
+        self.ready = False
+        self.built_at: Optional[float] = None
+
+    def _reset(self) -> None:
+        # 内部序号 -> 产品 ID / 各字段标准化文本；更新产品时分配新序号，旧序号标记失效
+        self._ids: List[str] = []
+        self._id_keys = _IdKeys(np.zeros(0, dtype=str))
+        self._texts: List[List[str]] = [[] for _ in self.fields]
+        self._ordinals: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._lengths = np.zeros((len(self.fields), 0), dtype=np.float32)
+        self._postings: List[Dict[str, np.ndarray]] = [{} for _ in self.fields]
+        self._facets: List[_FacetColumn] = [_FacetColumn() for _ in self.facet_fields]
+        self._norms: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def _field_texts(self, row: Sequence) -> Tuple[str, ...]:
+        return tuple(
+            normalize_text(str(row[position])).lower() if row[position] else ""
+            for position in self._text_positions
+        )
+
+    def _facet_values(self, row: Sequence) -> Tuple[str, ...]:
+        return tuple(str(row[position]) if row[position] else "" for position in self._facet_positions)
+
+    def build(self, rows: Iterable[Tuple]) -> None:
+        """
+        全量构建索引
+
+        rows 的每一项为 (id, *self.columns 对应取值)。新索引在局部变量中构建完成后
+        一次性替换，构建期间的查询仍然使用旧索引。
+        """
+        start = time.perf_counter()
+        ids: List[str] = []
+        texts: List[List[str]] = [[] for _ in self.fields]
+        ordinals: Dict[str, int] = {}
+        postings: List[Dict[str, List[int]]] = [{} for _ in self.fields]
+        facets = [_FacetColumn() for _ in self.facet_fields]
+        facet_codes: List[List[int]] = [[] for _ in self.facet_fields]
+        for row in rows:
+            product_id = str(row[0])
+            if product_id in ordinals:
+                continue
+            ordinal = len(ids)
+            field_texts = self._field_texts(row)
+            ids.append(product_id)
+            ordinals[product_id] = ordinal
+            for field_index, text in enumerate(field_texts):
+                texts[field_index].append(text)
+                field_postings = postings[field_index]
+                for gram in _grams(text):
+                    field_postings.setdefault(gram, []).append(ordinal)
+            for column, codes, value in zip(facets, facet_codes, self._facet_values(row)):
+                codes.append(column.encode(value))
+        for column, codes in zip(facets, facet_codes):
+            column.codes = np.array(codes, dtype=np.int32)
+
+        count = len(ids)
+        lengths = np.array(
+            [[len(text) for text in field_texts] for field_texts in texts],
+            dtype=np.float32
+        ).reshape(len(self.fields), count)
+        arrays = [
+            {gram: np.array(ordinal_list, dtype=np.int64) for gram, ordinal_list in field_postings.items()}
+            for field_postings in postings
+        ]
+        id_keys = _IdKeys(np.array(ids, dtype=str))
+
+        with self._lock:
+            self._ids = ids
+            self._id_keys = id_keys
+            self._texts = texts
+            self._ordinals = ordinals
+            self._alive = np.ones(count, dtype=bool)
+            self._lengths = lengths
+            self._postings = arrays
+            self._facets = facets
+            self._norms = None
+            self.ready = True
+            self.built_at = time.time()
+
+        logger.info(
+            f"产品搜索索引构建完成: {count} 个产品, {sum(len(p) for p in arrays)} 个词元, "
+            f"耗时 {time.perf_counter() - start:.2f}s"
+        )
+
+    def export_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        导出为扁平数组，供 catalog_snapshot 写入快照文件
+
+        只导出仍然有效的产品，序号重新连续编号；文本和属性取值字典为 utf-8 字节堆 + 偏移，
+        倒排表为按词元排序的 CSR，序号和属性编码使用 int32。
+        """
+        with self._lock:
+            live = np.flatnonzero(self._alive)
+            remap = np.full(len(self._ids), -1, dtype=np.int64)
+            remap[live] = np.arange(live.size)
+            ids = [self._ids[ordinal] for ordinal in live.tolist()]
+            arrays: Dict[str, np.ndarray] = {
+                "ids": np.array(ids, dtype=str),
+                "lengths": np.ascontiguousarray(self._lengths[:, live]),
+            }
+            arrays["id_order"] = np.argsort(arrays["ids"], kind="stable")
+            for field_index, field in enumerate(self.fields):
+                texts = self._texts[field_index]
+                heap, offsets = _encode_strings([texts[ordinal] for ordinal in live.tolist()])
+                arrays[f"{field}.text_heap"] = heap
+                arrays[f"{field}.text_offsets"] = offsets
+
+                field_postings = self._postings[field_index]
+                grams = sorted(field_postings)
+                lists = []
+                for gram in grams:
+                    ordinals = remap[field_postings[gram]]
+                    lists.append(ordinals[ordinals >= 0].astype(np.int32))
+                keep = [i for i, ordinals in enumerate(lists) if ordinals.size]
+                posting_offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+                np.cumsum(np.array([lists[i].size for i in keep], dtype=np.int64), out=posting_offsets[1:])
+                arrays[f"{field}.grams"] = np.array([grams[i] for i in keep], dtype=str)
+                arrays[f"{field}.posting_offsets"] = posting_offsets
+                arrays[f"{field}.postings"] = (
+                    np.concatenate([lists[i] for i in keep]) if keep else np.zeros(0, dtype=np.int32)
+                )
+            for field, column in zip(self.facet_fields, self._facets):
+                heap, offsets = _encode_strings(list(column.values))
+                arrays[f"{field}.facet_heap"] = heap
+                arrays[f"{field}.facet_offsets"] = offsets
+                arrays[f"{field}.facet_codes"] = np.ascontiguousarray(column.codes[live], dtype=np.int32)
+            return arrays
+
+    def attach_arrays(self, arrays: Mapping[str, np.ndarray]) -> None:
+        """
+        直接使用 export_arrays 格式的数组（通常是只读内存映射）作为索引
+
+        不复制、不解码，启动耗时与目录大小基本无关；多个 worker 映射同一份文件时
+        共享操作系统的页缓存。之后的增量更新照常进行，变化部分保存在进程内存中。
+        """
+        # 去掉 np.memmap 子类包装，切片时不再经过 memmap 的视图处理，底层仍是同一份映射
+        arrays = {key: np.asarray(array) for key, array in arrays.items()}
+        ids = arrays["ids"]
+        count = int(ids.size)
+        postings = []
+        for field in self.fields:
+            postings.append(_PostingMap(
+                arrays[f"{field}.grams"], arrays[f"{field}.posting_offsets"], arrays[f"{field}.postings"]
+            ))
+        with self._lock:
+            self._ids = _StringArray(base=ids)
+            self._id_keys = _IdKeys(ids)
+            self._texts = [
+                _StringArray(heap=arrays[f"{field}.text_heap"], offsets=arrays[f"{field}.text_offsets"])
+                for field in self.fields
+            ]
+            self._ordinals = _OrdinalMap(ids, arrays["id_order"])
+            self._alive = np.ones(count, dtype=bool)
+            self._lengths = arrays["lengths"]
+            self._postings = postings
+            self._facets = [
+                _FacetColumn(
+                    values=_StringArray(heap=arrays[f"{field}.facet_heap"], offsets=arrays[f"{field}.facet_offsets"]),
+                    codes=arrays[f"{field}.facet_codes"]
+                )
+                for field in self.facet_fields
+            ]
+            self._norms = None
+            self.ready = True
+            self.built_at = time.time()
+        logger.info(f"产品搜索索引已从快照映射: {count} 个产品")
+
+    def upsert(self, product_id: str, values: Sequence[Optional[str]]) -> None:
+        """新增或更新单个产品（values 按 self.columns 排列；追加新序号，倒排表保持有序）"""
+        self.upsert_many([(product_id, *values)])
+
+    def upsert_many(self, rows: Iterable[Tuple]) -> None:
+        """
+        批量新增或更新产品
+
+        rows 的格式与 build 相同。每个产品追加新序号、旧序号标记失效；新序号按词元
+        汇总后每个倒排表只拼接一次，开销与变化的产品数成正比，不随索引大小增长。
+        检索字段和属性字段都没有变化的产品（例如只改了价格）直接跳过。
+        """
+        # 同一批内重复的产品以最后一行为准
+        prepared = {str(row[0]): (self._field_texts(row), self._facet_values(row)) for row in rows}.items()
+        with self._lock:
+            additions: List[Dict[str, List[int]]] = [{} for _ in self.fields]
+            facet_codes: List[List[int]] = [[] for _ in self.facet_fields]
+            lengths = []
+            for product_id, (field_texts, facet_values) in prepared:
+                current = self._ordinals.get(product_id)
+                if current is not None and all(
+                    texts[current] == text for texts, text in zip(self._texts, field_texts)
+                ) and all(
+                    column.value(current) == value for column, value in zip(self._facets, facet_values)
+                ):
+                    continue
+                self._remove_locked(product_id)
+                ordinal = len(self._ids)
+                self._ids.append(product_id)
+                self._ordinals[product_id] = ordinal
+                lengths.append([len(text) for text in field_texts])
+                for field_index, text in enumerate(field_texts):
+                    self._texts[field_index].append(text)
+                    field_additions = additions[field_index]
+                    for gram in _grams(text):
+                        field_additions.setdefault(gram, []).append(ordinal)
+                for column, codes, value in zip(self._facets, facet_codes, facet_values):
+                    codes.append(column.encode(value))
+
+            if not lengths:
+                return
+            self._id_keys.extend([self._ids[ordinal] for ordinal in range(len(self._ids) - len(lengths), len(self._ids))])
+            self._alive = np.append(self._alive, np.ones(len(lengths), dtype=bool))
+            for column, codes in zip(self._facets, facet_codes):
+                column.codes = np.append(column.codes, np.array(codes, dtype=np.int32))
+            self._lengths = np.append(self._lengths, np.array(lengths, dtype=np.float32).T, axis=1)
+            for field_postings, field_additions in zip(self._postings, additions):
+                for gram, ordinal_list in field_additions.items():
+                    new = np.array(ordinal_list, dtype=np.int64)
+                    existing = field_postings.get(gram)
+                    field_postings[gram] = new if existing is None else np.concatenate([existing, new])
+            self._norms = None
+
+    def apply_changes(self, rows: Iterable[Tuple], removed: Iterable[str]) -> None:
+        """应用一批目录变更：rows 为新增 / 修改后的产品（格式同 build），removed 为已删除的产品 ID"""
+        with self._lock:
+            for product_id in removed:
+                self._remove_locked(str(product_id))
+            self.upsert_many(rows)
+
+    def remove(self, product_id: str) -> None:
+        """从索引中删除单个产品"""
+        with self._lock:
+            self._remove_locked(str(product_id))
+
+    def _remove_locked(self, product_id: str) -> None:
+        # 只标记失效，倒排表中的旧序号在下次全量构建时清除
+        ordinal = self._ordinals.pop(product_id, None)
+        if ordinal is not None:
+            self._alive[ordinal] = False
+            self._norms = None
+
+    def _field_norms(self) -> np.ndarray:
+        """各字段的 BM25 长度归一化系数（tf=1 时的词频项），索引变化后重新计算"""
+        if self._norms is None:
+            alive_lengths = self._lengths[:, self._alive]
+            average = alive_lengths.mean(axis=1) if alive_lengths.size else np.ones(len(self.fields))
+            average = np.where(average > 0, average, 1.0)[:, None]
+            self._norms = (BM25_K1 + 1) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * self._lengths / average))
+        return self._norms
+
+    def _field_candidates(self, field_index: int, term: str) -> np.ndarray:
+        """该字段包含 term 的内部序号（升序，可能包含已失效的序号）"""
+        postings = self._postings[field_index]
+        keys = [term] if len(term) == 1 else list(dict.fromkeys(term[i:i + 2] for i in range(len(term) - 1)))
+        arrays = []
+        for key in keys:
+            ordinals = postings.get(key)
+            if ordinals is None:
+                return _EMPTY
+            arrays.append(ordinals)
+        arrays.sort(key=len)
+
+        candidates = arrays[0]
+        for ordinals in arrays[1:]:
+            positions = np.searchsorted(ordinals, candidates)
+            positions[positions >= ordinals.size] = 0
+            candidates = candidates[ordinals[positions] == candidates]
+            if not candidates.size:
+                return _EMPTY
+
+        if len(term) > 2:
+            texts = self._texts[field_index]
+            verified = np.array([term in texts[ordinal] for ordinal in candidates.tolist()], dtype=bool)
+            candidates = candidates[verified]
+        return candidates
+
+    def _term_candidates(self, term: str) -> Tuple[List[np.ndarray], np.ndarray]:
+        """返回 (各字段命中的序号, 任一字段命中且仍有效的序号)"""
+        per_field = [self._field_candidates(i, term) for i in range(len(self.fields))]
+        hits = [ordinals for ordinals in per_field if ordinals.size]
+        if not hits:
+            return per_field, _EMPTY
+        if len(hits) == 1:
+            matched = hits[0]
+        else:
+            mask = np.zeros(len(self._ids), dtype=bool)
+            for ordinals in hits:
+                mask[ordinals] = True
+            matched = np.flatnonzero(mask)
+        return per_field, matched[self._alive[matched]]
+
+    def lookup(self, term: str) -> Set[str]:
+        """返回任一检索字段包含该词的产品 ID 集合"""
+        term = term.lower()
+        if not term:
+            return set()
+        with self._lock:
+            _, matched = self._term_candidates(term)
+            ids = self._ids
+            return {ids[ordinal] for ordinal in matched.tolist()}
+
+    def match_any(self, terms: Iterable[str]) -> Set[str]:
+        """任一词命中即返回（并集）"""
+        result: Set[str] = set()
+        for term in terms:
+            result |= self.lookup(term)
+        return result
+
+    def match_all(self, terms: Iterable[str]) -> Set[str]:
+        """所有词都命中才返回（交集）"""
+        result: Optional[Set[str]] = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            ids = self.lookup(term)
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result or set()
+
+    def rank(self, terms: Iterable[str], extra_scores: Optional[Mapping[str, float]] = None) -> Ranking:
+        """
+        按 BM25F 给命中任一词的产品打分
+
+        每个词的得分为 idf × Σ(字段权重 × 字段长度归一化系数)，多词查询整体出现在
+        名称中时再加一次短语得分。extra_scores 用于并入索引之外的命中（例如拼音前缀），
+        按产品 ID 直接累加。
+        """
+        terms = list(dict.fromkeys(term.lower() for term in terms if term and term.strip()))
+        with self._lock:
+            count = len(self._ids)
+            scores = np.zeros(count, dtype=np.float64)
+            doc_count = len(self._ordinals)
+            if doc_count:
+                norms = self._field_norms()
+                for term in terms:
+                    per_field, matched = self._term_candidates(term)
+                    if not matched.size:
+                        continue
+                    idf = _idf(doc_count, matched.size)
+                    for field_index, ordinals in enumerate(per_field):
+                        if ordinals.size:
+                            scores[ordinals] += idf * self.boosts[field_index] * norms[field_index, ordinals]
+
+                if len(terms) > 1 and "name" in self.fields:
+                    name_index = self.fields.index("name")
+                    phrase = ''.join(terms)
+                    ordinals = self._field_candidates(name_index, phrase)
+                    ordinals = ordinals[self._alive[ordinals]]
+                    if ordinals.size:
+                        idf = _idf(doc_count, ordinals.size)
+                        scores[ordinals] += PHRASE_BOOST * idf * self.boosts[name_index] * norms[name_index, ordinals]
+
+                for product_id, score in (extra_scores or {}).items():
+                    ordinal = self._ordinals.get(str(product_id))
+                    if ordinal is not None:
+                        scores[ordinal] += score
+
+                scores[~self._alive] = 0
+            ordinals = np.flatnonzero(scores > 0)
+            facets = {
+                field: (column.codes, column.values) for field, column in zip(self.facet_fields, self._facets)
+            }
+            return Ranking(self._ids, self._id_keys, ordinals, scores[ordinals], facets)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "products": len(self._ordinals),
+            "slots": len(self._ids),
+            "grams": sum(len(postings) for postings in self._postings),
+        }
+
+
+# 全局索引实例
+search_index = ProductSearchIndex()
@@ -0,0 +1,43 @@
+from typing import Dict, Iterable, List, Optional
+from collections import Counter
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from models.product import ProductSpecValue
+from services.spec_parser import SpecRange
+
+# 等值查询的相对容差，吸收单位换算后的浮点误差
+RELATIVE_TOLERANCE = 1e-6
+ABSOLUTE_TOLERANCE = 1e-9
+
+
+def spec_condition(spec: SpecRange):
+    """单个数值条件对应的 WHERE 子句，走 (quantity, value) 索引的范围扫描"""
+    tolerance = max(abs(spec.low), abs(spec.high)) * RELATIVE_TOLERANCE + ABSOLUTE_TOLERANCE
+    return and_(
+        ProductSpecValue.quantity == spec.quantity,
+        ProductSpecValue.value.between(spec.low - tolerance, spec.high + tolerance)
+    )
+
+
+def spec_product_ids(specs: Iterable[SpecRange]):
+    """满足任一数值条件的产品 ID 子查询，用于 Product.id.in_(...)"""
+    conditions = [spec_condition(spec) for spec in specs]
+    return select(ProductSpecValue.product_id).where(or_(*conditions)).distinct()
+
+
+def match_spec_ids(db: Session, specs: List[SpecRange], limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    按数值条件查找产品
+
+    返回 产品 ID -> 命中的条件数，例如 “DN25 1.6MPa” 两个条件都满足的产品计 2。
+    limit 为每个条件最多取的产品数，只用于相关度加分；用作筛选时不设上限
+    """
+    hits: Counter = Counter()
+    for spec in specs:
+        rows = db.query(ProductSpecValue.product_id).filter(spec_condition(spec)).distinct()
+        if limit is not None:
+            rows = rows.limit(limit)
+        hits.update(row.product_id for row in rows)
+    return dict(hits)
@@ -0,0 +1,154 @@
+from typing import List, NamedTuple, Optional
+import re
+
+from services.text_normalizer import CompiledNormalizer, mapping_listeners, unit_mapping
+
+
+class SpecValue(NamedTuple):
+    """从规格文本中解析出的一个数值，已换算为 SI 单位"""
+    quantity: str   # 物理量：length / pressure / power / mass / force / volume / angle / nominal_size
+    value: float
+    unit: str       # SI 单位：m / Pa / W / kg / N / m³ / ° / DN
+
+
+class SpecRange(NamedTuple):
+    """查询中的数值条件，等值查询时 low == high"""
+    quantity: str
+    low: float
+    high: float
+    unit: str
+
+
+# unit_mapping 标准化后的单位（小写）-> (物理量, SI 单位, 换算系数)
+UNIT_CONVERSIONS = {
+    'mm': ('length', 'm', 0.001),
+    'cm': ('length', 'm', 0.01),
+    'm': ('length', 'm', 1.0),
+    'inch': ('length', 'm', 0.0254),
+    'mpa': ('pressure', 'Pa', 1e6),
+    'kpa': ('pressure', 'Pa', 1e3),
+    'pa': ('pressure', 'Pa', 1.0),
+    'kw': ('power', 'W', 1e3),
+    'w': ('power', 'W', 1.0),
+    'kg': ('mass', 'kg', 1.0),
+    'g': ('mass', 'kg', 1e-3),
+    'kn': ('force', 'N', 1e3),
+    'n': ('force', 'N', 1.0),
+    'm³': ('volume', 'm³', 1.0),
+    'l': ('volume', 'm³', 1e-3),
+    '°': ('angle', '°', 1.0),
+}
+
+# 英制管径（寸）与公称通径 DN 的对应关系：1 寸管即 DN25
+INCH_TO_DN = {
+    0.5: 15, 0.75: 20, 1.0: 25, 1.25: 32, 1.5: 40,
+    2.0: 50, 2.5: 65, 3.0: 80, 4.0: 100, 5.0: 125, 6.0: 150,
+}
+
+# PN 公称压力以 bar 计，PN16 即 1.6MPa
+PN_TO_PA = 1e5
+
+_NUMBER = r'(\d+(?:\.\d+)?)(?:\s*/\s*(\d+(?:\.\d+)?))?'
+_UNITS = '|'.join(re.escape(unit) for unit in sorted(UNIT_CONVERSIONS, key=len, reverse=True))
+
+QUANTITY_PATTERN = re.compile(rf'(?<![\d.]){_NUMBER}\s*({_UNITS})(?![a-z])', re.IGNORECASE)
+RANGE_PATTERN = re.compile(
+    r'(?<![\d.])(\d+(?:\.\d+)?)\s*[-~～至到]\s*(\d+(?:\.\d+)?)\s*' + rf'({_UNITS})(?![a-z])',
+    re.IGNORECASE
+)
+NOMINAL_PATTERN = re.compile(r'(?<![a-z])(dn|pn)\s*(\d+(?:\.\d+)?)', re.IGNORECASE)
+BARE_NUMBER_PATTERN = re.compile(r'\s*' + _NUMBER + r'\s*')
+# 带分数，例如 1-1/2寸（一寸半）
+MIXED_FRACTION_PATTERN = re.compile(r'(?<![\d.])(\d+)\s*-\s*(\d+)\s*/\s*(\d+)')
+
+# 只做单位替换的标准化器（不做缩写 / 同音字替换），与 unit_mapping 保持同步
+_unit_normalizer = CompiledNormalizer({}, unit_mapping, {})
+mapping_listeners.append(lambda: _unit_normalizer.rebuild({}, unit_mapping, {}))
+
+
+def _prepare(text: str) -> str:
+    """单位标准化，并把带分数改写成小数"""
+    normalized = _unit_normalizer.normalize(text)
+    return MIXED_FRACTION_PATTERN.sub(
+        lambda match: f"{int(match[1]) + int(match[2]) / int(match[3]):g}" if int(match[3]) else match[0],
+        normalized
+    )
+
+
+def _canonical(value: float) -> float:
+    """消除换算带来的浮点误差，例如 1.6 * 1e6"""
+    return float(f"{value:.12g}")
+
+
+def _number(whole: str, denominator: Optional[str]) -> Optional[float]:
+    value = float(whole)
+    if denominator is not None:
+        if not float(denominator):
+            return None
+        value /= float(denominator)
+    return value
+
+
+def _convert(value: float, unit: str) -> List[SpecValue]:
+    quantity, si_unit, factor = UNIT_CONVERSIONS[unit.lower()]
+    specs = [SpecValue(quantity, _canonical(value * factor), si_unit)]
+    if unit.lower() == 'inch' and value in INCH_TO_DN:
+        specs.append(SpecValue('nominal_size', float(INCH_TO_DN[value]), 'DN'))
+    return specs
+
+
+def parse_specs(text: Optional[str], default_unit: Optional[str] = None) -> List[SpecValue]:
+    """
+    解析规格文本中的数值
+
+    先用 unit_mapping 把中文单位替换为标准单位（寸 -> inch、兆帕 -> MPa），再提取
+    “数值 + 单位”并换算为 SI 单位；DN / PN 按公称尺寸 / 公称压力解析，寸同时给出
+    对应的 DN。default_unit 用于只有一个裸数值的字段，例如 pressure 列的 "1.6"。
+    """
+    if not text:
+        return []
+    normalized = _prepare(str(text))
+    specs: List[SpecValue] = []
+
+    for prefix, number in NOMINAL_PATTERN.findall(normalized):
+        if prefix.lower() == 'dn':
+            specs.append(SpecValue('nominal_size', _canonical(float(number)), 'DN'))
+        else:
+            specs.append(SpecValue('pressure', _canonical(float(number) * PN_TO_PA), 'Pa'))
+
+    for whole, denominator, unit in QUANTITY_PATTERN.findall(normalized):
+        value = _number(whole, denominator or None)
+        if value is not None:
+            specs.extend(_convert(value, unit))
+
+    if not specs and default_unit:
+        match = BARE_NUMBER_PATTERN.fullmatch(normalized)
+        if match:
+            value = _number(match[1], match[2])
+            if value is not None:
+                specs.extend(_convert(value, default_unit))
+
+    return list(dict.fromkeys(specs))
+
+
+def parse_spec_ranges(text: Optional[str]) -> List[SpecRange]:
+    """
+    解析查询 / 筛选值中的数值条件
+
+    “1.0-1.6MPa”“20~32mm”解析为区间，其余数值按等值条件处理
+    """
+    if not text:
+        return []
+    normalized = _prepare(str(text))
+    ranges: List[SpecRange] = []
+    for low, high, unit in RANGE_PATTERN.findall(normalized):
+        (low_spec, *_), (high_spec, *_) = _convert(float(low), unit), _convert(float(high), unit)
+        ranges.append(SpecRange(
+            low_spec.quantity,
+            min(low_spec.value, high_spec.value),
+            max(low_spec.value, high_spec.value),
+            low_spec.unit
+        ))
+    remainder = RANGE_PATTERN.sub(' ', normalized)
+    ranges.extend(SpecRange(spec.quantity, spec.value, spec.value, spec.unit) for spec in parse_specs(remainder))
+    return list(dict.fromkeys(ranges))
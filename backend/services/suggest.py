@@ -0,0 +1,314 @@
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+import bisect
+import logging
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.product import Product, compute_search_columns, on_catalog_write
+from services.cache import create_cache
+from services.text_normalizer import mapping_listeners, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# 参与补全的字段：类型 -> 产品字段，类型同时作为返回结果的 type
+SUGGEST_FIELDS = (
+    ("brand", "brand"),
+    ("product_name", "product_name"),
+    ("name", "name"),
+)
+
+# 纠错只对品牌生效：品牌数量少、拼错代价高
+TYPO_KINDS = ("brand",)
+
+# 补全键的最大长度，更长的输入按前缀截断后匹配
+MAX_KEY_LENGTH = 32
+
+# 首次取候选时按 limit 的倍数多取，抵消同一词条多个键（原文 / 拼音 / 首字母）重复命中
+FETCH_FACTOR = 4
+
+# 范围之后的最大码位，prefix + _MAX_CHAR 是所有以 prefix 开头的键的上界
+_MAX_CHAR = "\U0010ffff"
+
+
+class Suggestion(NamedTuple):
+    text: str
+    kind: str
+    count: int
+    corrected: bool = False
+
+
+class _IndexState(NamedTuple):
+    """一次构建的全部数据，整体替换，查询期间不会看到新旧混合的状态"""
+    keys: List[str]                        # 排序后的匹配键
+    key_ranks: np.ndarray                  # 每个键所属词条的排名
+    terms: List[Suggestion]                # 按排名排列的词条
+    typo_index: Dict[str, Set[int]]        # 删除变体 -> 品牌词条排名
+    typo_keys: Dict[int, Tuple[str, ...]]  # 品牌词条排名 -> 匹配键
+
+
+def _compact(text: Optional[str]) -> str:
+    """去掉空白并转小写，截断到 MAX_KEY_LENGTH"""
+    if not text:
+        return ""
+    return ''.join(text.split()).lower()[:MAX_KEY_LENGTH]
+
+
+def _max_edits(prefix: str) -> int:
+    """允许的编辑距离：汉字信息量大，两个字起即允许 1 处错误；拼音 / 字母要更长才放宽"""
+    if prefix.isascii():
+        return 0 if len(prefix) < 4 else 1 if len(prefix) < 8 else 2
+    return 0 if len(prefix) < 2 else 1
+
+
+def _deletes(text: str, distance: int) -> Set[str]:
+    """删除至多 distance 个字符得到的所有变体（含原文）"""
+    variants = {text}
+    frontier = {text}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+
+def prefix_distance(prefix: str, key: str, bound: int) -> Optional[int]:
+    """
+    prefix 与 key 的任一前缀之间的最小编辑距离，超过 bound 时返回 None
+
+    即 prefix 完全消耗、key 只消耗一部分时动态规划最后一行的最小值；相邻字符互换
+    （lainsu / liansu）按一次编辑计算
+    """
+    before: List[int] = []
+    previous = list(range(len(key) + 1))
+    for i, char in enumerate(prefix, 1):
+        current = [i]
+        for j, key_char in enumerate(key, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char != key_char)
+            )
+            if i > 1 and j > 1 and char == key[j - 2] and prefix[i - 2] == key_char:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > bound:
+            return None
+        before, previous = previous, current
+    distance = min(previous)
+    return distance if distance <= bound else None
+
+
+class SuggestIndex:
+    """
+    搜索框自动补全索引
+
+    词条为品牌 / 品名 / 产品名称的去重取值，每个词条登记原文、标准化文本（同音字和
+    缩写已折叠）、全拼、首字母四个键。所有键排序后保存在一个列表里，前缀查询用二分
+    定位键区间，再用 argpartition 在区间内取排名最高的 k 个词条，不需要遍历词条。
+    品牌另建删除变体索引，支持有界编辑距离纠错。
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self._lock = threading.Lock()
+        self._state = _IndexState([], np.zeros(0, dtype=np.int64), [], {}, {})
+        self.cache = create_cache("suggestions", max_entries=cache_size, ttl=None)
+        self.ready = False
+        self.stale = False
+        self.built_at: Optional[float] = None
+        self._refreshing = False
+
+    def __len__(self) -> int:
+        return len(self._state.terms)
+
+    def build(self, entries: Iterable[Tuple[str, str, int, Sequence[str]]]) -> None:
+        """
+        构建索引
+
+        entries 的每一项为 (词条, 类型, 产品数, 匹配键)。词条按产品数降序、长度升序
+        排名，排名即区间内取前 k 个时比较的值。
+        """
+        start = time.perf_counter()
+        merged: Dict[Tuple[str, str], List] = {}
+        for text, kind, count, keys in entries:
+            if not text:
+                continue
+            entry = merged.setdefault((text, kind), [0, set()])
+            entry[0] += count
+            entry[1].update(key for key in map(_compact, keys) if key)
+
+        ordered = sorted(merged.items(), key=lambda item: (-item[1][0], len(item[0][0]), item[0][0]))
+        terms = [Suggestion(text, kind, count) for (text, kind), (count, _) in ordered]
+
+        pairs = sorted((key, rank) for rank, (_, (_, keys)) in enumerate(ordered) for key in keys)
+        keys = [key for key, _ in pairs]
+        key_ranks = np.fromiter((rank for _, rank in pairs), dtype=np.int64, count=len(pairs))
+
+        typo_index: Dict[str, Set[int]] = {}
+        typo_keys: Dict[int, Tuple[str, ...]] = {}
+        for rank, ((_, kind), (_, term_keys)) in enumerate(ordered):
+            if kind not in TYPO_KINDS:
+                continue
+            typo_keys[rank] = tuple(term_keys)
+            for key in term_keys:
+                # 键的每个前缀删除至多 1 个字符登记一次，查询侧再删除至多 1 个字符，
+                # 两侧合计覆盖编辑距离 2 以内的大多数情况，最终由 prefix_distance 校验
+                for length in range(1, len(key) + 1):
+                    for variant in _deletes(key[:length], 1):
+                        typo_index.setdefault(variant, set()).add(rank)
+
+        with self._lock:
+            self._state = _IndexState(keys, key_ranks, terms, typo_index, typo_keys)
+            self.ready = True
+            self.built_at = time.time()
+        self.cache.clear()
+
+        logger.info(
+            f"搜索建议索引构建完成: {len(terms)} 个词条, {len(keys)} 个键, "
+            f"耗时 {time.perf_counter() - start:.2f}s"
+        )
+
+    def load(self, db: Session) -> None:
+        """从 product_info 的源字段和拼音 / 首字母 / 标准化影子列构建"""
+        entries = []
+        for kind, field in SUGGEST_FIELDS:
+            column = getattr(Product, field)
+            shadow = [getattr(Product, f"{field}_{suffix}") for suffix in ("pinyin", "initials", "normalized")]
+            rows = (
+                db.query(column, *shadow, func.count())
+                .filter(column.isnot(None))
+                .group_by(column, *shadow)
+            )
+            for value, pinyin, initials, normalized, count in rows:
+                value = str(value)
+                if pinyin is None or normalized is None:
+                    # 影子列尚未回填时现场计算
+                    columns = compute_search_columns({field: value})
+                    pinyin = columns[f"{field}_pinyin"]
+                    initials = columns[f"{field}_initials"]
+                    normalized = columns[f"{field}_normalized"]
+                entries.append((value, kind, count, (value, normalized, pinyin, initials)))
+        self.build(entries)
+
+    def invalidate(self) -> None:
+        """产品数据变化后标记过期，下次请求时在后台重建，重建完成前继续使用旧索引"""
+        self.stale = True
+
+    def refresh_in_background(self, session_factory: Callable[[], Session]) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            # 在读取数据之前清除标记，重建期间发生的写入会再次触发重建
+            self.stale = False
+
+        def refresh():
+            db = session_factory()
+            try:
+                self.load(db)
+            except Exception as e:
+                logger.error(f"重建搜索建议索引失败: {str(e)}")
+            finally:
+                db.close()
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh, name="suggest-refresh", daemon=True).start()
+
+    @staticmethod
+    def _prefix_ranks(state: _IndexState, prefix: str, limit: int) -> List[int]:
+        """以 prefix 开头的键所属词条中排名最高的 limit 个"""
+        low = bisect.bisect_left(state.keys, prefix)
+        high = bisect.bisect_left(state.keys, prefix + _MAX_CHAR, low)
+        ranks = state.key_ranks[low:high]
+        fetch = limit * FETCH_FACTOR
+        while True:
+            if ranks.size > fetch:
+                candidates = np.unique(ranks[np.argpartition(ranks, fetch)[:fetch]])
+            else:
+                candidates = np.unique(ranks)
+            if candidates.size >= limit or ranks.size <= fetch:
+                return candidates[:limit].tolist()
+            fetch *= FETCH_FACTOR
+
+    @staticmethod
+    def _corrections(state: _IndexState, prefix: str, exclude: Set[int], limit: int) -> List[int]:
+        """品牌纠错：删除变体召回候选，再用有界编辑距离校验"""
+        bound = _max_edits(prefix)
+        if not bound:
+            return []
+        candidates: Set[int] = set()
+        for variant in _deletes(prefix, 1):
+            candidates |= state.typo_index.get(variant, set())
+        # key 中超过 len(prefix) + bound 的部分不可能参与最优对齐，截断后再算；
+        # 拼音输入只和拼音 / 首字母键比较，汉字输入只和汉字键比较
+        width = len(prefix) + bound
+        ascii_prefix = prefix.isascii()
+        # 精确前缀命中已在 exclude 中，纠错结果的距离至少为 1；按排名依次校验，
+        # 凑满 limit 个距离为 1 的结果即可停止
+        scored = []
+        closest = 0
+        for rank in sorted(candidates - exclude):
+            distances = [
+                prefix_distance(prefix, key[:width], bound)
+                for key in state.typo_keys.get(rank, ())
+                if key.isascii() == ascii_prefix
+            ]
+            distances = [distance for distance in distances if distance is not None]
+            if distances:
+                scored.append((min(distances), rank))
+                closest += min(distances) <= 1
+                if closest >= limit:
+                    break
+        scored.sort()
+        return [rank for _, rank in scored[:limit]]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """
+        返回补全建议
+
+        原文与标准化后的输入都做前缀匹配（联塑 / 连塑、pp-r / PPR 互相命中），
+        结果不足 limit 个时再补充纠错得到的品牌
+        """
+        queries = list(dict.fromkeys(
+            query for query in (_compact(prefix), _compact(normalize_text(prefix))) if query
+        ))
+        if not queries:
+            return []
+        cache_key = (tuple(queries), limit)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        state = self._state
+        ranks: List[int] = []
+        for query in queries:
+            ranks.extend(self._prefix_ranks(state, query, limit))
+        ranks = sorted(set(ranks))[:limit]
+        suggestions = [state.terms[rank] for rank in ranks]
+
+        if len(suggestions) < limit:
+            seen = set(ranks)
+            for query in queries:
+                for rank in self._corrections(state, query, seen, limit - len(suggestions)):
+                    seen.add(rank)
+                    suggestions.append(state.terms[rank]._replace(corrected=True))
+
+        self.cache.set(cache_key, suggestions)
+        return suggestions
+
+    def stats(self) -> Dict[str, int]:
+        state = self._state
+        return {
+            "terms": len(state.terms),
+            "keys": len(state.keys),
+            "typo_variants": len(state.typo_index),
+        }
+
+
+# 全局补全索引；产品数据或映射表变化后标记过期
+suggest_index = SuggestIndex()
+on_catalog_write(suggest_index.invalidate)
+mapping_listeners.append(suggest_index.invalidate)
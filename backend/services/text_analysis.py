@@ -0,0 +1,105 @@
+from typing import NamedTuple, Tuple
+import os
+import re
+
+from pypinyin import lazy_pinyin
+
+from services.cache import LRUCache, cache_registry
+from services.text_normalizer import normalize_text, tokenize, mapping_listeners
+
+NUMBER_PATTERN = re.compile(r'\d+\.?\d*')
+UNIT_PATTERN = re.compile(r'[a-zA-Z°]+')
+
+# 文本分析缓存的最大条目数
+TEXT_ANALYSIS_CACHE_SIZE = int(os.getenv('TEXT_ANALYSIS_CACHE_SIZE', '50000'))
+
+
+class TextAnalysis(NamedTuple):
+    """单个字符串的预计算分析结果"""
+    text: str
+    normalized: str               # normalize_text(text.lower())
+    pinyin: str                   # 全拼
+    initials: str                 # 拼音首字母
+    tokens: Tuple[str, ...]       # 标准化后的小写分词结果
+    numbers: Tuple[float, ...]    # 文本中出现的数值
+    units: Tuple[str, ...]        # 文本中出现的字母 / 单位串
+
+
+def analyze(text: str) -> TextAnalysis:
+    """对字符串做一次完整分析（不经过缓存）"""
+    syllables = lazy_pinyin(text)
+    return TextAnalysis(
+        text=text,
+        normalized=normalize_text(text.lower()),
+        pinyin=''.join(syllables),
+        initials=''.join(p[0] for p in syllables if p),
+        tokens=tuple(tokenize(text)),
+        numbers=tuple(float(n) for n in NUMBER_PATTERN.findall(text)),
+        units=tuple(UNIT_PATTERN.findall(text)),
+    )
+
+
+class TextAnalysisCache(LRUCache):
+    """
+    有界 LRU 文本分析缓存
+
+    产品文本和热门查询高度重复，同一字符串的拼音、分词、数值提取只计算一次。
+    分析结果只依赖映射表，因此不设过期时间，映射表变化时整体清空。
+    """
+
+    def __init__(self, max_entries: int = TEXT_ANALYSIS_CACHE_SIZE):
+        super().__init__("text_analysis", max_entries=max_entries, ttl=None)
+
+    def analyze(self, text: str) -> TextAnalysis:
+        # 分析在锁外进行，避免 jieba / pypinyin 阻塞其他线程的命中
+        return self.get_or_compute(text, lambda: analyze(text))
+
+
+# 全局文本分析缓存
+text_analysis_cache = TextAnalysisCache()
+cache_registry[text_analysis_cache.name] = text_analysis_cache
+mapping_listeners.append(text_analysis_cache.clear)
+
+
+def analyze_text(text: str) -> TextAnalysis:
+    """获取字符串的分析结果（经过缓存）"""
+    return text_analysis_cache.analyze(text)
+
+
+def fuzzy_match_analysis(text_info: TextAnalysis, query_info: TextAnalysis) -> bool:
+    """
+    基于预计算分析结果的智能模糊匹配
+    """
+    # 1. 完全匹配
+    if query_info.normalized in text_info.normalized:
+        return True
+
+    # 2. 拼音匹配
+    if query_info.pinyin in text_info.pinyin:
+        return True
+
+    # 3. 拼音首字母匹配
+    if query_info.initials in text_info.initials:
+        return True
+
+    # 4. 数字和单位的智能匹配
+    if text_info.numbers and query_info.numbers:
+        for t_num in text_info.numbers:
+            for q_num in query_info.numbers:
+                if abs(t_num - q_num) < 0.01:  # 允许小数点误差
+                    # 如果数值匹配，检查单位是否兼容
+                    text_unit = text_info.units
+                    query_unit = query_info.units
+                    if not text_unit or not query_unit or text_unit[0] == query_unit[0]:
+                        return True
+
+    # 5. 分词匹配
+    text_words = set(text_info.tokens)
+    query_words = set(query_info.tokens)
+    common_words = text_words & query_words
+
+    # 如果查询词的大部分词都在文本中出现，认为是匹配的
+    if query_words and len(common_words) >= len(query_words) * 0.7:  # 70% 匹配率
+        return True
+
+    return False
@@ -0,0 +1,168 @@
+from typing import Callable, Dict, List, Optional
+import re
+from pypinyin import lazy_pinyin, Style
+import jieba
+
+# 单位转换映射
+unit_mapping = {
+    '度': '°',
+    '寸': 'inch',
+    '米': 'm',
+    'M': 'm',
+    '厘米': 'cm',
+    'CM': 'cm',
+    '毫米': 'mm',
+    'MM': 'mm',
+    '升': 'L',
+    '立方米': 'm³',
+    '兆帕': 'MPa',
+    '千帕': 'kPa',
+    '帕': 'Pa',
+    '千瓦': 'kW',
+    '瓦': 'W',
+    '千克': 'kg',
+    '克': 'g',
+    '牛': 'N',
+    '千牛': 'kN'
+}
+
+# 同音字映射
+homophone_mapping = {
+    '联': '连',
+    '津': '金',
+    '立': '利',
+    '星': '兴',
+    '达': '大',
+    '德': '得',
+    '隆': '龙',
+    '邦': '帮',
+    '宝': '保',
+    '盛': '胜'
+}
+
+# 缩写和别名映射
+alias_mapping = {
+    'ppr': 'PPR',
+    'pvc': 'PVC',
+    'upvc': 'UPVC',
+    'pe': 'PE',
+    'abs': 'ABS',
+    'hdpe': 'HDPE',
+    'cpvc': 'CPVC',
+    'pp-r': 'PPR',
+    'pvc-u': 'PVC-U',
+    'dn': 'DN'
+}
+
+def get_pinyin(text: str) -> str:
+    """获取文本的拼音表示"""
+    return ''.join(lazy_pinyin(text, style=Style.NORMAL))
+
+def _case_variants(key: str) -> List[str]:
+    """枚举键的全部大小写组合，用于大小写无关的缩写匹配"""
+    variants = ['']
+    for char in key:
+        options = {char.lower(), char.upper()}
+        variants = [prefix + option for prefix in variants for option in sorted(options)]
+    return variants
+
+def _trie_pattern(keys: List[str]) -> str:
+    """
+    把键集合编译成前缀树形状的正则
+
+    共享前缀只匹配一次，每个位置只需比较一个分支的首字符，
+    比扁平的 a|b|c 交替分支扫描得快；较长的键排在前面以保证最长匹配
+    """
+    trie: Dict[str, dict] = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        terminal = '' in node
+        branches = sorted(
+            (re.escape(char) + build(child) for char, child in node.items() if char),
+            key=len,
+            reverse=True
+        )
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if terminal else body
+
+    return build(trie)
+
+class CompiledNormalizer:
+    """
+    单遍文本标准化器
+
+    把缩写、单位、同音字三张映射表编译成一个前缀树正则和一张查找表，
+    一次线性扫描完成全部替换。缩写按全部大小写组合展开，因此大小写无关；
+    其余映射区分大小写。由于是单遍最长匹配，较长的键总是优先于它的前缀，
+    例如“厘米”整体替换为 cm，不会再被“米”提前截断成“厘m”。
+    """
+
+    def __init__(self, alias: Dict[str, str], unit: Dict[str, str], homophone: Dict[str, str]):
+        self.rebuild(alias, unit, homophone)
+
+    def rebuild(self, alias: Dict[str, str], unit: Dict[str, str], homophone: Dict[str, str]) -> None:
+        """根据映射表重新编译"""
+        # 同一个键出现在多张表时，按原先的处理顺序（缩写、单位、同音字）以先出现者为准
+        lookup: Dict[str, str] = {}
+        for key, replacement in alias.items():
+            for variant in _case_variants(key):
+                lookup.setdefault(variant, replacement)
+        for mapping in (unit, homophone):
+            for key, replacement in mapping.items():
+                lookup.setdefault(key, replacement)
+
+        self._lookup = lookup
+        self._pattern = re.compile(_trie_pattern(list(lookup))) if lookup else None
+        self._replace = lambda match: lookup[match[0]]
+
+    def normalize(self, text: str) -> str:
+        if not text:
+            return ""
+        if self._pattern is not None:
+            text = self._pattern.sub(self._replace, text)
+        return text.strip()
+
+_normalizer = CompiledNormalizer(alias_mapping, unit_mapping, homophone_mapping)
+
+# 映射表更新后需要通知的回调，例如清空依赖标准化结果的缓存
+mapping_listeners: List[Callable[[], None]] = []
+
+def reload_mappings(
+    alias: Optional[Dict[str, str]] = None,
+    unit: Optional[Dict[str, str]] = None,
+    homophone: Optional[Dict[str, str]] = None
+) -> None:
+    """
+    更新映射表并重新编译标准化器
+
+    映射表修改后必须经由此函数生效；直接修改模块级字典不会触发重新编译
+    """
+    for mapping, updates in ((alias_mapping, alias), (unit_mapping, unit), (homophone_mapping, homophone)):
+        if updates is not None:
+            mapping.clear()
+            mapping.update(updates)
+    _normalizer.rebuild(alias_mapping, unit_mapping, homophone_mapping)
+    for listener in mapping_listeners:
+        listener()
+
+def normalize_text(text: str) -> str:
+    """
+    标准化文本，处理单位、同音字和缩写
+    """
+    return _normalizer.normalize(text)
+
+def tokenize(text: str) -> List[str]:
+    """
+    标准化并分词，返回小写的非空词项
+
+    索引构建与查询解析共用此函数，保证两侧分词口径一致
+    """
+    normalized = normalize_text(text).lower()
+    return [term.strip() for term in jieba.cut(normalized) if term.strip()]
@@ -10,19 +10,70 @@ DB_CONFIG = {
     "database": "mioflow"
 }
 
+def split_sql_statements(lines):
+    """
+    按分号切分 SQL 语句，逐行读取
+
+    跳过字符串（'...'、"..."、`...`）和注释（--、#、/* */）中的分号，
+    因此 COMMENT '单位；说明' 或默认值中带分号的语句不会被截断。
+    """
+    statement = []
+    quote = None
+    block_comment = False
+    for line in lines:
+        i = 0
+        length = len(line)
+        while i < length:
+            char = line[i]
+            if block_comment:
+                if line.startswith('*/', i):
+                    block_comment = False
+                    i += 2
+                else:
+                    i += 1
+                continue
+            if quote:
+                statement.append(char)
+                if char == '\\' and quote != '`' and i + 1 < length:
+                    statement.append(line[i + 1])
+                    i += 2
+                    continue
+                if char == quote:
+                    quote = None
+                i += 1
+                continue
+            if char in ("'", '"', '`'):
+                quote = char
+            elif line.startswith('/*', i):
+                block_comment = True
+                i += 2
+                continue
+            elif char == '#' or (line.startswith('--', i) and line[i + 2:i + 3] in ('', ' ', '\t', '\n', '\r')):
+                # 行注释，保留换行以免拼接相邻的两行
+                statement.append('\n')
+                break
+            elif char == ';':
+                sql = ''.join(statement).strip()
+                if sql:
+                    yield sql
+                statement = []
+                i += 1
+                continue
+            statement.append(char)
+            i += 1
+    sql = ''.join(statement).strip()
+    if sql:
+        yield sql
+
 def execute_sql_file(filename):
     try:
-        # 读取SQL文件
-        with open(filename, 'r') as file:
-            sql_commands = file.read()
-
         # 连接到数据库
         conn = mysql.connector.connect(**DB_CONFIG)
         cursor = conn.cursor()
 
-        # 执行SQL命令
-        for command in sql_commands.split(';'):
-            if command.strip():
+        # 逐条执行SQL命令
+        with open(filename, 'r', encoding='utf-8') as file:
+            for command in split_sql_statements(file):
                 cursor.execute(command)
         
         # 提交更改
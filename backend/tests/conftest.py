@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 与 `cd backend && uvicorn main:app` 相同，以 backend 目录为导入根
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
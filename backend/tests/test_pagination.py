@@ -0,0 +1,30 @@
+import base64
+
+import pytest
+
+from services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("sort_key", [[12.5, "P00001"], ["P00001"], [0.0, "联塑-PPR/20"]])
+def test_round_trip(sort_key):
+    cursor = encode_cursor(sort_key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == sort_key
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    encode_cursor([1.0, "P00001"])[:-3],
+    encode_cursor([1.0, "P00001"]) + "A",
+    encode_cursor([]),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_cursor_must_decode_to_a_list():
+    cursor = base64.urlsafe_b64encode(b'{"score": 1}').decode("ascii")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
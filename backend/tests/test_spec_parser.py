@@ -0,0 +1,57 @@
+import pytest
+
+from services.spec_parser import SpecRange, SpecValue, parse_spec_ranges, parse_specs
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("20mm", [SpecValue("length", 0.02, "m")]),
+    ("2cm", [SpecValue("length", 0.02, "m")]),
+    ("1.6MPa", [SpecValue("pressure", 1.6e6, "Pa")]),
+    ("1.6兆帕", [SpecValue("pressure", 1.6e6, "Pa")]),
+    ("90度", [SpecValue("angle", 90.0, "°")]),
+])
+def test_units_are_converted_to_si(text, expected):
+    assert parse_specs(text) == expected
+
+
+def test_inch_sizes_also_give_nominal_size():
+    assert parse_specs("1.5寸") == [SpecValue("length", 0.0381, "m"), SpecValue("nominal_size", 40.0, "DN")]
+
+
+@pytest.mark.parametrize("fraction, decimal", [("1/2寸", "0.5寸"), ("1-1/2寸", "1.5寸"), ("3/4 寸", "0.75寸")])
+def test_fractions_match_decimal_inches(fraction, decimal):
+    assert parse_specs(fraction) == parse_specs(decimal)
+
+
+def test_zero_denominator_is_ignored():
+    assert parse_specs("1/0寸") == []
+
+
+def test_dn_and_pn():
+    assert parse_specs("DN25 PN16") == [SpecValue("nominal_size", 25.0, "DN"), SpecValue("pressure", 1.6e6, "Pa")]
+    # PN16 与 1.6MPa 是同一个压力
+    assert parse_specs("PN16") == parse_specs("1.6MPa")
+
+
+def test_default_unit_applies_to_bare_number_only():
+    assert parse_specs("1.6", default_unit="MPa") == [SpecValue("pressure", 1.6e6, "Pa")]
+    assert parse_specs("DN25", default_unit="MPa") == [SpecValue("nominal_size", 25.0, "DN")]
+
+
+@pytest.mark.parametrize("text", ['1/2"', "25x3.5", "φ20", "4分"])
+def test_unsupported_notations_parse_to_nothing(text):
+    # 英寸符号、外径 × 壁厚、φ 直径和“分”目前都不识别，查询时只按文本匹配
+    assert parse_specs(text) == []
+    assert parse_spec_ranges(text) == []
+
+
+def test_ranges():
+    assert parse_spec_ranges("1.0-1.6MPa") == [SpecRange("pressure", 1e6, 1.6e6, "Pa")]
+    assert parse_spec_ranges("32~20mm") == [SpecRange("length", 0.02, 0.032, "m")]
+
+
+def test_equal_conditions_outside_ranges():
+    assert parse_spec_ranges("DN25 1.6MPa") == [
+        SpecRange("nominal_size", 25.0, 25.0, "DN"),
+        SpecRange("pressure", 1.6e6, 1.6e6, "Pa"),
+    ]
@@ -0,0 +1,130 @@
+"""
+邮件发送压测：每封邮件新建 SMTP 连接 vs 发件箱复用连接
+
+在本机启动 aiosmtpd 作为 SMTP 替身（只接收不投递），分别测量：
+  - 改造前：请求路径上新建连接、发送、断开，调用方等待全部完成
+  - 发件箱：请求路径只 enqueue，后台协程复用连接发送
+输出请求路径耗时、端到端吞吐与延迟。--fail-every N 让替身每 N 封拒收一次（451），用于验证重试。
+
+运行（在仓库根目录下，需要安装 aiosmtpd）：
+    python -m src.server.benchmarks.bench_email_outbox [--emails 500] [--workers 4]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+from ..utils.email import render_reset_password_email
+from ..utils.email_outbox import EmailOutbox
+
+
+class SinkHandler:
+    """接收邮件并计数，每 fail_every 封返回一次临时错误"""
+
+    def __init__(self, fail_every: int = 0):
+        self.fail_every = fail_every
+        self.received = 0
+        self.rejected = 0
+        self.seen = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.seen += 1
+        if self.fail_every and self.seen % self.fail_every == 0:
+            self.rejected += 1
+            return "451 Requested action aborted: local error in processing"
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+def make_messages(count: int):
+    return [render_reset_password_email(f"user{i}@example.com", f"token-{i}", f"user{i}") for i in range(count)]
+
+
+async def connect_per_email(host: str, port: int, messages, concurrency: int):
+    """改造前的发送方式：每封邮件一次连接"""
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(message):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with aiosmtplib.SMTP(hostname=host, port=port, start_tls=False) as smtp:
+                    await smtp.send_message(message)
+            except aiosmtplib.SMTPException:
+                # 改造前没有重试，失败即丢失
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(message) for message in messages))
+    return time.perf_counter() - start, latencies, failures
+
+
+async def outbox(host: str, port: int, messages, workers: int):
+    email_outbox = EmailOutbox(
+        hostname=host, port=port, start_tls=False, workers=workers,
+        max_pending=len(messages), retry_backoff=0.05
+    )
+    email_outbox.start()
+    enqueue_latencies = []
+    start = time.perf_counter()
+    for message in messages:
+        enqueue_start = time.perf_counter()
+        email_outbox.enqueue(message)
+        enqueue_latencies.append(time.perf_counter() - enqueue_start)
+    while email_outbox.sent + email_outbox.failed < len(messages):
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    await email_outbox.stop()
+    return elapsed, enqueue_latencies, email_outbox.stats()
+
+
+def p95(values) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+async def run(args) -> None:
+    handler = SinkHandler(args.fail_every)
+    controller = Controller(handler, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        messages = make_messages(args.emails)
+        elapsed, latencies, failures = await connect_per_email("127.0.0.1", args.port, messages, args.workers)
+        print(
+            f"每封新建连接  {args.emails} 封  吞吐 {args.emails / elapsed:8.1f} 封/s  "
+            f"请求路径 p50 {statistics.median(latencies) * 1000:7.2f}ms  p95 {p95(latencies) * 1000:7.2f}ms  "
+            f"连接数 {args.emails}  失败 {failures}"
+        )
+
+        handler.seen = 0
+        messages = make_messages(args.emails)
+        elapsed, enqueue_latencies, stats = await outbox("127.0.0.1", args.port, messages, args.workers)
+        print(
+            f"发件箱        {args.emails} 封  吞吐 {args.emails / elapsed:8.1f} 封/s  "
+            f"请求路径 p50 {statistics.median(enqueue_latencies) * 1000:7.3f}ms  "
+            f"p95 {p95(enqueue_latencies) * 1000:7.3f}ms  "
+            f"端到端 p50 {stats['latency_p50_ms']:.1f}ms p95 {stats['latency_p95_ms']:.1f}ms  "
+            f"连接数 {stats['connections']}  重试 {stats['retried']}  失败 {stats['failed']}"
+        )
+    finally:
+        controller.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="邮件发送压测")
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4, help="发件箱发送协程数 / 改造前的并发数")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-every", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
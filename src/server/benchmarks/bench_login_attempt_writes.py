@@ -0,0 +1,91 @@
+"""
+登录记录写入吞吐：逐行 INSERT + COMMIT vs 写后队列批量 executemany
+
+逐行路径即改造前 login 的 finally 块：每次登录单独调用 record_login_attempt；
+批量路径把同样数量的记录放入 WriteBehindQueue，由后台任务按 batch_size 批量写入。
+压测记录使用专用用户名 bench_write_user，结束后删除。
+
+运行（在仓库根目录下，需要可用的 MySQL）：
+    python -m src.server.benchmarks.bench_login_attempt_writes [--rows 5000] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from ..database import AsyncDatabase, Database
+from ..utils.write_behind import WriteBehindQueue
+
+BENCH_USERNAME = "bench_write_user"
+
+
+def make_attempt(index: int) -> dict:
+    return {
+        "username": BENCH_USERNAME,
+        "ip_address": f"10.0.{index // 256 % 256}.{index % 256}",
+        "attempt_time": datetime.utcnow(),
+        "is_successful": index % 4 == 0,
+        "user_agent": "bench",
+    }
+
+
+def cleanup(database: Database) -> None:
+    with database.get_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM login_attempts WHERE username = %s", (BENCH_USERNAME,))
+        connection.commit()
+
+
+async def per_row(database: AsyncDatabase, rows: int, concurrency: int) -> float:
+    counter = iter(range(rows))
+
+    async def worker():
+        for index in counter:
+            await database.record_login_attempt(make_attempt(index))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def write_behind(database: AsyncDatabase, rows: int, concurrency: int, batch_size: int) -> float:
+    queue = WriteBehindQueue("bench", database.record_login_attempts, batch_size=batch_size, flush_interval=0.05)
+    queue.start()
+    counter = iter(range(rows))
+
+    async def worker():
+        for index in counter:
+            await queue.put(make_attempt(index))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # 计时包含把缓冲区全部写入数据库
+    await queue.stop()
+    return time.perf_counter() - start
+
+
+async def run(args) -> None:
+    database = Database()
+    async_database = AsyncDatabase(database)
+    try:
+        for label, benchmark in (
+            ("逐行 INSERT", per_row(async_database, args.rows, args.concurrency)),
+            (f"批量 x{args.batch_size}", write_behind(async_database, args.rows, args.concurrency, args.batch_size)),
+        ):
+            elapsed = await benchmark
+            print(f"{label:<12} {args.rows} 行  耗时 {elapsed:6.2f}s  吞吐 {args.rows / elapsed:9.1f} 行/s")
+    finally:
+        cleanup(database)
+        async_database.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录记录写入吞吐")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32, help="并发登录请求数")
+    parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
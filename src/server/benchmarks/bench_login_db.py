@@ -0,0 +1,150 @@
+"""
+登录路径数据库开销压测：每次调用新建连接 vs 连接池
+
+模拟一次登录依次执行的数据库调用（查询最近登录尝试、查询用户、创建会话、记录登录尝试），
+统计每次登录的耗时分位数，以及 MySQL 服务端 Connections 计数的增量（即新建的 TCP + 认证握手次数）。
+压测使用专用用户 bench_login_user，结束后删除其会话和登录记录。
+
+运行（在仓库根目录下，需要可用的 MySQL）：
+    python -m src.server.benchmarks.bench_login_db [--logins 200] [--threads 8]
+"""
+import argparse
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from ..database import Database
+
+BENCH_USERNAME = "bench_login_user"
+
+
+class ConnectPerCallDatabase(Database):
+    """改造前的实现：每次调用新建连接，用完即关闭"""
+
+    @contextmanager
+    def get_connection(self):
+        connection = mysql.connector.connect(**self.config)
+        try:
+            yield connection
+        finally:
+            if connection.is_connected():
+                connection.close()
+
+
+def server_connections(config: dict) -> int:
+    """服务端累计接受的连接数"""
+    connection = mysql.connector.connect(**config)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Connections'")
+        return int(cursor.fetchone()[1])
+    finally:
+        connection.close()
+
+
+def ensure_user(database: Database) -> dict:
+    user = database.get_user_by_username(BENCH_USERNAME)
+    if not user:
+        database.create_user({
+            "username": BENCH_USERNAME,
+            "email": f"{BENCH_USERNAME}@example.com",
+            "phone": "00000000000",
+            "hashed_password": "-",
+        })
+        user = database.get_user_by_username(BENCH_USERNAME)
+    return user
+
+
+def cleanup(database: Database, user_id: int) -> None:
+    with database.get_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM sessions WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM login_attempts WHERE username = %s", (BENCH_USERNAME,))
+        connection.commit()
+
+
+def login_once(database: Database, index: int) -> None:
+    now = datetime.utcnow()
+    database.get_recent_login_attempts(BENCH_USERNAME, "127.0.0.1")
+    user = database.get_user_by_username(BENCH_USERNAME)
+    database.create_session({
+        "user_id": user["id"],
+        "token": f"bench-{index}-{time.perf_counter_ns()}",
+        "refresh_token": f"bench-refresh-{index}",
+        "device_info": "bench",
+        "ip_address": "127.0.0.1",
+        "last_activity": now,
+        "expires_at": now + timedelta(hours=1),
+    })
+    database.record_login_attempt({
+        "username": BENCH_USERNAME,
+        "ip_address": "127.0.0.1",
+        "attempt_time": now,
+        "is_successful": True,
+        "user_agent": "bench",
+    })
+
+
+def run(database: Database, logins: int, threads: int):
+    latencies = []
+    lock = threading.Lock()
+    counter = iter(range(logins))
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            login_once(database, index)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    before = server_connections(database.config)
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    # 减去读取计数本身的那一次连接
+    connections = server_connections(database.config) - before - 1
+    latencies.sort()
+    return {
+        "throughput": logins / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "connections": connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="登录路径数据库开销压测")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=10)
+    args = parser.parse_args()
+
+    pooled = Database(pool_size=args.pool_size)
+    user = ensure_user(pooled)
+    try:
+        for label, database in (("每次新建连接", ConnectPerCallDatabase()), ("连接池", pooled)):
+            result = run(database, args.logins, args.threads)
+            print(
+                f"{label:<8} 吞吐 {result['throughput']:7.1f} 次登录/s  p50 {result['p50']:6.2f}ms  "
+                f"p95 {result['p95']:6.2f}ms  新建连接 {result['connections']}"
+                f"（每次登录 {result['connections'] / args.logins:.2f}）"
+            )
+    finally:
+        cleanup(pooled, user["id"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
+import threading
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool
+from mysql.connector.errors import PoolError
 from contextlib import contextmanager
 from datetime import datetime
 
+# 连接池配置：mysql-connector 的连接池上限为 32
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+# 连接池耗尽时等待空闲连接的秒数
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
 class Database:
-    def __init__(self):
+    def __init__(self, pool_size: int = DB_POOL_SIZE, pool_timeout: float = DB_POOL_TIMEOUT):
         self.config = {
             'host': '127.0.0.1',
             'port': 3306,
@@ -13,19 +25,53 @@ class Database:
             'password': 'Ac661978',
             'database': 'mioding'
         }
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self._pool: Optional[MySQLConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        # MySQLConnectionPool 在池耗尽时直接抛出 PoolError，用信号量让调用方排队等待
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _get_pool(self) -> MySQLConnectionPool:
+        """首次使用时创建连接池，导入模块时不连接数据库"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = MySQLConnectionPool(
+                        pool_name="mioding",
+                        pool_size=self.pool_size,
+                        # 归还时重置会话，结束未提交的事务，避免下一个使用者读到旧快照
+                        pool_reset_session=True,
+                        **self.config
+                    )
+        return self._pool
 
     @contextmanager
     def get_connection(self):
+        """
+        从连接池借出一个连接，离开 with 块时归还
+
+        取出时连接池会检查连接是否存活（is_connected 会 ping 服务端），
+        断开的连接自动重连后再交给调用方
+        """
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise PoolError(f"连接池已耗尽，等待 {self.pool_timeout:g} 秒后仍无空闲连接")
         connection = None
         try:
-            connection = mysql.connector.connect(**self.config)
+            connection = self._get_pool().get_connection()
             yield connection
         except Error as e:
             print(f"Error connecting to MySQL: {e}")
             raise
         finally:
-            if connection and connection.is_connected():
-                connection.close()
+            try:
+                if connection is not None:
+                    # 对池化连接而言 close() 即归还
+                    connection.close()
+            except Error as e:
+                print(f"Error returning MySQL connection to pool: {e}")
+            finally:
+                self._slots.release()
 
     def initialize_database(self):
         """初始化数据库表"""
@@ -70,12 +116,36 @@ class Database:
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
         """
+
+        # 登录限流启动时按时间定位同步起点；已存在的表也会补建
+        create_login_attempts_indexes = (
+            "CREATE INDEX idx_login_attempts_attempt_time ON login_attempts (attempt_time)",
+        )
+
+        # 已注销的令牌，各 worker 按自增 id 增量同步到内存中的吊销集合
+        create_revoked_tokens_table = """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            token VARCHAR(255) NOT NULL,
+            expires_at DATETIME NOT NULL,
+            revoked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_revoked_tokens_expires_at (expires_at)
+        )
+        """
         
         with self.get_connection() as connection:
             cursor = connection.cursor()
             cursor.execute(create_users_table)
             cursor.execute(create_sessions_table)
             cursor.execute(create_login_attempts_table)
+            for create_index in create_login_attempts_indexes:
+                try:
+                    cursor.execute(create_index)
+                except Error as e:
+                    # 1061：索引已存在
+                    if e.errno != 1061:
+                        raise
+            cursor.execute(create_revoked_tokens_table)
             connection.commit()
 
     # 用户相关方法
@@ -157,16 +227,53 @@ class Database:
             cursor.execute(query, (session_id,))
             connection.commit()
 
+    def update_sessions_activity(self, activities: List[tuple]):
+        """批量更新会话最后活动时间，activities 为 (last_activity, session_id) 列表"""
+        query = """
+        UPDATE sessions 
+        SET last_activity = %s
+        WHERE id = %s
+        """
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.executemany(query, activities)
+            connection.commit()
+
     def invalidate_session(self, token: str):
-        """使会话失效"""
+        """使会话失效，并登记到 revoked_tokens 供其他 worker 同步"""
         query = """
         UPDATE sessions 
         SET is_active = FALSE
         WHERE token = %s
         """
+        revoke_query = """
+        INSERT INTO revoked_tokens (token, expires_at)
+        SELECT token, expires_at FROM sessions WHERE token = %s
+        """
         with self.get_connection() as connection:
             cursor = connection.cursor()
             cursor.execute(query, (token,))
+            cursor.execute(revoke_query, (token,))
+            connection.commit()
+
+    def get_revoked_tokens_after(self, last_id: int) -> List[dict]:
+        """获取 id 大于 last_id 且尚未过期的吊销令牌"""
+        query = """
+        SELECT id, token, expires_at FROM revoked_tokens
+        WHERE id > %s AND expires_at > UTC_TIMESTAMP()
+        ORDER BY id
+        """
+        with self.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, (last_id,))
+            return cursor.fetchall()
+
+    def delete_expired_revoked_tokens(self):
+        """清理已过期的吊销记录，过期令牌本身已无法通过校验"""
+        query = "DELETE FROM revoked_tokens WHERE expires_at <= UTC_TIMESTAMP()"
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query)
             connection.commit()
 
     # 登录尝试相关方法
@@ -188,6 +295,27 @@ class Database:
             ))
             connection.commit()
 
+    def record_login_attempts(self, attempts: List[dict]):
+        """批量记录登录尝试，一次 executemany（mysql-connector 会改写为多行 INSERT）"""
+        query = """
+        INSERT INTO login_attempts (username, ip_address, attempt_time, 
+                                  is_successful, user_agent)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.executemany(query, [
+                (
+                    attempt['username'],
+                    attempt['ip_address'],
+                    attempt['attempt_time'],
+                    attempt['is_successful'],
+                    attempt['user_agent']
+                )
+                for attempt in attempts
+            ])
+            connection.commit()
+
     def get_recent_login_attempts(self, username: str, ip_address: str) -> List[dict]:
         """获取最近的登录尝试"""
         query = """
@@ -201,5 +329,106 @@ class Database:
             cursor.execute(query, (username, ip_address))
             return cursor.fetchall()
 
+    def get_first_login_attempt_id_since(self, since: datetime) -> Optional[int]:
+        """某一时间之后的第一条登录记录的 id（走 attempt_time 索引），没有时返回 None"""
+        query = "SELECT id FROM login_attempts WHERE attempt_time >= %s ORDER BY attempt_time LIMIT 1"
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, (since,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+
+    def get_failed_login_attempts_after(self, last_id: int, limit: int) -> List[dict]:
+        """按自增 id 增量读取失败登录记录，用于各 worker 同步登录限流计数"""
+        query = """
+        SELECT id, username, ip_address, attempt_time FROM login_attempts
+        WHERE id > %s AND is_successful = FALSE
+        ORDER BY id
+        LIMIT %s
+        """
+        with self.get_connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, (last_id, limit))
+            return cursor.fetchall()
+
+    def get_max_login_attempt_id(self) -> int:
+        """login_attempts 当前的最大 id"""
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM login_attempts")
+            return cursor.fetchone()[0]
+
+class AsyncDatabase:
+    """
+    Database 的异步版本，供 async 路由使用
+
+    方法与 Database 一一对应，同步调用在专用线程池中执行，不阻塞事件循环。
+    线程数与连接池大小一致，多出的请求在线程池队列中等待
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self._executor = ThreadPoolExecutor(max_workers=database.pool_size, thread_name_prefix="auth-db")
+
+    async def _run(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    async def initialize_database(self):
+        return await self._run(self.database.initialize_database)
+
+    async def get_user_by_username(self, username: str) -> Optional[dict]:
+        return await self._run(self.database.get_user_by_username, username)
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        return await self._run(self.database.get_user_by_email, email)
+
+    async def create_user(self, user_data: dict) -> int:
+        return await self._run(self.database.create_user, user_data)
+
+    async def create_session(self, session_data: dict) -> int:
+        return await self._run(self.database.create_session, session_data)
+
+    async def get_active_session(self, token: str) -> Optional[dict]:
+        return await self._run(self.database.get_active_session, token)
+
+    async def update_session_activity(self, session_id: int):
+        return await self._run(self.database.update_session_activity, session_id)
+
+    async def update_sessions_activity(self, activities: List[tuple]):
+        return await self._run(self.database.update_sessions_activity, activities)
+
+    async def invalidate_session(self, token: str):
+        return await self._run(self.database.invalidate_session, token)
+
+    async def get_revoked_tokens_after(self, last_id: int) -> List[dict]:
+        return await self._run(self.database.get_revoked_tokens_after, last_id)
+
+    async def delete_expired_revoked_tokens(self):
+        return await self._run(self.database.delete_expired_revoked_tokens)
+
+    async def record_login_attempt(self, attempt_data: dict):
+        return await self._run(self.database.record_login_attempt, attempt_data)
+
+    async def record_login_attempts(self, attempts: List[dict]):
+        return await self._run(self.database.record_login_attempts, attempts)
+
+    async def get_recent_login_attempts(self, username: str, ip_address: str) -> List[dict]:
+        return await self._run(self.database.get_recent_login_attempts, username, ip_address)
+
+    async def get_first_login_attempt_id_since(self, since: datetime) -> Optional[int]:
+        return await self._run(self.database.get_first_login_attempt_id_since, since)
+
+    async def get_failed_login_attempts_after(self, last_id: int, limit: int) -> List[dict]:
+        return await self._run(self.database.get_failed_login_attempts_after, last_id, limit)
+
+    async def get_max_login_attempt_id(self) -> int:
+        return await self._run(self.database.get_max_login_attempt_id)
+
 # 创建数据库实例
-db = Database()
\ No newline at end of file
+db = Database()
+# 异步路由使用的数据库实例
+async_db = AsyncDatabase(db)
\ No newline at end of file
@@ -1,7 +1,12 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import auth
-from .database import db
+from .database import async_db
+from .utils.password_hasher import password_hasher
+from .utils.session_cache import session_cache
+from .utils.login_rate_limiter import login_rate_limiter
+from .utils.write_behind import write_behind_queues
+from .utils.email import email_outbox
 
 app = FastAPI(title="MioDing API")
 
@@ -17,7 +22,24 @@ app.add_middleware(
 # 初始化数据库
 @app.on_event("startup")
 async def startup_event():
-    db.initialize_database()
+    await async_db.initialize_database()
+    await session_cache.start()
+    # 后台载入并持续同步登录失败记录，不阻塞启动
+    login_rate_limiter.start(async_db)
+    for queue in write_behind_queues:
+        queue.start()
+    email_outbox.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await session_cache.stop()
+    await login_rate_limiter.stop()
+    await email_outbox.stop()
+    # 关闭前写入缓冲区中的登录记录和会话活动时间
+    for queue in write_behind_queues:
+        await queue.stop()
+    async_db.shutdown()
+    password_hasher.shutdown()
 
 # 注册路由
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
\ No newline at end of file
@@ -7,9 +7,12 @@ import jwt
 
 from ..models.user import User
 from ..models.session import Session
-from ..models.login_attempt import LoginAttempt
-from ..database import db
-from ..utils.email import send_reset_password_email
+from ..database import async_db
+from ..utils.email import email_outbox
+from ..utils.password_hasher import password_hasher, PasswordHasherBusy
+from ..utils.login_rate_limiter import login_rate_limiter
+from ..utils.session_cache import session_cache
+from ..utils.write_behind import login_attempt_writer, write_behind_queues
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -32,6 +35,17 @@ class PasswordResetConfirm(BaseModel):
     token: str
     new_password: str
 
+async def run_password_hasher(operation, *args):
+    """在哈希线程池中执行，队列已满时返回 503"""
+    try:
+        return await operation(*args)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": "1"}
+        )
+
 def get_client_info(request: Request) -> dict:
     """获取客户端信息"""
     return {
@@ -43,22 +57,22 @@ def get_client_info(request: Request) -> dict:
 @router.post("/register")
 async def register(user_data: UserCreate):
     # 检查用户名是否已存在
-    if db.get_user_by_username(user_data.username):
+    if await async_db.get_user_by_username(user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名已存在"
         )
     
     # 检查邮箱是否已存在
-    if db.get_user_by_email(user_data.email):
+    if await async_db.get_user_by_email(user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="邮箱已被注册"
         )
 
     # 创建新用户
-    hashed_password = User.create_password_hash(user_data.password)
-    user_id = db.create_user({
+    hashed_password = await run_password_hasher(password_hasher.hash, user_data.password)
+    user_id = await async_db.create_user({
         "username": user_data.username,
         "email": user_data.email,
         "phone": user_data.phone,
@@ -75,25 +89,26 @@ async def login(
 ):
     client_info = get_client_info(request)
     
-    # 检查登录尝试次数
-    recent_attempts = db.get_recent_login_attempts(
-        form_data.username,
-        client_info["ip_address"]
-    )
+    # 检查登录尝试次数：按用户名和 IP 的内存滑动窗口计数（含后台同步的其他 worker 的失败），不查询 login_attempts
+    limit_status = login_rate_limiter.check(form_data.username, client_info["ip_address"])
     
-    if LoginAttempt.should_block_login(recent_attempts):
-        remaining_time = "15分钟" if len(recent_attempts) < 10 else "24小时"
+    if limit_status.blocked:
+        remaining_time = limit_status.retry_window
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=f"登录尝试次数过多，请在{remaining_time}后重试"
         )
 
     # 验证用户
-    user = db.get_user_by_username(form_data.username)
+    user = await async_db.get_user_by_username(form_data.username)
+    # 在 try 之外校验密码：哈希队列已满时直接返回 503，不计入登录失败次数
+    password_valid = bool(user) and await run_password_hasher(
+        password_hasher.verify, form_data.password, user["hashed_password"]
+    )
     login_successful = False
 
     try:
-        if not user or not User.verify_password(form_data.password, user["hashed_password"]):
+        if not password_valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="用户名或密码错误"
@@ -122,21 +137,24 @@ async def login(
             expires_at=Session.calculate_expiry(remember_me)
         )
 
-        # 保存会话
-        db.create_session(session.dict())
+        # 保存会话，并写入会话缓存，后续 session-info 无需查询数据库
+        session_id = await async_db.create_session(session.dict())
+        session_cache.put({**session.dict(), "id": session_id})
 
     finally:
-        # 记录登录尝试
-        db.record_login_attempt({
+        # 记录登录尝试：放入写后队列，由后台任务批量插入
+        attempt_time = datetime.utcnow()
+        await login_attempt_writer.put({
             "username": form_data.username,
             "ip_address": client_info["ip_address"],
-            "attempt_time": datetime.utcnow(),
+            "attempt_time": attempt_time,
             "is_successful": login_successful,
             "user_agent": client_info["user_agent"]
         })
 
         if not login_successful:
-            remaining = LoginAttempt.get_remaining_attempts(recent_attempts)
+            login_rate_limiter.record_failure(form_data.username, client_info["ip_address"], attempt_time)
+            remaining = login_rate_limiter.check(form_data.username, client_info["ip_address"]).remaining
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"用户名或密码错误。剩余尝试次数：15分钟内{remaining['fifteen_min_remaining']}次，24小时内{remaining['daily_remaining']}次"
@@ -156,7 +174,7 @@ async def login(
 @router.post("/logout")
 async def logout(token: str = Depends(oauth2_scheme)):
     """登出用户"""
-    db.invalidate_session(token)
+    await session_cache.revoke(token)
     return {"message": "登出成功"}
 
 @router.post("/refresh-token")
@@ -197,19 +215,41 @@ async def refresh_token(refresh_token: str):
 @router.get("/session-info")
 async def get_session_info(token: str = Depends(oauth2_scheme)):
     """获取当前会话信息"""
-    session = db.get_active_session(token)
+    # 本地校验 JWT 并查会话缓存，未命中时才查询数据库
+    session = await session_cache.get(token)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Session not found or expired"
         )
     
-    # 更新最后活动时间
-    db.update_session_activity(session["id"])
+    last_activity = session["last_activity"]
+    # 更新最后活动时间：在内存中合并，由后台任务批量写回
+    await session_cache.touch(session)
     
     return {
         "session_id": session["id"],
-        "last_activity": session["last_activity"],
+        "last_activity": last_activity,
         "expires_at": session["expires_at"],
         "device_info": session["device_info"]
-    }
\ No newline at end of file
+    }
+
+@router.get("/metrics/password-hash")
+async def get_password_hash_metrics():
+    """密码哈希线程池统计：排队数、拒绝数、哈希 / 校验 / 排队耗时"""
+    return password_hasher.stats()
+
+@router.get("/metrics/session-cache")
+async def get_session_cache_metrics():
+    """会话缓存统计：缓存会话数、吊销令牌数、命中 / 未命中"""
+    return session_cache.stats()
+
+@router.get("/metrics/write-behind")
+async def get_write_behind_metrics():
+    """写后队列统计：缓冲行数、合并 / 背压次数、已写入行数与批次"""
+    return {queue.name: queue.stats() for queue in write_behind_queues}
+
+@router.get("/metrics/email-outbox")
+async def get_email_outbox_metrics():
+    """发件箱统计：待发送数、已发送 / 重试 / 失败数、SMTP 连接数、端到端延迟"""
+    return email_outbox.stats()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 认证服务内部使用相对导入，测试以 src 目录为导入根，按 server 包导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
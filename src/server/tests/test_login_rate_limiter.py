@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from server.utils.login_rate_limiter import LoginRateLimiter
+
+NOW = 1_700_000_000.0
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+
+def fail(limiter, count, username="alice", ip_address="10.0.0.1", start=NOW, step=1.0):
+    for i in range(count):
+        limiter.record_failure(username, ip_address, datetime.utcfromtimestamp(start + i * step))
+
+
+def test_fifteen_minute_window_blocks_after_five_failures():
+    limiter = LoginRateLimiter()
+    fail(limiter, 4)
+    status = limiter.check("alice", "10.0.0.1", now=NOW + 10)
+    assert not status.blocked
+    assert status.remaining == {"fifteen_min_remaining": 1, "daily_remaining": 6}
+
+    fail(limiter, 1, start=NOW + 5)
+    status = limiter.check("alice", "10.0.0.1", now=NOW + 10)
+    assert status.blocked
+    assert status.retry_window == "15分钟"
+
+
+def test_failures_slide_out_of_the_short_window():
+    limiter = LoginRateLimiter()
+    fail(limiter, 5)
+    status = limiter.check("alice", "10.0.0.1", now=NOW + 15 * MINUTE + 10)
+    assert not status.blocked
+    assert status.remaining == {"fifteen_min_remaining": 5, "daily_remaining": 5}
+
+
+def test_daily_window_blocks_after_ten_failures():
+    limiter = LoginRateLimiter()
+    fail(limiter, 10, step=20 * MINUTE)
+    status = limiter.check("alice", "10.0.0.1", now=NOW + 10 * 20 * MINUTE)
+    assert status.blocked
+    assert status.retry_window == "24小时"
+    assert not limiter.check("alice", "10.0.0.1", now=NOW + 25 * HOUR).blocked
+
+
+def test_username_and_ip_are_counted_separately():
+    limiter = LoginRateLimiter()
+    for i in range(5):
+        limiter.record_failure("alice", f"10.0.0.{i}", datetime.utcfromtimestamp(NOW + i))
+    # 同一用户名从不同 IP 失败，按用户名计数
+    assert limiter.check("alice", "10.0.0.99", now=NOW + 10).blocked
+    # 同一 IP 尝试不同用户名，按 IP 计数
+    assert limiter.check("bob", "10.0.0.1", now=NOW + 10).remaining["fifteen_min_remaining"] == 4
+    assert not limiter.check("bob", "10.0.0.99", now=NOW + 10).blocked
+
+
+def test_only_the_most_recent_failures_are_kept():
+    limiter = LoginRateLimiter()
+    fail(limiter, 10, start=NOW)
+    # 更早的同步记录不应挤掉窗口内的记录
+    limiter.seed([
+        {"username": "alice", "ip_address": "10.0.0.1", "attempt_time": datetime.utcfromtimestamp(NOW - HOUR)}
+    ])
+    status = limiter.check("alice", "10.0.0.1", now=NOW + 10)
+    assert status.remaining == {"fifteen_min_remaining": 0, "daily_remaining": 0}
+
+
+def test_least_recently_failed_keys_are_evicted():
+    limiter = LoginRateLimiter(max_keys=4)
+    fail(limiter, 1, username="alice", ip_address="10.0.0.1")
+    fail(limiter, 1, username="bob", ip_address="10.0.0.2", start=NOW + 1)
+    fail(limiter, 1, username="carol", ip_address="10.0.0.3", start=NOW + 2)
+    assert limiter.stats()["keys"] == 4
+    assert limiter.check("alice", "10.0.0.1", now=NOW + 10).remaining["fifteen_min_remaining"] == 5
+
+
+class FakeDatabase:
+    """按 login_attempts 的自增 id 返回记录"""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, username, ip_address, attempt_time, is_successful=False):
+        self.rows.append({
+            "id": len(self.rows) + 1,
+            "username": username,
+            "ip_address": ip_address,
+            "attempt_time": attempt_time,
+            "is_successful": is_successful,
+        })
+
+    async def get_first_login_attempt_id_since(self, since):
+        return next((row["id"] for row in self.rows if row["attempt_time"] >= since), None)
+
+    async def get_max_login_attempt_id(self):
+        return len(self.rows)
+
+    async def get_failed_login_attempts_after(self, last_id, limit):
+        return [row for row in self.rows if row["id"] > last_id and not row["is_successful"]][:limit]
+
+
+def test_sync_loads_the_last_day_in_batches_and_skips_own_failures():
+    async def run():
+        database = FakeDatabase()
+        now = datetime.utcnow()
+        database.add("alice", "10.0.0.1", now - timedelta(days=2))
+        for i in range(7):
+            database.add("alice", "10.0.0.1", now - timedelta(hours=1, seconds=i))
+        database.add("alice", "10.0.0.1", now - timedelta(hours=1), is_successful=True)
+
+        limiter = LoginRateLimiter(sync_batch=3)
+        while await limiter.sync(database):
+            pass
+        assert limiter.check("alice", "10.0.0.1").remaining == {"fifteen_min_remaining": 5, "daily_remaining": 3}
+
+        # 本 worker 的失败已经计入，写入 login_attempts 后（时间截断到秒）同步回来时跳过
+        attempt_time = datetime.utcnow()
+        limiter.record_failure("bob", "10.0.0.2", attempt_time)
+        database.add("bob", "10.0.0.2", attempt_time.replace(microsecond=0))
+        # 其他 worker 的失败
+        database.add("carol", "10.0.0.3", datetime.utcnow())
+        await limiter.sync(database)
+        assert limiter.check("bob", "10.0.0.2").remaining["fifteen_min_remaining"] == 4
+        assert limiter.check("carol", "10.0.0.3").remaining["fifteen_min_remaining"] == 4
+
+    asyncio.run(run())
+
+
+def test_sync_starts_after_the_newest_attempt_when_the_window_is_empty():
+    async def run():
+        database = FakeDatabase()
+        database.add("alice", "10.0.0.1", datetime.utcnow() - timedelta(days=2))
+        limiter = LoginRateLimiter()
+        assert await limiter.sync(database) == 0
+        assert limiter.stats()["last_attempt_id"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,247 @@
+from collections import deque
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+import asyncio
+import os
+import time
+
+import aiosmtplib
+
+# 发送协程数，每个协程维护一条已登录的 SMTP 连接
+EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', '2'))
+# 待发送队列上限，超过后 enqueue 抛出 EmailOutboxFull
+EMAIL_OUTBOX_MAX_PENDING = int(os.getenv('EMAIL_OUTBOX_MAX_PENDING', '1000'))
+# 单封邮件最多发送次数（含首次）
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+# 重试退避的基数（秒），第 n 次重试等待 base * 2^(n-1)
+EMAIL_RETRY_BACKOFF = float(os.getenv('EMAIL_RETRY_BACKOFF', '2'))
+# 连接空闲超过该秒数后主动断开，避免被服务端超时踢掉后才发现
+EMAIL_IDLE_TIMEOUT = float(os.getenv('EMAIL_IDLE_TIMEOUT', '60'))
+# 计算分位数时保留的最近样本数
+LATENCY_SAMPLES = 1024
+
+
+class EmailOutboxFull(Exception):
+    """待发送队列已满"""
+
+
+class _Envelope:
+    __slots__ = ("message", "attempts", "enqueued_at")
+
+    def __init__(self, message: EmailMessage):
+        self.message = message
+        self.attempts = 0
+        self.enqueued_at = time.perf_counter()
+
+
+class EmailOutbox:
+    """
+    邮件发件箱
+
+    请求路径只调用 enqueue 把邮件放入队列，由后台的 workers 个发送协程取出发送。
+    每个协程复用一条已登录的 SMTP 连接，连续发送时不再重复 TLS 握手和登录；
+    连接空闲超过 idle_timeout 或出错时断开，下次发送前重新建立。
+    发送失败按指数退避重新入队，超过 max_attempts 次后放弃并记录；
+    收件人被拒绝和 5xx 错误为永久性失败，不再重试。
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: Optional[bool] = None,
+        workers: int = EMAIL_WORKERS,
+        max_pending: int = EMAIL_OUTBOX_MAX_PENDING,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        retry_backoff: float = EMAIL_RETRY_BACKOFF,
+        idle_timeout: float = EMAIL_IDLE_TIMEOUT
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # 等待退避重试的邮件：定时器 -> 邮件
+        self._retry_pending: Dict[asyncio.TimerHandle, _Envelope] = {}
+        self._stopping = False
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.dropped = 0
+        self.connections = 0
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        return self._queue
+
+    def enqueue(self, message: EmailMessage) -> None:
+        """放入待发送队列后立即返回"""
+        try:
+            self._ensure_queue().put_nowait(_Envelope(message))
+        except asyncio.QueueFull:
+            raise EmailOutboxFull(f"邮件队列已满（{self.max_pending}）")
+        self.enqueued += 1
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls
+        )
+        await smtp.connect()
+        if self.username:
+            await smtp.login(self.username, self.password)
+        self.connections += 1
+        return smtp
+
+    @staticmethod
+    async def _close(smtp: Optional[aiosmtplib.SMTP]) -> None:
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            smtp.close()
+
+    def _requeue(self, envelope: _Envelope) -> None:
+        try:
+            self._ensure_queue().put_nowait(envelope)
+        except asyncio.QueueFull:
+            self.failed += 1
+            print(f"发送邮件失败: 重试时队列已满，放弃发送给 {envelope.message['To']} 的邮件")
+
+    def _retry_later(self, envelope: _Envelope) -> None:
+        if self._stopping:
+            # 正在关闭，不再安排退避重试
+            self.dropped += 1
+            print(f"关闭时放弃重试发送给 {envelope.message['To']} 的邮件，已尝试 {envelope.attempts} 次")
+            return
+        self.retried += 1
+        delay = self.retry_backoff * 2 ** (envelope.attempts - 1)
+        loop = asyncio.get_running_loop()
+
+        def requeue():
+            self._retry_pending.pop(handle, None)
+            self._requeue(envelope)
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_pending[handle] = envelope
+
+    async def _worker(self) -> None:
+        queue = self._ensure_queue()
+        smtp: Optional[aiosmtplib.SMTP] = None
+        try:
+            while True:
+                try:
+                    envelope = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self._close(smtp)
+                    smtp = None
+                    continue
+                try:
+                    envelope.attempts += 1
+                    if smtp is None or not smtp.is_connected:
+                        smtp = await self._connect()
+                    await smtp.send_message(envelope.message)
+                    self.sent += 1
+                    self._latencies.append(time.perf_counter() - envelope.enqueued_at)
+                except aiosmtplib.SMTPRecipientsRefused as e:
+                    # 所有收件人都被拒绝（异常本身没有 code），连接仍然可用，重试没有意义
+                    self.failed += 1
+                    print(f"发送邮件失败: 收件人被拒绝 {', '.join(r.recipient for r in e.recipients)}")
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    code = getattr(e, "code", None)
+                    if code is None or code == 421:
+                        # 连接层错误或服务端要求断开，连接状态未知，丢弃后下次重建
+                        if smtp is not None:
+                            smtp.close()
+                        smtp = None
+                    if code is not None and code >= 500:
+                        # 5xx 为永久性错误（如收件人不存在），重试没有意义
+                        self.failed += 1
+                        print(f"发送邮件失败: {str(e)}")
+                    elif envelope.attempts < self.max_attempts:
+                        self._retry_later(envelope)
+                    else:
+                        self.failed += 1
+                        print(f"发送邮件失败: {str(e)}，已尝试 {envelope.attempts} 次")
+                except Exception as e:
+                    # 其他异常（如邮件内容无法编码）不能让发送任务退出，记为失败并丢弃连接
+                    self.failed += 1
+                    if smtp is not None:
+                        smtp.close()
+                    smtp = None
+                    print(f"发送邮件失败: {str(e)}")
+                finally:
+                    queue.task_done()
+        finally:
+            await self._close(smtp)
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        等待队列中的邮件发送完毕（最多 timeout 秒），然后停止发送协程
+
+        等待退避重试的邮件不再等到退避结束，立即重新入队，与队列中的邮件一起发送；
+        超时后仍未发出的邮件计入 dropped 并记录
+        """
+        self._stopping = True
+        pending = list(self._retry_pending.values())
+        for handle in self._retry_pending:
+            handle.cancel()
+        self._retry_pending.clear()
+        if self._queue is not None and self._tasks:
+            for envelope in pending:
+                self._requeue(envelope)
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        elif pending:
+            self.dropped += len(pending)
+            print(f"关闭时放弃 {len(pending)} 封等待重试的邮件")
+        if self._queue is not None and self._queue.qsize():
+            self.dropped += self._queue.qsize()
+            print(f"关闭时仍有 {self._queue.qsize()} 封邮件未发送")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stopping = False
+
+    def stats(self) -> Dict[str, float]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3) if latencies else 0.0
+
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "retry_scheduled": len(self._retry_pending),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "connections": self.connections,
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+        }
@@ -0,0 +1,199 @@
+from bisect import insort
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import asyncio
+import os
+import time
+
+# 登录失败限制：(窗口秒数, 最多失败次数, 提示文案)，与 LoginAttempt.should_block_login 的规则一致
+LOGIN_LIMITS = (
+    (15 * 60, 5, "15分钟"),
+    (24 * 60 * 60, 10, "24小时"),
+)
+# 内存中最多跟踪的用户名 / IP 数，超出后淘汰最久没有失败记录的键
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv('LOGIN_LIMITER_MAX_KEYS', '100000'))
+# 从 login_attempts 同步其他 worker 失败记录的间隔（秒）
+LOGIN_LIMITER_SYNC_INTERVAL = float(os.getenv('LOGIN_LIMITER_SYNC_INTERVAL', '2'))
+# 每次同步查询最多读取的记录数；启动时的 24 小时历史也按这个大小分批在后台载入
+LOGIN_LIMITER_SYNC_BATCH = int(os.getenv('LOGIN_LIMITER_SYNC_BATCH', '5000'))
+# 本 worker 记录的失败在同步回来时按 (用户名, IP, 时间) 去重；attempt_time 存到秒，允许的时间差
+OWN_FAILURE_TOLERANCE = 1.0
+# 超过该秒数仍未同步回来的本地失败（例如写后队列丢弃了该批）不再参与去重
+OWN_FAILURE_TTL = 300
+
+
+class LimitStatus(NamedTuple):
+    blocked: bool
+    retry_window: Optional[str]          # 触发限制的窗口文案，例如 “15分钟”
+    remaining: Dict[str, int]            # 与 LoginAttempt.get_remaining_attempts 的返回格式一致
+
+
+def _timestamp(value: datetime) -> float:
+    """login_attempts.attempt_time 存的是 UTC 的 naive datetime"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class LoginRateLimiter:
+    """
+    登录失败次数的滑动窗口计数
+
+    按用户名和 IP 分别记录最近的失败时间。判断是否超限只需要知道窗口内的失败次数是否
+    达到上限，因此每个键只保留最近 max_failures 个失败时间（最大上限为 10），
+    检查和记录都是 O(1)，登录请求不再查询 login_attempts。
+
+    多 worker 之间通过 login_attempts 共享计数：后台任务与吊销令牌同步相同，
+    按自增 id 增量读取新的失败记录并入本地计数；本 worker 自己记录的失败在同步
+    回来时跳过。其他 worker 的失败最多延迟一个写后刷新间隔加一个同步间隔可见。
+    启动时最近 24 小时的历史记录同样由后台任务分批载入，不阻塞登录请求。
+    """
+
+    def __init__(
+        self,
+        limits=LOGIN_LIMITS,
+        max_keys: int = LOGIN_LIMITER_MAX_KEYS,
+        sync_interval: float = LOGIN_LIMITER_SYNC_INTERVAL,
+        sync_batch: int = LOGIN_LIMITER_SYNC_BATCH
+    ):
+        self.limits = limits
+        self.max_keys = max_keys
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.max_failures = max(limit for _, limit, _ in limits)
+        self.longest_window = max(window for window, _, _ in limits)
+        self._failures: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        # 本 worker 记录、尚未从 login_attempts 同步回来的失败：(用户名, IP) -> 时间列表
+        self._own: Dict[Tuple[str, str], List[float]] = {}
+        self._last_attempt_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self.synced = 0
+
+    def _keys(self, username: str, ip_address: str) -> Tuple[Tuple[str, str], ...]:
+        return (("user", username), ("ip", ip_address))
+
+    def _count(self, key: Tuple[str, str], window: int, now: float) -> int:
+        failures = self._failures.get(key)
+        if not failures:
+            return 0
+        cutoff = now - window
+        return sum(1 for moment in failures if moment >= cutoff)
+
+    def _add(self, username: str, ip_address: str, when: float) -> None:
+        for key in self._keys(username, ip_address):
+            failures = self._failures.get(key)
+            if failures is None:
+                failures = self._failures[key] = []
+            # 按时间有序保留最近的 max_failures 个；同步来的记录可能早于本地记录
+            if len(failures) < self.max_failures or when > failures[0]:
+                insort(failures, when)
+                if len(failures) > self.max_failures:
+                    del failures[0]
+            self._failures.move_to_end(key)
+        while len(self._failures) > self.max_keys:
+            self._failures.popitem(last=False)
+
+    def record_failure(self, username: str, ip_address: str, attempt_time: Optional[datetime] = None) -> None:
+        """记录本 worker 的一次登录失败，立即生效；attempt_time 与写入 login_attempts 的值相同"""
+        when = time.time() if attempt_time is None else _timestamp(attempt_time)
+        self._add(username, ip_address, when)
+        self._own.setdefault((username, ip_address), []).append(when)
+
+    def check(self, username: str, ip_address: str, now: Optional[float] = None) -> LimitStatus:
+        """用户名或 IP 任一在任一窗口内达到上限即阻止登录"""
+        now = time.time() if now is None else now
+        keys = self._keys(username, ip_address)
+        blocked_window = None
+        remaining = []
+        for window, limit, label in self.limits:
+            failures = max(self._count(key, window, now) for key in keys)
+            if failures >= limit and blocked_window is None:
+                blocked_window = label
+            remaining.append(max(0, limit - failures))
+        return LimitStatus(
+            blocked_window is not None,
+            blocked_window,
+            {"fifteen_min_remaining": remaining[0], "daily_remaining": remaining[1]}
+        )
+
+    def seed(self, attempts: Iterable[dict]) -> None:
+        """并入 login_attempts 中的失败记录；本 worker 已记录过的跳过"""
+        for attempt in attempts:
+            username, ip_address = attempt["username"], attempt["ip_address"]
+            when = _timestamp(attempt["attempt_time"])
+            own = self._own.get((username, ip_address))
+            if own:
+                match = next((moment for moment in own if abs(moment - when) <= OWN_FAILURE_TOLERANCE), None)
+                if match is not None:
+                    own.remove(match)
+                    if not own:
+                        del self._own[(username, ip_address)]
+                    continue
+            self._add(username, ip_address, when)
+            self.synced += 1
+
+    def _expire_own(self, now: float) -> None:
+        cutoff = now - OWN_FAILURE_TTL
+        for key in list(self._own):
+            moments = [moment for moment in self._own[key] if moment >= cutoff]
+            if moments:
+                self._own[key] = moments
+            else:
+                del self._own[key]
+
+    async def sync(self, database) -> int:
+        """
+        读取上次同步之后的失败记录，返回读取的条数
+
+        首次调用时定位到最近一个最长窗口内的第一条记录；每次最多读取 sync_batch 条，
+        积压（例如启动时的 24 小时历史）在后续调用中继续读取
+        """
+        if self._last_attempt_id is None:
+            since = datetime.utcfromtimestamp(time.time() - self.longest_window)
+            first_id = await database.get_first_login_attempt_id_since(since)
+            if first_id is None:
+                self._last_attempt_id = await database.get_max_login_attempt_id()
+                return 0
+            self._last_attempt_id = first_id - 1
+        rows = await database.get_failed_login_attempts_after(self._last_attempt_id, self.sync_batch)
+        if rows:
+            self.seed(rows)
+            self._last_attempt_id = rows[-1]["id"]
+        self._expire_own(time.time())
+        return len(rows)
+
+    async def _run(self, database) -> None:
+        while True:
+            try:
+                # 有积压时连续读取，追上后按间隔同步
+                while await self.sync(database) >= self.sync_batch:
+                    await asyncio.sleep(0)
+            except Exception as e:
+                print(f"Error syncing login attempts: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self, database) -> None:
+        """启动后台同步任务（含启动时的历史载入），不等待载入完成"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(database))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self._failures),
+            "max_keys": self.max_keys,
+            "synced": self.synced,
+            "last_attempt_id": self._last_attempt_id,
+        }
+
+
+login_rate_limiter = LoginRateLimiter()
@@ -0,0 +1,118 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+import asyncio
+import os
+import threading
+import time
+
+from ..models.user import User
+
+# 哈希线程数：bcrypt 计算期间释放 GIL，线程池即可利用多核
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 2)))
+# 排队 + 执行中的请求上限，超过后直接拒绝，避免登录高峰把延迟无限拉长
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', str(PASSWORD_HASH_WORKERS * 8)))
+# 计算分位数时保留的最近样本数
+TIMING_SAMPLES = 1024
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """哈希队列已满"""
+
+
+class _Timings:
+    """单项操作的耗时统计：调用次数、累计 / 最大耗时、最近样本的分位数"""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = deque(maxlen=TIMING_SAMPLES)
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.samples.append(seconds)
+
+    def stats(self) -> Dict[str, float]:
+        samples = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3) if samples else 0.0
+
+        return {
+            "calls": self.calls,
+            "avg_ms": round(self.total_seconds / self.calls * 1000, 3) if self.calls else 0.0,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    """
+    在有界线程池中执行 bcrypt 哈希与校验
+
+    每次 bcrypt 调用耗费 100 毫秒以上 CPU，在事件循环线程上执行会卡住同一 worker 的所有请求。
+    这里把计算放到专用线程池，并限制排队数量：超过 max_pending 时抛出 PasswordHasherBusy，
+    由路由返回 503，而不是让请求无限排队。记录每次调用的排队耗时和计算耗时。
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self._timings = {"hash": _Timings(), "verify": _Timings(), "queue_wait": _Timings()}
+
+    async def _submit(self, kind: str, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy(f"密码校验队列已满（{self.max_pending}）")
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def run() -> T:
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._timings["queue_wait"].record(started - submitted)
+                    self._timings[kind].record(finished - started)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, run)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", User.create_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", User.verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "rejected": self.rejected,
+                **{kind: timings.stats() for kind, timings in self._timings.items()},
+            }
+
+
+password_hasher = PasswordHasher()
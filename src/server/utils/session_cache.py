@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import asyncio
+import os
+import time
+
+import jwt
+
+from ..database import async_db
+from ..models.user import SECRET_KEY, ALGORITHM
+from .write_behind import session_activity_writer
+
+# 内存中最多缓存的会话数
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '50000'))
+# 从 revoked_tokens 同步吊销令牌的间隔（秒），即其他 worker 注销后本 worker 最长的感知延迟
+REVOCATION_SYNC_INTERVAL = float(os.getenv('REVOCATION_SYNC_INTERVAL', '2'))
+# 清理过期吊销记录的间隔（秒）
+REVOCATION_CLEANUP_INTERVAL = 3600
+
+
+def _timestamp(value: datetime) -> float:
+    """sessions / revoked_tokens 中的时间均为 UTC 的 naive datetime"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class SessionCache:
+    """
+    会话校验缓存
+
+    令牌是签名的 JWT，先在本地校验签名和有效期，再查内存中的吊销集合和会话缓存，
+    只有缓存未命中时才查询 sessions。注销写入 revoked_tokens，各 worker 的后台任务
+    按自增 id 增量同步吊销集合；last_activity 交给 session_activity_writer 按会话合并、
+    批量写回，已认证请求不再产生同步的数据库写入。
+    """
+
+    def __init__(
+        self,
+        database,
+        max_entries: int = SESSION_CACHE_MAX_ENTRIES,
+        sync_interval: float = REVOCATION_SYNC_INTERVAL
+    ):
+        self.database = database
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+        self._sessions: "OrderedDict[str, dict]" = OrderedDict()
+        # 吊销令牌 -> 会话过期时间戳，过期后移除
+        self._revoked: Dict[str, float] = {}
+        self._last_revoked_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def verify_token(token: str) -> bool:
+        """
+        只在本地校验签名和格式；会话令牌即 30 分钟过期的访问令牌，
+        会话是否有效以 sessions.expires_at 为准（记住我的会话可达 30 天）
+        """
+        try:
+            jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
+            return True
+        except (jwt.ExpiredSignatureError, jwt.JWTError):
+            return False
+
+    def put(self, session: dict) -> None:
+        self._sessions[session["token"]] = dict(session)
+        self._sessions.move_to_end(session["token"])
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+
+    async def get(self, token: str) -> Optional[dict]:
+        """返回有效会话，令牌无效、已吊销或会话过期时返回 None"""
+        if token in self._revoked or not self.verify_token(token):
+            return None
+        session = self._sessions.get(token)
+        if session is not None:
+            if session["expires_at"] <= datetime.utcnow():
+                del self._sessions[token]
+                return None
+            self._sessions.move_to_end(token)
+            self.hits += 1
+            return session
+        self.misses += 1
+        session = await self.database.get_active_session(token)
+        if session and token not in self._revoked:
+            self.put(session)
+        return session
+
+    async def touch(self, session: dict) -> None:
+        """记录一次活动，同一会话在写回前只保留最新的时间"""
+        now = datetime.utcnow()
+        session["last_activity"] = now
+        await session_activity_writer.put((now, session["id"]), key=session["id"])
+
+    async def revoke(self, token: str) -> None:
+        """注销令牌：本 worker 立即生效，其他 worker 在下一次同步后生效"""
+        session = self._sessions.pop(token, None)
+        # 未缓存时先保留一段时间，下一次同步会用 revoked_tokens 中的过期时间覆盖
+        expires_at = _timestamp(session["expires_at"]) if session else time.time() + REVOCATION_CLEANUP_INTERVAL
+        self._revoked[token] = expires_at
+        await self.database.invalidate_session(token)
+
+    async def sync_revocations(self) -> None:
+        for row in await self.database.get_revoked_tokens_after(self._last_revoked_id):
+            self._revoked[row["token"]] = _timestamp(row["expires_at"])
+            self._sessions.pop(row["token"], None)
+            self._last_revoked_id = max(self._last_revoked_id, row["id"])
+        now = time.time()
+        for token in [token for token, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[token]
+
+    async def _run(self) -> None:
+        last_cleanup = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync_revocations()
+                now = time.monotonic()
+                if now - last_cleanup >= REVOCATION_CLEANUP_INTERVAL:
+                    last_cleanup = now
+                    await self.database.delete_expired_revoked_tokens()
+            except Exception as e:
+                print(f"Error syncing session cache: {e}")
+
+    async def start(self) -> None:
+        """载入全部未过期的吊销令牌并启动后台同步任务"""
+        try:
+            await self.sync_revocations()
+        except Exception as e:
+            print(f"Error loading revoked tokens: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台同步任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "revoked": len(self._revoked),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+session_cache = SessionCache(async_db)
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+import asyncio
+import itertools
+import os
+import time
+
+from ..database import async_db
+
+# 单批最多写入的行数
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '500'))
+# 登录记录的最长缓冲时间（秒）
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '1'))
+# 缓冲区上限，写满后 put 等待刷新腾出空间
+WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '10000'))
+# 会话 last_activity 的合并写回间隔（秒）
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '30'))
+# 批量写入失败后的重试次数，超过后丢弃该批并记录
+WRITE_BEHIND_RETRIES = 3
+
+
+class WriteBehindQueue:
+    """
+    写后缓冲队列
+
+    put 把待写入的行放入内存缓冲区即返回，后台任务在缓冲达到 batch_size 或距离上次写入
+    超过 flush_interval 时，把一批行交给 flush（一次 executemany）写入数据库。
+    带 key 的行会合并：同一 key 尚未写入时只保留最新的一行（例如同一会话的活动时间）。
+    缓冲区达到 max_pending 时 put 会等待，直到后台写入腾出空间，形成背压。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[Any]], Awaitable[Any]],
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING
+    ):
+        self.name = name
+        self._flush = flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.flush_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def put(self, item: Any, key: Optional[Hashable] = None) -> None:
+        slot = ("key", key) if key is not None else ("seq", next(self._sequence))
+        if slot in self._items:
+            self._items[slot] = item
+            self.coalesced += 1
+            return
+        while len(self._items) >= self.max_pending:
+            self.blocked += 1
+            self._space.clear()
+            self._wakeup.set()
+            await self._space.wait()
+        self._items[slot] = item
+        self.enqueued += 1
+        if len(self._items) >= self.batch_size:
+            self._wakeup.set()
+
+    def _take_batch(self) -> List[Any]:
+        batch = []
+        while self._items and len(batch) < self.batch_size:
+            batch.append(self._items.popitem(last=False)[1])
+        self._space.set()
+        return batch
+
+    async def _write(self, batch: List[Any]) -> None:
+        for attempt in range(WRITE_BEHIND_RETRIES + 1):
+            try:
+                start = time.perf_counter()
+                await self._flush(batch)
+                self.flush_seconds += time.perf_counter() - start
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == WRITE_BEHIND_RETRIES:
+                    self.dropped += len(batch)
+                    print(f"Error flushing {self.name}, dropped {len(batch)} rows: {e}")
+                    return
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def flush(self) -> None:
+        """立即写入缓冲区中的全部行"""
+        while self._items:
+            await self._write(self._take_batch())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._items:
+                await self._write(self._take_batch())
+                # 不足一批的剩余行等下一个周期，除非缓冲区仍在背压状态
+                if len(self._items) < self.batch_size and self._space.is_set():
+                    break
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务，并把缓冲区剩余的行全部写入"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._items),
+            "max_pending": self.max_pending,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "blocked": self.blocked,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "avg_batch": round(self.written / self.batches, 1) if self.batches else 0.0,
+            "avg_flush_ms": round(self.flush_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+        }
+
+
+# 登录记录：每次登录一行，按批量插入
+login_attempt_writer = WriteBehindQueue("login_attempts", async_db.record_login_attempts)
+# 会话活动时间：按会话 ID 合并，只写最新的时间
+session_activity_writer = WriteBehindQueue(
+    "session_activity",
+    async_db.update_sessions_activity,
+    flush_interval=ACTIVITY_FLUSH_INTERVAL
+)
+write_behind_queues = (login_attempt_writer, session_activity_writer)